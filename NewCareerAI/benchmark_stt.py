@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+⏱️ benchmark_stt.py - STT Backend Benchmark
+============================================
+ฟีเจอร์หลัก:
+- เปรียบเทียบ STT backend ต่างๆ บนไฟล์เสียงเดียวกัน
+- วัดเวลาโหลดโมเดล เวลาถอดเสียง และ real-time factor (RTF)
+- แสดงข้อความที่ถอดได้ของแต่ละ backend เพื่อเทียบความแม่นยำ
+
+ความสามารถ:
+- เลือก backend และขนาดโมเดลได้จาก command line
+- รันซ้ำหลายรอบเพื่อหาค่าเฉลี่ย (รอบแรกเป็น warm-up)
+- RTF < 1 หมายถึงถอดเสียงได้เร็วกว่าความยาวเสียงจริง
+- --short-check: เทียบ short-utterance mode กับหน้าต่าง 30 วินาทีเต็ม (เวลา + CER)
+
+การใช้งาน:
+  python benchmark_stt.py answer_1.wav
+  python benchmark_stt.py answer_1.wav --backends whisper faster-whisper --model-size small --runs 3
+  python benchmark_stt.py answer_1.wav --short-check --model-size small
+============================================
+"""
+import os
+import sys
+import time
+import argparse
+
+# เพิ่ม modules path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules'))
+
+from config import whisper_config, audio_config
+from stt_engines import create_engine, available_engines, load_audio_file
+from vad import trim_silence
+
+
+def benchmark_backend(backend, model_size, audio, runs):
+    """วัดผล backend เดียว คืนค่า dict ของผลลัพธ์ หรือ None หากล้มเหลว"""
+    try:
+        engine = create_engine(backend, model_size).load()
+    except Exception as e:
+        print(f"❌ โหลด {backend} ไม่สำเร็จ: {e}")
+        return None
+
+    audio_duration = len(audio) / audio_config.SAMPLE_RATE
+
+    # warm-up
+    result = engine.transcribe(audio)
+
+    times = []
+    for _ in range(runs):
+        start_time = time.time()
+        result = engine.transcribe(audio)
+        times.append(time.time() - start_time)
+
+    avg_time = sum(times) / len(times)
+    return {
+        "backend": backend,
+        "load_time": engine.load_time,
+        "transcribe_time": avg_time,
+        "rtf": avg_time / audio_duration if audio_duration > 0 else 0.0,
+        "text": result["text"],
+    }
+
+
+def character_error_rate(reference, hypothesis):
+    """CER ระดับตัวอักษร (ไม่นับช่องว่าง - ภาษาไทยไม่เว้นวรรคระหว่างคำ)"""
+    ref = "".join(reference.split())
+    hyp = "".join(hypothesis.split())
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    # Levenshtein distance แบบเก็บแถวเดียว
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def compare_short_utterance(model_size, audio, runs):
+    """
+    เทียบ short-utterance mode กับการถอดแบบหน้าต่าง 30 วินาทีเต็ม (openai-whisper)
+
+    ใช้ผลแบบเต็มหน้าต่างเป็นข้อความอ้างอิงในการคำนวณ CER
+    """
+    try:
+        engine = create_engine("whisper", model_size).load()
+    except Exception as e:
+        print(f"❌ โหลด whisper ไม่สำเร็จ: {e}")
+        return False
+
+    audio = trim_silence(audio)
+    audio_duration = len(audio) / audio_config.SAMPLE_RATE
+    if audio_duration > whisper_config.SHORT_UTTERANCE_MAX:
+        print(f"⚠️ คลิปยาว {audio_duration:.1f}s เกิน SHORT_UTTERANCE_MAX "
+              f"({whisper_config.SHORT_UTTERANCE_MAX}s) - ผลอาจไม่ตรงกับการใช้งานจริง")
+
+    def timed(fn):
+        fn(audio)  # warm-up
+        times = []
+        for _ in range(runs):
+            start_time = time.time()
+            result = fn(audio)
+            times.append(time.time() - start_time)
+        return result, sum(times) / len(times)
+
+    full, full_time = timed(engine.transcribe_full)
+    short, short_time = timed(engine.transcribe_short)
+    if short is None:
+        print("⚠️ short-utterance mode ไม่ผ่านเกณฑ์คุณภาพ - จะถอดใหม่แบบเต็มหน้าต่างเสมอ")
+        return True
+
+    cer = character_error_rate(full["text"], short["text"])
+    print(f"🎧 หลังตัดช่วงเงียบ: {audio_duration:.1f} วินาที")
+    print(f"📝 เต็มหน้าต่าง: {full['text']}")
+    print(f"📝 short mode : {short['text']}")
+    print(f"\n{'=' * 60}")
+    print(f"{'mode':<16}{'decode (s)':>12}{'speedup':>10}{'CER':>8}")
+    print("-" * 60)
+    print(f"{'full (30s)':<16}{full_time:>12.2f}{1.0:>10.1f}{0.0:>8.1%}")
+    print(f"{'short':<16}{short_time:>12.2f}{full_time / max(short_time, 1e-6):>10.1f}{cer:>8.1%}")
+    print("=" * 60)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="เปรียบเทียบ STT backend บนไฟล์เสียงเดียวกัน")
+    parser.add_argument("audio_file", help="ไฟล์เสียง WAV ที่ใช้ทดสอบ")
+    parser.add_argument("--backends", nargs="+", default=available_engines(),
+                        help=f"backend ที่จะทดสอบ (มี: {', '.join(available_engines())})")
+    parser.add_argument("--model-size", default=whisper_config.MODEL_SIZE, help="ขนาดโมเดล")
+    parser.add_argument("--runs", type=int, default=1, help="จำนวนรอบที่วัดผล (ไม่นับ warm-up)")
+    parser.add_argument("--short-check", action="store_true",
+                        help="เทียบ short-utterance mode กับหน้าต่าง 30 วินาทีเต็ม (openai-whisper)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.audio_file):
+        print(f"❌ ไม่พบไฟล์เสียง: {args.audio_file}")
+        return False
+
+    audio = load_audio_file(args.audio_file)
+    print(f"🎧 ไฟล์เสียง: {args.audio_file} ({len(audio) / audio_config.SAMPLE_RATE:.1f} วินาที)")
+    print(f"📊 Model Size: {args.model_size}")
+
+    if args.short_check:
+        return compare_short_utterance(args.model_size, audio, args.runs)
+
+    results = []
+    for backend in args.backends:
+        print(f"\n--- {backend} ---")
+        result = benchmark_backend(backend, args.model_size, audio, args.runs)
+        if result:
+            results.append(result)
+            print(f"📝 ข้อความ: {result['text']}")
+
+    if not results:
+        return False
+
+    print(f"\n{'=' * 60}")
+    print(f"{'backend':<16}{'load (s)':>10}{'decode (s)':>12}{'RTF':>8}")
+    print("-" * 60)
+    for r in results:
+        print(f"{r['backend']:<16}{r['load_time']:>10.1f}{r['transcribe_time']:>12.2f}{r['rtf']:>8.2f}")
+    print("=" * 60)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    if not success:
+        exit(1)
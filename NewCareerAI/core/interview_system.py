@@ -32,13 +32,17 @@ import google.generativeai as genai
 # เพิ่ม modules path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'modules'))
 
-from TTSmodule import create_tts_client, read_questions
-from STTmodule import record_voice, transcribe_voice
+from TTSmodule import create_tts_client, read_questions, prefetch_questions
+from STTmodule import record_and_transcribe_legacy as record_and_transcribe, preload_whisper
+from audio_archive import new_session_id
 
 
 def main():
     """ฟังก์ชันหลักของระบบสัมภาษณ์งาน"""
     
+    # เริ่มโหลดโมเดล Whisper ใน background ระหว่างที่ผู้ใช้กรอก JD
+    preload_whisper()
+    
     # ------------------- ตั้งค่า TTS -------------------
     json_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "careerai-469309-9946c52b3f8e.json")
     if not os.path.exists(json_path):
@@ -96,6 +100,9 @@ def main():
         print("❌ ไม่สามารถสร้างคำถามได้")
         return False
 
+    # เริ่มสังเคราะห์เสียงทุกคำถามพร้อมกันระหว่างที่ผู้ใช้อ่านและยืนยัน
+    prefetcher = prefetch_questions(questions)
+
     print(f"\n🤖 สร้างคำถาม {len(questions)} ข้อ สำเร็จ:")
     for i, question in enumerate(questions, 1):
         print(f"  {i}. {question}")
@@ -119,20 +126,19 @@ def main():
     print("{'='*50}")
     
     all_answers = []
+    session_id = new_session_id()  # เสียงคำถาม/คำตอบของรอบนี้ใน audio archive
     
     for i, question in enumerate(questions, 1):
         print(f"\n--- คำถามที่ {i}/{len(questions)} ---")
         print(f"❓ {question}")
         
         try:
-            # อ่านคำถาม
-            read_questions(tts_client, [question], prefix=f"q{i}")
-            
-            # อัดเสียงคำตอบ
-            audio_file = record_voice(f"answer_{i}.wav")
+            # อ่านคำถาม (รอเสียงที่ prefetch ไว้ - ไม่สังเคราะห์ซ้ำ)
+            read_questions(tts_client, [question], prefix="q", session=session_id, first_question=i,
+                           clips=[prefetcher.get(i - 1)])
             
-            # ถอดเสียง
-            answer = transcribe_voice(audio_file)
+            # อัดเสียงคำตอบและถอดเสียง (streaming mode จะถอดไประหว่างอัด)
+            audio_file, answer = record_and_transcribe(f"answer_{i}.wav", session=session_id, question=i)
             all_answers.append(answer)
             
             print(f"✅ บันทึกคำตอบที่ {i} เรียบร้อย")
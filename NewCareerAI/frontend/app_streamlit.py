@@ -76,6 +76,8 @@ def import_module_from_file(module_name, file_path):
 # Import modules
 try:
     parent_dir = Path(__file__).parent.parent
+    # modules ที่ถูก import ต่อจาก STTmodule/TTSmodule (เช่น stt_engines) ต้องหาเจอใน path
+    sys.path.insert(0, str(parent_dir / "modules"))
     
     config = import_module_from_file("config", str(parent_dir / "modules" / "config.py"))
     TTSmodule = import_module_from_file("TTSmodule", str(parent_dir / "modules" / "TTSmodule.py"))
@@ -89,16 +91,34 @@ try:
     INTERVIEW_CONFIG = config.INTERVIEW_CONFIG
     TTS_CONFIG = config.TTS_CONFIG
     
+    # browser = ส่งเสียงบีบอัด (OGG_OPUS/MP3) ให้ st.audio เล่นที่เครื่องผู้ใช้ แทน pygame บน server
+    BROWSER_AUDIO = config.tts_config.DELIVERY_MODE == "browser"
+    AUDIO_ENCODING = config.tts_config.BROWSER_ENCODING if BROWSER_AUDIO else None
+    
     # TTS functions
     create_tts_client = TTSmodule.create_tts_client
     text_to_speech = TTSmodule.text_to_speech
     play_audio = TTSmodule.play_audio
+    prefetch_questions = TTSmodule.prefetch_questions
+    synthesize_speech = TTSmodule.synthesize
+    play_bytes = TTSmodule.play_bytes
+    speak_streaming = TTSmodule.speak_streaming
+    synthesize_long = TTSmodule.synthesize_long
+    audio_mime_type = TTSmodule.mime_type
     
     # STT functions
     record_voice = STTmodule.record_voice
     transcribe_voice = STTmodule.transcribe_voice
+    record_and_transcribe = STTmodule.record_and_transcribe_legacy
+    
+    # เริ่มโหลดโมเดล Whisper ใน background - หน้าเว็บใช้งานได้ทันทีระหว่างรอ
+    whisper_loading = STTmodule.preload_whisper()
     test_microphone = STTmodule.test_microphone
     
+    # คลังเสียงคำตอบ (import ปกติ - ใช้ instance เดียวกับ STTmodule)
+    from audio_archive import MIME_TYPES as ARCHIVE_MIME_TYPES, get_audio_archive, new_session_id
+    from config import audio_config
+    
 except ImportError as e:
     st.error(f"❌ ไม่สามารถโหลดโมดูลได้: {e}")
     st.error(f"Module search paths: {sys.path}")
@@ -237,6 +257,12 @@ if 'interview_completed' not in st.session_state:
     st.session_state.interview_completed = False
 if 'tts_client' not in st.session_state:
     st.session_state.tts_client = None
+if 'tts_prefetcher' not in st.session_state:
+    st.session_state.tts_prefetcher = None
+if 'summary' not in st.session_state:
+    st.session_state.summary = ""
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = new_session_id()
 
 # หัวข้อหลัก
 st.markdown('<div class="main-header">🎤 AI Coach for Interview</div>', unsafe_allow_html=True)
@@ -262,6 +288,14 @@ set GOOGLE_APPLICATION_CREDENTIALS=path_to_service_account.json
     else:
         st.success("✅ การตั้งค่าถูกต้อง")
     
+    # สถานะโมเดล Whisper
+    if not whisper_loading.done():
+        st.info("🧠 กำลังโหลดโมเดล Whisper ในเบื้องหลัง...")
+    elif whisper_loading.result() is None:
+        st.error("❌ โหลดโมเดล Whisper ไม่สำเร็จ")
+    else:
+        st.success("✅ โมเดล Whisper พร้อมใช้งาน")
+    
     # ทดสอบไมโครโฟน
     st.subheader("🎤 ทดสอบไมโครโฟน")
     if st.button("ทดสอบไมโครโฟน"):
@@ -293,8 +327,13 @@ with col1:
             with st.spinner("🧠 AI กำลังสร้างคำถาม..."):
                 questions = generate_questions(jd_text)
                 if questions:
+                    # สังเคราะห์เสียงทุกคำถามล่วงหน้าใน background (ยกเลิกชุดเก่าที่ยังค้าง)
+                    if st.session_state.tts_prefetcher is not None:
+                        st.session_state.tts_prefetcher.cancel()
+                    st.session_state.tts_prefetcher = prefetch_questions(questions, audio_encoding=AUDIO_ENCODING)
                     st.session_state.questions = questions
                     st.session_state.answers = [""] * len(questions)
+                    st.session_state.session_id = new_session_id()
                     st.session_state.current_question = 0
                     st.session_state.interview_started = False
                     st.session_state.interview_completed = False
@@ -305,9 +344,18 @@ with col1:
     # แสดงคำถามที่สร้างได้
     if st.session_state.questions:
         st.header("❓ 2. คำถามที่สร้างโดย AI")
+        prefetcher = st.session_state.tts_prefetcher
         for i, question in enumerate(st.session_state.questions, 1):
-            st.markdown(f'<div class="question-box"><strong>คำถามที่ {i}:</strong> {question}</div>', 
+            audio_status = ""
+            if prefetcher is not None:
+                if prefetcher.is_ready(i - 1):
+                    audio_status = " 🔊"
+                elif not prefetcher.is_failed(i - 1):
+                    audio_status = " ⏳"
+            st.markdown(f'<div class="question-box"><strong>คำถามที่ {i}:</strong>{audio_status} {question}</div>', 
                        unsafe_allow_html=True)
+        if prefetcher is not None:
+            st.caption(f"🔊 เสียงคำถามพร้อมแล้ว {prefetcher.ready_count()}/{len(prefetcher)} ข้อ")
         
         # ปุ่มเริ่มสัมภาษณ์
         if not st.session_state.interview_started and not st.session_state.interview_completed:
@@ -341,9 +389,16 @@ with col1:
                 if st.button("🔊 ฟังคำถาม"):
                     with st.spinner("กำลังสร้างเสียง..."):
                         try:
-                            filename = f"question_{current_q + 1}.wav"
-                            if text_to_speech(st.session_state.tts_client, current_question, filename):
-                                if play_audio(filename):
+                            # ใช้เสียงที่สังเคราะห์ไว้ล่วงหน้า แล้วเล่นจากหน่วยความจำ (ไม่เขียนไฟล์)
+                            prefetcher = st.session_state.tts_prefetcher
+                            audio_content = prefetcher.get(current_q) if prefetcher is not None else None
+                            if audio_content is None:
+                                audio_content = synthesize_speech(current_question, audio_encoding=AUDIO_ENCODING)
+                            if audio_content is not None and BROWSER_AUDIO:
+                                # browser เล่นเอง - script ไม่ต้องรอเสียงจบ
+                                st.audio(audio_content, format=audio_mime_type(AUDIO_ENCODING), autoplay=True)
+                            elif audio_content is not None:
+                                if play_bytes(audio_content):
                                     st.success("✅ เล่นเสียงสำเร็จ")
                                 else:
                                     st.error("❌ ไม่สามารถเล่นเสียงได้")
@@ -356,16 +411,16 @@ with col1:
                 if st.button("🎤 บันทึกคำตอบ"):
                     with st.spinner("กำลังบันทึกเสียง... (พูดได้เลย)"):
                         try:
-                            audio_file = record_voice(f"answer_{current_q + 1}.wav")
+                            audio_file, answer = record_and_transcribe(f"answer_{current_q + 1}.wav",
+                                                                       session=st.session_state.session_id,
+                                                                       question=current_q + 1)
                             if audio_file:
-                                with st.spinner("กำลังแปลงเสียงเป็นข้อความ..."):
-                                    answer = transcribe_voice(audio_file)
-                                    if answer:
-                                        st.session_state.answers[current_q] = answer
-                                        st.success("✅ บันทึกคำตอบสำเร็จ!")
-                                        st.rerun()
-                                    else:
-                                        st.error("❌ ไม่สามารถแปลงเสียงเป็นข้อความได้")
+                                if answer:
+                                    st.session_state.answers[current_q] = answer
+                                    st.success("✅ บันทึกคำตอบสำเร็จ!")
+                                    st.rerun()
+                                else:
+                                    st.error("❌ ไม่สามารถแปลงเสียงเป็นข้อความได้")
                             else:
                                 st.error("❌ การบันทึกเสียงล้มเหลว")
                         except Exception as e:
@@ -406,14 +461,38 @@ with col1:
                                unsafe_allow_html=True)
                     st.markdown(f'<div class="answer-box"><strong>คำตอบ:</strong> {a}</div>', 
                                unsafe_allow_html=True)
+                    # ฟังเสียงคำตอบย้อนหลังจาก archive (อ่านเฉพาะช่วงของคลิปนี้)
+                    clips = [entry for entry in get_audio_archive().entries(st.session_state.session_id, "answer")
+                             if entry["question"] == i] if audio_config.ARCHIVE else []
+                    if clips:
+                        st.audio(get_audio_archive().read_bytes(clips[-1]),
+                                 format=ARCHIVE_MIME_TYPES[clips[-1]["format"]])
             
             # สร้างสรุปผลด้วย AI
             st.subheader("🤖 การวิเคราะห์โดย AI")
             if st.button("📈 สร้างรายงานการวิเคราะห์"):
                 with st.spinner("🧠 AI กำลังวิเคราะห์ผลการสัมภาษณ์..."):
-                    summary = generate_interview_summary(st.session_state.questions, st.session_state.answers)
-                    st.markdown("### 📋 รายงานการวิเคราะห์")
-                    st.markdown(summary)
+                    st.session_state.summary = generate_interview_summary(st.session_state.questions, st.session_state.answers)
+            
+            if st.session_state.summary:
+                st.markdown("### 📋 รายงานการวิเคราะห์")
+                st.markdown(st.session_state.summary)
+                
+                if st.button("🔊 ฟังรายงาน"):
+                    with st.spinner("กำลังอ่านรายงาน..."):
+                        try:
+                            if BROWSER_AUDIO:
+                                # รายงานยาวเกินหนึ่ง request - ต่อ MP3 ทุกช่วงเป็นคลิปเดียวให้ browser เล่น
+                                audio_content = synthesize_long(st.session_state.summary)
+                                if audio_content is not None:
+                                    st.audio(audio_content, format=audio_mime_type("MP3"), autoplay=True)
+                                else:
+                                    st.error("❌ ไม่สามารถสร้างเสียงได้")
+                            # พูดทีละช่วง - เริ่มได้ยินเสียงโดยไม่ต้องรอสังเคราะห์ทั้งรายงาน
+                            elif not speak_streaming(st.session_state.summary):
+                                st.error("❌ ไม่สามารถเล่นเสียงได้")
+                        except Exception as e:
+                            st.error(f"❌ เกิดข้อผิดพลาด: {e}")
             
             # ปุ่มเริ่มใหม่
             if st.button("🔄 เริ่มการสัมภาษณ์ใหม่", type="secondary"):
@@ -424,6 +503,10 @@ with col1:
                 st.session_state.interview_started = False
                 st.session_state.interview_completed = False
                 st.session_state.tts_client = None
+                if st.session_state.tts_prefetcher is not None:
+                    st.session_state.tts_prefetcher.cancel()
+                st.session_state.tts_prefetcher = None
+                st.session_state.summary = ""
                 st.rerun()
 
 with col2:
@@ -4,6 +4,9 @@
 ===========================================================
 ฟีเจอร์หลัก:
 - OpenAI Whisper integration สำหรับการแปลงเสียงเป็นข้อความ
+- เลือก backend ได้ (openai-whisper / faster-whisper int8) ผ่าน stt_engines
+- ใช้ STT worker ร่วมกันข้าม session ได้ (STT_WORKER=true, ดู stt_worker.py)
+- โหลดโมเดลแบบ lazy ใน background พร้อม warm-up (ไม่ block ตอน import)
 - Real-time voice recording ด้วย silence detection
 - Multi-threaded audio processing เพื่อประสิทธิภาพ
 - Automatic timeout และ error handling
@@ -11,11 +14,20 @@
 
 ความสามารถ:
 - WhisperSTT class: จัดการการแปลงเสียงครบวงจร
-- Voice activity detection (VAD)
-- Auto-silence detection และหยุดอัดอัตโนมัติ
+- Voice activity detection (VAD) แบบ adaptive ดู vad.py
+- Hangover endpointing - หยุดอัดภายในไม่กี่ร้อย ms หลังพูดจบ
 - Real-time microphone selection
+- Persistent microphone session พร้อม pre-roll (microphone.py)
 - Audio file format conversion
 - Threaded recording for non-blocking operation
+- Ring buffer จองล่วงหน้าสำหรับการอัด (ไม่จองหน่วยความจำใหม่ใน callback)
+- Streaming transcription ระหว่างอัดเสียง
+- In-memory transcription (transcribe_array) ไม่ต้องเขียนไฟล์/เรียก ffmpeg
+- ตัดช่วงเงียบหัว/ท้ายคลิปก่อนถอดเสียง (TRIM_SILENCE)
+- Cache ผลถอดเสียงตาม hash ของเสียง (STT_CACHE, ดู stt_cache.py)
+- ถอดคำตอบยาวแบบขนานใน process pool (STT_PARALLEL_WORKERS, ดู stt_parallel.py)
+- จำกัดหน่วยความจำของโมเดลรวม ปล่อยขนาดที่ไม่ได้ใช้แบบ LRU (ดู model_manager.py)
+- Tiered mode: โมเดลเล็กก่อน ยกระดับเฉพาะช่วงไม่มั่นใจ (STT_TIERED, ดู stt_tiered.py)
 
 โมเดล Whisper:
 - tiny, base, small, medium, large (เลือกได้)
@@ -28,133 +40,260 @@
 """
 import sounddevice as sd
 import numpy as np
-from scipy.io.wavfile import write
-import whisper
+from scipy.io.wavfile import write, read
 import streamlit as st
 import streamlit as st
 import queue
+import io
 import os
 import time
 import threading
-from typing import Optional, Tuple, Dict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Optional, Tuple, Dict, Callable
 from pathlib import Path
 
 try:
     from .config import audio_config, whisper_config, AUDIO_DIR, TEMP_DIR
+    from .stt_engines import STTEngine, create_engine, to_whisper_audio
+    from .stt_worker import RemoteEngine, get_worker_client
+    from .stt_batching import get_scheduler
+    from .vad import VoiceActivityDetector, trim_silence
+    from .audio_buffer import AudioRingBuffer
+    from .microphone import MicrophoneSession
+    from .model_manager import ModelManager
+    from .stt_cache import TranscriptionCache
+    from .stt_parallel import ParallelTranscriber
+    from .stt_tiered import TieredTranscriber
+    from .audio_archive import archive_locator, get_audio_archive
 except ImportError:
     from config import audio_config, whisper_config, AUDIO_DIR, TEMP_DIR
+    from stt_engines import STTEngine, create_engine, to_whisper_audio
+    from stt_worker import RemoteEngine, get_worker_client
+    from stt_batching import get_scheduler
+    from vad import VoiceActivityDetector, trim_silence
+    from audio_buffer import AudioRingBuffer
+    from microphone import MicrophoneSession
+    from model_manager import ModelManager
+    from stt_cache import TranscriptionCache
+    from stt_parallel import ParallelTranscriber
+    from stt_tiered import TieredTranscriber
+    from audio_archive import archive_locator, get_audio_archive
 
 
 # ตั้งค่าระบบ (ใช้จาก config)
 RATE = audio_config.SAMPLE_RATE
 CHUNK = audio_config.CHUNK_SIZE  
-SILENCE_THRESHOLD = audio_config.SILENCE_THRESHOLD
 SILENCE_DURATION = audio_config.SILENCE_DURATION
+VAD_HANGOVER = audio_config.VAD_HANGOVER
+SILENCE_PEAK = audio_config.SILENCE_PEAK
 MIN_RECORDING_DURATION = audio_config.MIN_RECORDING_DURATION
 MAX_RECORDING_DURATION = audio_config.MAX_RECORDING_DURATION
 
-# ฟังก์ชัน cache สำหรับโหลดโมเดล Whisper
-@st.cache_resource
-def get_whisper_model(model_size):
-    print(f"🧠 กำลังโหลดโมเดล Whisper ({model_size})...")
+def _load_engine(backend, model_size):
+    """โหลด engine และอุ่นเครื่องด้วยการถอดเสียงเงียบสั้นๆ (รันใน background thread)"""
+    if whisper_config.USE_WORKER:
+        # โมเดลอยู่ที่ STT worker - process นี้ถือแค่ client
+        print(f"🛰️  ใช้ STT worker ที่ {whisper_config.WORKER_HOST}:{whisper_config.WORKER_PORT}")
+        return RemoteEngine(model_size).load()
+    
+    print(f"🧠 กำลังโหลดโมเดล Whisper ({backend}, {model_size})...")
     try:
-        model = whisper.load_model(model_size)
-        print("✅ โหลดโมเดล Whisper สำเร็จ")
-        return model
+        engine = create_engine(backend, model_size).load()
+        warmup_time = engine.warmup()
+        print(f"✅ โหลดโมเดล Whisper สำเร็จ ({engine.load_time:.1f}s, warm-up {warmup_time:.1f}s)")
+        return engine
     except Exception as e:
         print(f"❌ ไม่สามารถโหลดโมเดล Whisper: {e}")
         return None
 
+# ทะเบียนโมเดลร่วมกันทั้ง process - จำกัดหน่วยความจำรวมและปล่อยขนาดที่ไม่ได้ใช้ (LRU)
+@st.cache_resource
+def get_model_manager() -> ModelManager:
+    return ModelManager(_load_engine)
+
+def load_engine_async(backend, model_size) -> Future:
+    """เริ่มโหลด engine ใน background แล้วคืน Future ทันที (คืนตัวเดิมถ้าโหลดอยู่แล้ว)"""
+    return get_model_manager().load_async(backend, model_size)
+
+def get_stt_engine(backend, model_size) -> Optional[STTEngine]:
+    """engine ที่โหลดแล้ว (block จนกว่าจะโหลดเสร็จ, None หากโหลดไม่ได้) - ไม่ยึดไว้ ใช้ lease_stt_engine ระหว่างถอดเสียง"""
+    return get_model_manager().get(backend, model_size)
+
+def lease_stt_engine(backend, model_size):
+    """
+    ยึด engine ไว้ระหว่างใช้งาน (block จนกว่าจะโหลดเสร็จ - ไม่ถูกปล่อยออกจากหน่วยความจำจนจบ block)
+    
+    การใช้งาน: with lease_stt_engine(backend, model_size) as engine: ...
+    """
+    return get_model_manager().lease(backend, model_size)
+
+# ไมโครโฟนที่เปิดค้างไว้ใช้ร่วมกันทั้ง process (cache ข้าม Streamlit rerun)
+@st.cache_resource
+def get_microphone_session() -> MicrophoneSession:
+    return MicrophoneSession()
+
+# cache ผลถอดเสียงร่วมกันทุก session
+@st.cache_resource
+def get_transcription_cache() -> TranscriptionCache:
+    return TranscriptionCache()
+
+# process pool สำหรับคำตอบยาว (แต่ละ worker โหลดโมเดลของตัวเองครั้งเดียว - นับรวมในงบของ ModelManager)
+@st.cache_resource
+def get_parallel_transcriber(backend: str, model_size: str) -> ParallelTranscriber:
+    return ParallelTranscriber(backend, model_size, manager=get_model_manager())
+
+# tiered mode: ใช้ engine ที่โหลดใน background ทั้งสองขนาด และเก็บสถิติรวมทุก session
+@st.cache_resource
+def get_tiered_transcriber(backend: str, fast_size: str, model_size: str) -> TieredTranscriber:
+    manager = get_model_manager()
+    return TieredTranscriber(lambda: manager.lease(backend, fast_size),
+                             lambda: manager.lease(backend, model_size))
+
+def get_whisper_model(model_size):
+    """Legacy function - คืน engine ที่โหลดแล้วด้วย backend ตาม config (None หากโหลดไม่ได้)"""
+    return get_stt_engine(whisper_config.BACKEND, model_size)
+
+def lease_whisper_model(model_size):
+    """ยึด engine ด้วย backend ตาม config ไว้ระหว่างใช้งาน (ใช้กับ with)"""
+    return lease_stt_engine(whisper_config.BACKEND, model_size)
+
 class WhisperSTT:
     """Enhanced Whisper Speech-to-Text Class"""
     
 
-    def __init__(self, model_size: str = None):
+    def __init__(self, model_size: str = None, backend: str = None,
+                 mic_session: Optional[MicrophoneSession] = None):
         """
-        Initialize Whisper STT
+        Initialize Whisper STT (เริ่มโหลดโมเดลใน background - ไม่ block)
         Args:
             model_size: ขนาดโมเดล (tiny, base, small, medium, large)
+            backend: STT backend (whisper, faster-whisper) - default ตาม config
+            mic_session: ไมโครโฟนที่เปิดค้างไว้ (None = ใช้ตัวกลางเมื่อเปิด PERSISTENT_STREAM,
+                         ไม่เช่นนั้นเปิด stream ใหม่ทุกครั้งที่อัด)
         """
         self.model_size = model_size or whisper_config.MODEL_SIZE
-        self.model = get_whisper_model(self.model_size)
+        self.backend = backend or whisper_config.BACKEND
+        self.tiered = whisper_config.TIERED and not whisper_config.USE_WORKER
+        # เริ่มโหลดใน background ทันที (tiered mode โหลดโมเดลเล็กก่อน)
+        if self.tiered:
+            load_engine_async(self.backend, whisper_config.FAST_MODEL_SIZE)
+        load_engine_async(self.backend, self.model_size)
+        if mic_session is None and audio_config.PERSISTENT_STREAM:
+            mic_session = get_microphone_session()
+        self.mic_session = mic_session
         self.is_recording = False
     
-    def is_ready(self) -> bool:
-        """ตรวจสอบว่าพร้อมใช้งานหรือไม่"""
-        return self.model is not None
+    @property
+    def model_future(self) -> Future:
+        """Future ของ engine หลัก (ถ้าถูกปล่อยจากหน่วยความจำไปแล้วจะเริ่มโหลดใหม่)"""
+        return load_engine_async(self.backend, self.model_size)
+    
+    def _ready_size(self) -> str:
+        # engine ที่ต้องพร้อมก่อนถอดเสียงได้ (tiered mode = โมเดลเล็ก)
+        return whisper_config.FAST_MODEL_SIZE if self.tiered else self.model_size
+    
+    def load_ready(self) -> Future:
+        """เริ่มโหลด engine ที่ต้องพร้อมก่อนถอดเสียงได้ (ถ้ายังไม่อยู่ในหน่วยความจำ) แล้วคืน Future"""
+        return load_engine_async(self.backend, self._ready_size())
+    
+    @property
+    def ready_future(self) -> Optional[Future]:
+        """Future ของ engine ที่ต้องพร้อมก่อนถอดเสียงได้ (อ่านอย่างเดียว - None ถ้ายังไม่โหลด/ถูกปล่อยไปแล้ว)"""
+        return get_model_manager().peek(self.backend, self._ready_size())
+    
+    @property
+    def model(self):
+        """engine ที่โหลดแล้ว (block จนโหลดเสร็จ - ไม่ยึดไว้ ระหว่างถอดเสียงให้ใช้ lease_model)"""
+        return self.model_future.result()
+    
+    def lease_model(self):
+        """ยึด engine หลักไว้ระหว่างใช้งาน (ไม่ถูกปล่อยจากหน่วยความจำกลางคัน)"""
+        return get_model_manager().lease(self.backend, self.model_size)
+    
+    def is_loaded(self) -> bool:
+        """ตรวจสอบแบบไม่ block ว่าโหลดโมเดลเสร็จและใช้งานได้แล้วหรือยัง"""
+        future = self.ready_future
+        return future is not None and future.done() and future.result() is not None
+    
+    def is_ready(self, timeout: Optional[float] = None) -> bool:
+        """รอให้โหลดโมเดลเสร็จ (โหลดใหม่ถ้าถูกปล่อยไปแล้ว) แล้วตรวจสอบว่าพร้อมใช้งานหรือไม่"""
+        try:
+            return self.load_ready().result(timeout) is not None
+        except FutureTimeoutError:
+            return False
 
 
-    def record_voice(self, filename: Optional[str] = None, max_duration: Optional[int] = None) -> Optional[str]:
+    def record_audio(self, max_duration: Optional[int] = None,
+                     on_chunk: Optional[Callable[[np.ndarray, bool], None]] = None) -> Optional[np.ndarray]:
         """
-        อัดเสียงจากไมโครโฟนจนกว่าจะเงียบ
+        อัดเสียงจากไมโครโฟนจนกว่าจะเงียบ แล้วคืนเป็น NumPy buffer (ไม่เขียนไฟล์)
         
         Args:
-            filename: ชื่อไฟล์เสียง (optional)
             max_duration: ระยะเวลาอัดสูงสุด (วินาที)
+            on_chunk: callback ที่ถูกเรียกทุก chunk ด้วย (chunk_data, is_silent)
             
         Returns:
-            path ของไฟล์เสียง หรือ None หากล้มเหลว
+            เสียง float32 mono 16 kHz ที่ปรับระดับแล้ว หรือ None หากล้มเหลว
         """
-        if not self.is_ready():
-            print("❌ โมเดล Whisper ไม่พร้อมใช้งาน")
-            return None
-        
-        if filename is None:
-            timestamp = int(time.time())
-            filename = TEMP_DIR / f"recorded_{timestamp}.wav"
-        else:
-            filename = Path(filename)
-        
         max_dur = max_duration or MAX_RECORDING_DURATION
         
         print("🎤 กำลังอัดเสียง... (พูดได้เลย)")
-        print(f"   - จะหยุดอัดเมื่อเงียบ {SILENCE_DURATION} วินาที")
+        print(f"   - จะหยุดอัดเมื่อพูดจบแล้วเงียบ {VAD_HANGOVER} วินาที")
         print(f"   - อัดสูงสุด {max_dur} วินาที")
         print(f"   - กด Ctrl+C เพื่อหยุดบังคับ")
         
         self.is_recording = True
-        recording_queue = queue.Queue()
-        recording_data = []
-        silent_chunks = 0
-        total_chunks = 0
-        start_time = time.time()
+        # จองหน่วยความจำครั้งเดียวตามระยะอัดสูงสุด - callback แค่ copy ลง buffer
+        pre_roll = self.mic_session.pre_roll.capacity if self.mic_session else 0
+        buffer = AudioRingBuffer(int(max_dur * RATE) + CHUNK + pre_roll)
+        read_pos = 0
+        last_status = 0
+        vad = VoiceActivityDetector(RATE)
 
         def callback(indata, frames, time_info, status):
             if status:
                 print(f"⚠️ Audio callback status: {status}")
-            recording_queue.put(indata.copy())
+            buffer.write(indata[:, 0])
 
         try:
-            with sd.InputStream(samplerate=RATE, channels=1, callback=callback, blocksize=CHUNK):
+            if self.mic_session is not None:
+                # stream เปิดค้างอยู่แล้ว - รับเสียงพร้อม pre-roll โดยไม่เปิดอุปกรณ์ใหม่
+                source = self.mic_session.capture(buffer)
+            else:
+                source = sd.InputStream(samplerate=RATE, channels=1, dtype="float32",
+                                        callback=callback, blocksize=CHUNK)
+            with source:
                 while self.is_recording:
-                    try:
-                        chunk_data = recording_queue.get(timeout=1.0)
-                    except queue.Empty:
+                    if not buffer.wait(timeout=1.0):
                         continue
-                        
-                    recording_data.append(chunk_data)
-                    total_chunks += 1
                     
-                    # คำนวณระดับเสียง
-                    amplitude = np.max(np.abs(chunk_data))
+                    # อ่านเฉพาะส่วนที่เขียนเพิ่มมา (view - ไม่ copy)
+                    write_pos = buffer.written
+                    chunk_data = buffer.view(read_pos, write_pos)
+                    read_pos = write_pos
                     
-                    if amplitude < SILENCE_THRESHOLD:
-                        silent_chunks += 1
-                    else:
-                        silent_chunks = 0
+                    # ตรวจจับเสียงพูดระดับ frame (พลังงาน + ZCR เทียบกับ noise floor)
+                    is_speech = vad.process(chunk_data)
+
+                    if on_chunk is not None:
+                        on_chunk(chunk_data, not is_speech)
+
+                    recording_duration = write_pos / RATE
 
                     # แสดงสถานะทุกๆ 0.5 วินาที 
-                    if total_chunks % 8 == 0:
-                        duration = total_chunks * CHUNK / RATE
-                        print(f"⏱️  อัดแล้ว {duration:.1f}s (เสียง: {amplitude:.0f})")
+                    if recording_duration - last_status >= 0.5:
+                        last_status = recording_duration
+                        print(f"⏱️  อัดแล้ว {recording_duration:.1f}s (เสียง: {vad.last_energy:.3f}, "
+                              f"noise: {vad.noise_floor or 0:.3f})")
 
                     # ตรวจสอบเงื่อนไขการหยุดอัด
-                    recording_duration = total_chunks * CHUNK / RATE
-                    silent_duration = silent_chunks * CHUNK / RATE
+                    # หยุดเมื่อพูดจบ (เงียบครบ hangover) และอัดมาแล้วขั้นต่ำ
+                    if vad.end_of_speech and recording_duration >= MIN_RECORDING_DURATION:
+                        break
                     
-                    # หยุดถ้าเงียบครบเวลา และอัดมาแล้วขั้นต่ำ
-                    if (silent_duration >= SILENCE_DURATION and 
-                        recording_duration >= MIN_RECORDING_DURATION):
+                    # หยุดถ้ายังไม่เริ่มพูดภายใน SILENCE_DURATION
+                    if not vad.speech_started and recording_duration >= SILENCE_DURATION:
+                        print(f"🔇 ไม่พบเสียงพูดภายใน {SILENCE_DURATION} วินาที")
                         break
                     
                     # หยุดถ้าเกินเวลาสูงสุด
@@ -170,37 +309,248 @@ class WhisperSTT:
         finally:
             self.is_recording = False
 
-        if not recording_data:
+        if buffer.written == 0:
             print("❌ ไม่มีข้อมูลเสียง")
             return None
 
+        # ปรับระดับด้วย peak ที่สะสมไว้ระหว่างอัด (in-place บน view ของ buffer)
+        audio = buffer.clip()
+        if buffer.peak <= 0:
+            print("❌ ไม่พบสัญญาณเสียง")
+            return None
+        # หารเป็น array ใหม่ - clip() อาจเป็น view ของ ring buffer ที่ส่วนอื่น (เช่น streamer) ยังอ่านอยู่
+        audio = audio / buffer.peak
+        
+        print(f"✅ อัดเสียงเสร็จ ({len(audio) / RATE:.1f} วินาที, RMS {buffer.rms / buffer.peak:.3f})")
+        return audio
+
+    def save_audio(self, audio: np.ndarray, filename: Optional[str] = None) -> Optional[str]:
+        """
+        บันทึก buffer เสียงเป็นไฟล์ WAV int16 (ใช้สำหรับเก็บถาวร)
+        
+        Args:
+            audio: เสียง float32 ช่วง [-1, 1]
+            filename: ชื่อไฟล์เสียง (optional)
+            
+        Returns:
+            path ของไฟล์เสียง หรือ None หากล้มเหลว
+        """
+        if filename is None:
+            timestamp = int(time.time())
+            filename = TEMP_DIR / f"recorded_{timestamp}.wav"
+        else:
+            filename = Path(filename)
+        
         try:
-            # รวมข้อมูลเสียงและปรับระดับ
-            audio = np.concatenate(recording_data, axis=0)
+            write(str(filename), RATE, np.int16(audio * 32767))
+            print(f"💾 บันทึกไฟล์เสียง: {filename} ({len(audio) / RATE:.1f} วินาที)")
+            return str(filename)
+        except Exception as e:
+            print(f"❌ ไม่สามารถบันทึกไฟล์เสียง: {e}")
+            return None
+
+    def store_answer(self, audio: np.ndarray, filename: Optional[str] = None,
+                     session: Optional[str] = None, question: Optional[int] = None) -> Optional[str]:
+        """
+        เก็บเสียงคำตอบ: ลง audio archive เมื่อระบุ session (และเปิด ARCHIVE) ไม่เช่นนั้นเขียน WAV
+        
+        Returns:
+            ตัวอ้างอิงใน archive / path ของไฟล์ หรือ None หากไม่ได้เก็บ
+        """
+        if session is not None and audio_config.ARCHIVE:
+            try:
+                entry = get_audio_archive().add(session, question or 0, audio, RATE, kind="answer")
+                return archive_locator(entry)
+            except Exception as e:
+                print(f"⚠️ เก็บเสียงลง archive ไม่สำเร็จ ({e}) - บันทึกเป็นไฟล์แทน")
+        return self.save_audio(audio, filename) if filename else None
+
+    def record_voice(self, filename: Optional[str] = None, max_duration: Optional[int] = None,
+                     on_chunk: Optional[Callable[[np.ndarray, bool], None]] = None) -> Optional[str]:
+        """
+        อัดเสียงจากไมโครโฟนจนกว่าจะเงียบ แล้วบันทึกเป็นไฟล์ WAV
+        
+        Args:
+            filename: ชื่อไฟล์เสียง (optional)
+            max_duration: ระยะเวลาอัดสูงสุด (วินาที)
+            on_chunk: callback ที่ถูกเรียกทุก chunk ด้วย (chunk_data, is_silent)
             
-            # Normalize audio
-            if np.max(np.abs(audio)) > 0:
-                audio = audio / np.max(np.abs(audio))
-                audio = np.int16(audio * 32767)
-            else:
-                print("❌ ไม่พบสัญญาณเสียง")
-                return None
+        Returns:
+            path ของไฟล์เสียง หรือ None หากล้มเหลว
+        """
+        audio = self.record_audio(max_duration, on_chunk)
+        if audio is None:
+            return None
+        return self.save_audio(audio, filename)
+
+    def transcribe_array(self, audio: np.ndarray, sample_rate: int = RATE) -> Optional[str]:
+        """
+        แปลง buffer เสียงเป็นข้อความโดยส่งเข้าโมเดลตรงๆ (ไม่ผ่านไฟล์และ ffmpeg)
+        
+        Args:
+            audio: เสียง mono (float ช่วง [-1, 1] หรือ int16)
+            sample_rate: sample rate ของ audio
+            
+        Returns:
+            ข้อความที่ถอดได้ หรือ None หากล้มเหลว
+        """
+        audio = to_whisper_audio(audio, sample_rate)
+        if audio.size == 0:
+            print("❌ ไม่มีข้อมูลเสียง")
+            return None
+        
+        if audio_config.TRIM_SILENCE:
+            # ไม่ต้องเสียเวลาถอดช่วงเงียบหัว/ท้าย (โดยเฉพาะ hangover ตอนจบ)
+            original_duration = len(audio) / RATE
+            audio = trim_silence(audio, RATE)
+            if len(audio) / RATE < original_duration:
+                print(f"✂️  ตัดช่วงเงียบ {original_duration:.1f}s -> {len(audio) / RATE:.1f}s")
+        
+        # parallel path ใช้โมเดลใน worker process - ไม่ต้องรอ/โหลด engine ของ process นี้
+        if not self._use_parallel(audio) and not self.is_ready():
+            print("❌ โมเดล Whisper ไม่พร้อมใช้งาน")
+            return None
+        
+        print(f"🧠 กำลังถอดเสียง ({len(audio) / RATE:.1f} วินาที)")
+        
+        try:
+            start_time = time.time()
+            result = self._decode(audio)
             
-            # บันทึกไฟล์
-            write(str(filename), RATE, audio)
-            duration = len(audio) / RATE
-            print(f"✅ อัดเสียงเสร็จ: {filename} ({duration:.1f} วินาที)")
+            process_time = time.time() - start_time
             
-            return str(filename)
+            if result and "text" in result:
+                text = result["text"].strip()
+                if text:
+                    print(f"✅ ถอดเสียงสำเร็จ ({process_time:.1f}s)")
+                    print(f"📝 ข้อความ: {text}")
+                    return text
+                else:
+                    print("⚠️ ไม่มีข้อความในไฟล์เสียง")
+                    return None
+            else:
+                print("❌ ไม่สามารถถอดเสียงได้")
+                return None
+                
+        except Exception as e:
+            print(f"❌ เกิดข้อผิดพลาดในการถอดเสียง: {e}")
+            return None
+
+    def _use_parallel(self, audio: np.ndarray) -> bool:
+        """คลิปนี้ถอดด้วย process pool หรือไม่ (คำตอบยาว, ไม่ใช้ tiered/STT worker)"""
+        return (whisper_config.PARALLEL_WORKERS > 0 and not self.tiered and not whisper_config.USE_WORKER
+                and len(audio) >= whisper_config.PARALLEL_MIN_DURATION * RATE)
+    
+    def _cache_producer(self) -> Optional[Tuple[str, str]]:
+        """
+        (backend, model) ของตัวที่ถอดเสียงจริงตาม path ที่ใช้ - เป็นส่วนหนึ่งของ cache key
+        
+        None = ยังไม่รู้ (STT worker ก่อนได้ผลแรก) - ไม่ค้น cache
+        """
+        if self.tiered:
+            return self.backend, f"{whisper_config.FAST_MODEL_SIZE}+{self.model_size}"
+        if whisper_config.USE_WORKER:
+            served_by = get_worker_client().served_by
+            return None if served_by is None else (f"worker:{served_by[0]}", served_by[1])
+        return self.backend, self.model_size
+    
+    def _decode_path(self, audio: np.ndarray) -> str:
+        """path ที่ _decode จะใช้กับคลิปนี้ (ผลต่างกันได้ตามการตัดช่วง/batch padding)"""
+        if self.tiered:
+            return "tiered"
+        if self._use_parallel(audio):
+            return "parallel"
+        if whisper_config.USE_WORKER:
+            return "worker"
+        return "batched" if whisper_config.BATCHING else "direct"
+    
+    def _cache_key(self, audio: np.ndarray, initial_prompt: Optional[str] = None) -> Optional[str]:
+        producer = self._cache_producer()
+        if producer is None:
+            return None
+        # ทุก option ที่เปลี่ยนผลถอดเสียงได้ต้องอยู่ใน key - ไม่เช่นนั้นจะได้ผลของการตั้งค่าเก่า
+        return get_transcription_cache().key(audio, producer[0], producer[1],
+                                             whisper_config.LANGUAGE,
+                                             temperature=whisper_config.TEMPERATURE,
+                                             short_utterance=whisper_config.SHORT_UTTERANCE,
+                                             compute_type=whisper_config.COMPUTE_TYPE,
+                                             device=whisper_config.DEVICE,
+                                             beam_size=whisper_config.BEAM_SIZE,
+                                             initial_prompt=initial_prompt,
+                                             path=self._decode_path(audio))
+    
+    def _decode(self, audio: np.ndarray) -> Dict:
+        """
+        ส่งเสียงเข้า engine (tiered / parallel / batch scheduler ตาม config)
+        โดยตรวจ cache ตาม hash ของเสียงก่อนเมื่อเปิด STT_CACHE
+        """
+        if whisper_config.CACHE:
+            cache_key = self._cache_key(audio)
+            result = get_transcription_cache().get(cache_key) if cache_key is not None else None
+            if result is not None:
+                print("⚡ ใช้ผลถอดเสียงจาก cache")
+                return result
+
+        if self.tiered:
+            tiered = get_tiered_transcriber(self.backend, whisper_config.FAST_MODEL_SIZE,
+                                            self.model_size)
+            result = tiered.transcribe(
+                audio,
+                language=whisper_config.LANGUAGE,
+                temperature=whisper_config.TEMPERATURE
+            )
+            print(f"📈 ยกระดับแล้ว {tiered.escalated_answers}/{tiered.answers} คำตอบ "
+                  f"({tiered.escalation_rate:.0%} ของ segment)")
+        elif self._use_parallel(audio):
+            # worker แต่ละตัวมีโมเดลของตัวเอง - ไม่ต้องยึด/โหลด engine ใน process นี้
+            result = get_parallel_transcriber(self.backend, self.model_size).transcribe(
+                audio,
+                language=whisper_config.LANGUAGE,
+                temperature=whisper_config.TEMPERATURE
+            )
+        else:
+            with self.lease_model() as engine:
+                remote = isinstance(engine, RemoteEngine)
+                if whisper_config.BATCHING and not remote:
+                    result = get_scheduler(engine).submit(audio).result()
+                else:
+                    result = engine.transcribe(
+                        audio,
+                        language=whisper_config.LANGUAGE,
+                        temperature=whisper_config.TEMPERATURE
+                    )
+
+        if whisper_config.CACHE and result is not None:
+            # สร้าง key ใหม่หลังถอด - STT worker รู้โมเดลที่ใช้จริงหลังได้ผลแล้ว
+            cache_key = self._cache_key(audio)
+            if cache_key is not None:
+                get_transcription_cache().put(cache_key, result)
+        return result
+
+    def transcribe_bytes(self, data: bytes) -> Optional[str]:
+        """
+        แปลงไฟล์เสียง WAV ที่อยู่ในหน่วยความจำ (เช่นไฟล์ที่อัปโหลด) เป็นข้อความ
+        
+        Args:
+            data: เนื้อหาไฟล์ WAV
             
+        Returns:
+            ข้อความที่ถอดได้ หรือ None หากล้มเหลว
+        """
+        try:
+            sample_rate, audio = read(io.BytesIO(data))
         except Exception as e:
-            print(f"❌ ไม่สามารถบันทึกไฟล์เสียง: {e}")
+            print(f"❌ ไม่สามารถอ่านข้อมูลเสียง WAV: {e}")
             return None
+        return self.transcribe_array(audio, sample_rate)
 
     def transcribe_voice(self, filename: str) -> Optional[str]:
         """
         แปลงไฟล์เสียงเป็นข้อความด้วย Whisper
         
+        ไฟล์ WAV จะถูกอ่านเข้าหน่วยความจำแล้วส่งผ่าน transcribe_array
+        ส่วนรูปแบบอื่นให้ Whisper ถอดรหัสผ่าน ffmpeg ตามเดิม
+        
         Args:
             filename: ชื่อไฟล์เสียงที่จะแปลง
             
@@ -217,13 +567,21 @@ class WhisperSTT:
 
         print(f"🧠 กำลังถอดเสียงจากไฟล์: {filename}")
         
+        if str(filename).lower().endswith(".wav"):
+            try:
+                sample_rate, audio = read(str(filename))
+                return self.transcribe_array(audio, sample_rate)
+            except Exception as e:
+                print(f"⚠️ อ่านไฟล์ WAV ไม่ได้ ({e}) - ใช้ ffmpeg แทน")
+        
         try:
             start_time = time.time()
-            result = self.model.transcribe(
-                filename, 
-                language=whisper_config.LANGUAGE,
-                temperature=whisper_config.TEMPERATURE
-            )
+            with self.lease_model() as engine:
+                result = engine.transcribe(
+                    str(filename), 
+                    language=whisper_config.LANGUAGE,
+                    temperature=whisper_config.TEMPERATURE
+                )
             
             process_time = time.time() - start_time
             
@@ -248,52 +606,215 @@ class WhisperSTT:
         """หยุดการอัดเสียง"""
         self.is_recording = False
     
-    def record_and_transcribe(self, filename: Optional[str] = None, max_duration: Optional[int] = None) -> Tuple[Optional[str], Optional[str]]:
+    def record_and_transcribe(self, filename: Optional[str] = None, max_duration: Optional[int] = None,
+                              streaming: Optional[bool] = None, session: Optional[str] = None,
+                              question: Optional[int] = None) -> Tuple[Optional[str], Optional[str]]:
         """
-        อัดเสียงและถอดเสียงในขั้นตอนเดียว
+        อัดเสียงและถอดเสียงในขั้นตอนเดียว (เสียงอยู่ในหน่วยความจำตลอด)
+        
+        Args:
+            filename: ชื่อไฟล์สำหรับเก็บเสียงถาวร (ไม่ระบุ = ไม่เขียนไฟล์)
+            max_duration: ระยะเวลาอัดสูงสุด (วินาที)
+            streaming: ถอดเสียงทีละหน้าต่างระหว่างอัด (default ตาม whisper_config.STREAMING)
+            session / question: เก็บเสียงลง audio archive แทนไฟล์ (ดู store_answer)
         
         Returns:
-            (audio_file, transcribed_text)
+            (audio_file, transcribed_text) - audio_file เป็น None เมื่อไม่ได้เก็บเสียง
         """
-        audio_file = self.record_voice(filename, max_duration)
-        if audio_file:
-            text = self.transcribe_voice(audio_file)
-            return audio_file, text
-        return None, None
+        if streaming is None:
+            streaming = whisper_config.STREAMING
+        
+        if streaming:
+            return self.record_and_transcribe_streaming(filename, max_duration, session, question)
+        
+        audio = self.record_audio(max_duration)
+        if audio is None:
+            return None, None
+        
+        text = self.transcribe_array(audio)
+        return self.store_answer(audio, filename, session, question), text
+    
+    def record_and_transcribe_streaming(self, filename: Optional[str] = None,
+                                        max_duration: Optional[int] = None,
+                                        session: Optional[str] = None,
+                                        question: Optional[int] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        อัดเสียงพร้อมถอดเสียงไปพร้อมกัน (streaming mode)
+        
+        ระหว่างอัด เสียงที่ได้จะถูกตัดเป็นหน้าต่างที่ช่วงเงียบ แล้วส่งให้ worker
+        ถอดเสียงใน background เมื่อหยุดพูดจึงเหลือถอดเพียงหน้าต่างสุดท้าย
+        
+        Returns:
+            (audio_file, transcribed_text) - audio_file เป็น None เมื่อไม่ได้ระบุ filename
+        """
+        # ไม่รอโมเดลก่อนอัด - worker ของ streamer จะยึดโมเดลเองใน background
+        # และถือไว้จนจบ session (ไม่ถูกปล่อยจากหน่วยความจำระหว่างถอดหน้าต่าง)
+        streamer = StreamingTranscriber(self.lease_model)
+        audio = self.record_audio(max_duration, on_chunk=streamer.add_chunk)
+        
+        start_time = time.time()
+        text = streamer.finish()
+        if audio is None:
+            return None, None
+        
+        if text:
+            print(f"✅ ถอดเสียงสำเร็จ ({time.time() - start_time:.1f}s หลังหยุดพูด, "
+                  f"{streamer.window_count} หน้าต่าง)")
+            print(f"📝 ข้อความ: {text}")
+        else:
+            print("⚠️ ไม่มีข้อความในไฟล์เสียง")
+        
+        return self.store_answer(audio, filename, session, question), text
+
+
+class StreamingTranscriber:
+    """ถอดเสียงทีละหน้าต่างใน background thread ระหว่างที่ยังอัดเสียงอยู่"""
+    
+    def __init__(self, lease_model: Callable, window: Optional[float] = None, min_window: Optional[float] = None):
+        """
+        Args:
+            lease_model: ฟังก์ชันที่คืน context manager ของ engine (เช่น WhisperSTT.lease_model)
+                         ถูกเรียกครั้งเดียวใน worker thread และถือไว้จนจบ session
+            window: ความยาวหน้าต่างสูงสุด (วินาที)
+            min_window: ความยาวขั้นต่ำก่อนตัดหน้าต่างที่ช่วงเงียบ (วินาที)
+        """
+        self.lease_model = lease_model
+        self.max_samples = int((window or whisper_config.STREAMING_WINDOW) * RATE)
+        self.min_samples = int((min_window or whisper_config.STREAMING_MIN_WINDOW) * RATE)
+        self.window_count = 0
+        self._pending = []
+        self._pending_samples = 0
+        self._pending_has_speech = False
+        self._pending_peak = 0.0
+        self._texts = []
+        self._windows = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    def add_chunk(self, chunk_data: np.ndarray, is_silent: bool):
+        """รับ chunk จาก record_voice และตัดหน้าต่างเมื่อถึงช่วงเงียบหรือเต็มหน้าต่าง"""
+        # chunk เป็น view ของ ring buffer - คัดลอกเก็บไว้ก่อนถูกเขียนทับเมื่อ buffer วนรอบ
+        chunk_data = np.array(chunk_data, dtype=np.float32)
+        self._pending.append(chunk_data)
+        self._pending_samples += len(chunk_data)
+        self._pending_has_speech = self._pending_has_speech or not is_silent
+        if len(chunk_data):
+            self._pending_peak = max(self._pending_peak, float(np.max(np.abs(chunk_data))))
+        
+        if (self._pending_samples >= self.max_samples or
+                (is_silent and self._pending_samples >= self.min_samples)):
+            self._flush()
+    
+    def finish(self, timeout: Optional[float] = None) -> Optional[str]:
+        """ส่งหน้าต่างสุดท้าย รอ worker ทำงานเสร็จ แล้วต่อข้อความทั้งหมด"""
+        self._flush()
+        self._windows.put(None)
+        self._worker.join(timeout)
+        
+        text = " ".join(t for t in self._texts if t)
+        return text or None
+    
+    def _flush(self):
+        if not self._pending:
+            return
+        # ทิ้งเฉพาะหน้าต่างที่เงียบจริง (ไม่มี chunk ที่เป็นเสียงพูด และ peak ต่ำกว่า
+        # SILENCE_PEAK ในสเกล float) - is_silent ที่ผิดสเกลจะไม่ทำให้ทิ้งเสียงพูด
+        has_speech = self._pending_has_speech or self._pending_peak >= SILENCE_PEAK
+        audio = np.concatenate(self._pending)
+        self._pending = []
+        self._pending_samples = 0
+        self._pending_has_speech = False
+        self._pending_peak = 0.0
+        
+        # หน้าต่างที่เงียบทั้งหมด (เช่นช่วงเงียบท้ายคำตอบ) ไม่ต้องส่งถอดเสียง
+        if not has_speech:
+            return
+        self._windows.put(audio)
+        self.window_count += 1
+    
+    def _run(self):
+        try:
+            with self.lease_model() as model:
+                while True:
+                    audio = self._windows.get()
+                    if audio is None:
+                        return
+                    self._decode_window(model, audio)
+        except Exception as e:
+            print(f"❌ ไม่สามารถใช้โมเดล Whisper: {e}")
+        # ยึดโมเดลไม่สำเร็จ - ทิ้งหน้าต่างที่เหลือจนถึงสัญญาณจบ (finish() จะไม่รอค้าง)
+        while self._windows.get() is not None:
+            pass
+    
+    def _decode_window(self, model, audio: np.ndarray):
+        if model is None:
+            print("❌ โมเดล Whisper ไม่พร้อมใช้งาน")
+            return
+        
+        try:
+            # ใช้ข้อความหน้าต่างก่อนหน้าเป็น prompt เพื่อให้ต่อประโยคได้ต่อเนื่อง
+            previous = self._texts[-1] if self._texts else None
+            result = model.transcribe(
+                audio,
+                language=whisper_config.LANGUAGE,
+                temperature=whisper_config.TEMPERATURE,
+                initial_prompt=previous
+            )
+            self._texts.append(result.get("text", "").strip())
+        except Exception as e:
+            print(f"❌ เกิดข้อผิดพลาดในการถอดเสียงหน้าต่าง: {e}")
+
+# instance หลัก - สร้างเมื่อถูกใช้ครั้งแรก (ไม่โหลดโมเดลตอน import)
+_whisper_stt: Optional[WhisperSTT] = None
+_whisper_stt_lock = threading.Lock()
+
+def get_whisper_stt() -> WhisperSTT:
+    """WhisperSTT instance หลัก (การเรียกครั้งแรกจะเริ่มโหลดโมเดลใน background)"""
+    global _whisper_stt
+    with _whisper_stt_lock:
+        if _whisper_stt is None:
+            _whisper_stt = WhisperSTT()
+        return _whisper_stt
+
+def __getattr__(name):
+    # Legacy: whisper_stt เคยสร้างตอน import - ตอนนี้สร้างเมื่อถูกอ้างถึงครั้งแรก
+    if name == "whisper_stt":
+        return get_whisper_stt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# สร้าง instance หลัก
-whisper_stt = WhisperSTT()
+def preload_whisper() -> Future:
+    """เริ่มโหลดและอุ่นเครื่องโมเดลล่วงหน้า คืน Future ที่เสร็จเมื่อพร้อมใช้งาน"""
+    return get_whisper_stt().load_ready()
 
 # Legacy functions สำหรับ backward compatibility
 def record_voice(filename="recorded.wav"):
     """Legacy function - ใช้ WhisperSTT instance"""
-    return whisper_stt.record_voice(filename)
+    return get_whisper_stt().record_voice(filename)
 
 def transcribe_voice(filename):
     """Legacy function - ใช้ WhisperSTT instance"""  
-    return whisper_stt.transcribe_voice(filename)
+    return get_whisper_stt().transcribe_voice(filename)
 
 def test_microphone():
     """ทดสอบไมโครโฟน"""
     print("🎤 ทดสอบไมโครโฟน...")
     try:
-        devices = sd.query_devices()
+        # ใช้ session กลาง - รายการอุปกรณ์ถูกค้นหาครั้งเดียวแล้ว cache ไว้
+        session = get_microphone_session()
         print("📱 อุปกรณ์เสียงที่พบ:")
-        for i, device in enumerate(devices):
-            if device['max_input_channels'] > 0:
-                print(f"  {i}: {device['name']}")
+        for i, name in session.input_devices():
+            print(f"  {i}: {name}")
         
-        default_input = sd.default.device[0] if sd.default.device[0] else 0
-        print(f"🎯 ไมโครโฟนหลัก: {devices[default_input]['name']}")
+        print(f"🎯 ไมโครโฟนหลัก: {session.default_input_name()}")
         return True
         
     except Exception as e:
         print(f"❌ ไม่สามารถเข้าถึงไมโครโฟน: {e}")
         return False
 
-def record_and_transcribe_legacy(filename="recorded.wav"):
-    """Legacy function - อัดและถอดในครั้งเดียว"""
-    return whisper_stt.record_and_transcribe(filename)
+def record_and_transcribe_legacy(filename="recorded.wav", session=None, question=None):
+    """Legacy function - อัดและถอดในครั้งเดียว (ระบุ session/question = เก็บลง audio archive)"""
+    return get_whisper_stt().record_and_transcribe(filename, session=session, question=question)
 
 if __name__ == "__main__":
     # ทดสอบโมดูล
@@ -7,6 +7,16 @@
 - Support เสียงภาษาไทยคุณภาพสูง (Wavenet voices)
 - Real-time audio synthesis และ playback
 - Audio file management และ caching
+- Cache เสียงตามเนื้อหา (memory + disk) - ข้อความซ้ำไม่ต้องเรียก API (ดู tts_cache.py)
+- สังเคราะห์คำถามทั้งชุดล่วงหน้าพร้อมกัน (prefetch_questions, ดู tts_prefetch.py)
+- synthesize_many(): หลายข้อความใน RPC เดียวด้วย SSML <mark> (ดู tts_ssml.py)
+- เล่นเสียงจากหน่วยความจำ (play_bytes) ไม่ต้องเขียน/อ่านไฟล์ - บันทึกไฟล์เฉพาะเมื่อขอ
+- speak_streaming(): ข้อความยาวพูดทีละช่วง สังเคราะห์ช่วงถัดไปล่วงหน้าขณะเล่น (ดู tts_segment.py)
+- เล่นเสียงผ่านคิวเบื้องหลัง (self.player) - รอจบด้วย Future/Event แทนการ poll (ดู tts_playback.py)
+- client/gRPC channel เดียวต่อ process และเสียงต่อ instance/คำขอ (ดู tts_clients.py)
+- API แบบ asyncio: AsyncGoogleTTS (ดู tts_async.py)
+- โหมดส่งเสียงไป browser: สังเคราะห์เป็น OGG_OPUS/MP3 (audio_encoding=...) แทนเล่นด้วย pygame
+- deadline ต่อคำขอ (TTS_DEADLINE) + circuit breaker - ถอยไปใช้เสียง pyttsx3 ในเครื่อง (ดู tts_local.py)
 - Multiple voice profiles และ speech settings
 
 ความสามารถ:
@@ -32,44 +42,67 @@ from google.cloud.texttospeech import TextToSpeechClient
 import os
 import pygame
 import time
-import io
 from pathlib import Path
-from typing import Optional, Dict, List, Union
+from typing import Optional, Dict, Hashable, List, Union
 import threading
-import queue
+from concurrent.futures import ThreadPoolExecutor
 
 try:
-    from .config import tts_config, api_config, AUDIO_DIR, TEMP_DIR
+    from .config import tts_config, api_config, audio_config, AUDIO_DIR, TEMP_DIR
+    from .tts_cache import TTSCache
+    from .tts_prefetch import QuestionPrefetcher
+    from .tts_ssml import END_MARK, batch_texts, build_ssml, split_wav
+    from .tts_segment import split_sentences
+    from .tts_playback import PlaybackWorker, shared_player, shutdown_shared_player
+    from .audio_archive import get_audio_archive
+    from .tts_clients import (cloud_breaker, get_beta_client, get_client, is_mp3, is_outage, mime_type,
+                              resolve_voice, synthesis_params, voice_and_audio_config)
+    from .tts_local import get_local_tts
 except ImportError:
-    from config import tts_config, api_config, AUDIO_DIR, TEMP_DIR
+    from config import tts_config, api_config, audio_config, AUDIO_DIR, TEMP_DIR
+    from tts_cache import TTSCache
+    from tts_prefetch import QuestionPrefetcher
+    from tts_ssml import END_MARK, batch_texts, build_ssml, split_wav
+    from tts_segment import split_sentences
+    from tts_playback import PlaybackWorker, shared_player, shutdown_shared_player
+    from audio_archive import get_audio_archive
+    from tts_clients import (cloud_breaker, get_beta_client, get_client, is_mp3, is_outage, mime_type,
+                             resolve_voice, synthesis_params, voice_and_audio_config)
+    from tts_local import get_local_tts
 
 class GoogleTTS:
     """Enhanced Google Cloud Text-to-Speech Class"""
     
-    def __init__(self, credentials_path: Optional[str] = None):
+    def __init__(self, credentials_path: Optional[str] = None, voice_type: Optional[str] = None):
         """
         Initialize Google TTS
         
         Args:
             credentials_path: path ของ Service Account Key
+            voice_type: เสียงเริ่มต้นของ instance นี้ (None = tts_config.VOICE_NAME)
         """
         self.credentials_path = credentials_path or api_config.google_credentials_path
         self.client = None
+        self.voice_name = resolve_voice(voice_type)
         self.is_ready = False
         self.pygame_initialized = False
-        self.current_audio = None
+        self._stream_stop = threading.Event()
+        self._stream_owners = set()  # owner ของ speak_streaming ที่กำลังเล่น (ให้ stop_streaming หยุด)
+        self.cache = TTSCache() if tts_config.CACHE else None
+        self.breaker = cloud_breaker()  # ใช้ร่วมกันทุก instance - ข้าม Google เมื่อล้มเหลวติดกัน
+        self.local = get_local_tts() if tts_config.LOCAL_FALLBACK else None
         self._init_client()
         self._init_pygame()
     
     def _init_client(self):
         """เริ่มต้น TTS client"""
-        if not os.path.exists(self.credentials_path):
+        if not tts_config.API_ENDPOINT and not os.path.exists(self.credentials_path):
             print(f"❌ ไม่พบไฟล์ Google Credentials: {self.credentials_path}")
             return
         
         try:
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = self.credentials_path
-            self.client = texttospeech.TextToSpeechClient()
+            self.client = get_client(self.credentials_path)
             self.is_ready = True
             print("✅ Google Cloud TTS พร้อมใช้งาน")
         except Exception as e:
@@ -86,88 +119,260 @@ class GoogleTTS:
             self.pygame_initialized = False
 
 
+    @property
+    def player(self) -> Optional[PlaybackWorker]:
+        """PlaybackWorker ที่ใช้ร่วมกันทั้ง process (None เมื่อ mixer ไม่พร้อม)"""
+        return shared_player() if self.pygame_initialized else None
+
+    @staticmethod
+    def _owner(owner: Optional[Hashable]) -> Hashable:
+        # ไม่ระบุ owner = thread ที่เรียก (Streamlit รันแต่ละ session ใน thread ของตัวเอง)
+        return threading.get_ident() if owner is None else owner
+
     def get_voice_options(self) -> Dict[str, str]:
         """ดึงรายการเสียงที่พร้อมใช้งาน"""
         return tts_config.VOICE_OPTIONS.copy()
     
     def set_voice(self, voice_type: str = "female"):
         """
-        เปลี่ยนเสียงที่ใช้
+        เปลี่ยนเสียงที่ใช้ (เฉพาะ instance นี้ - ไม่กระทบ session อื่น)
         
         Args:
             voice_type: ประเภทเสียง (female, male, premium)
         """
         if voice_type in tts_config.VOICE_OPTIONS:
-            tts_config.VOICE_NAME = tts_config.VOICE_OPTIONS[voice_type]
-            print(f"✅ เปลี่ยนเสียงเป็น: {tts_config.VOICE_NAME}")
+            self.voice_name = tts_config.VOICE_OPTIONS[voice_type]
+            print(f"✅ เปลี่ยนเสียงเป็น: {self.voice_name}")
         else:
             print(f"❌ ไม่พบประเภทเสียง: {voice_type}")
     
-    def text_to_speech(self, text: str, filename: Optional[str] = None, voice_type: Optional[str] = None) -> Optional[str]:
+    def build_synthesis_params(self, text: str, voice_type: Optional[str] = None,
+                               audio_encoding: Optional[str] = None) -> Dict:
         """
-        แปลงข้อความเป็นเสียง wav
+        รวมพารามิเตอร์ทั้งหมดที่มีผลต่อเสียงที่สังเคราะห์ได้ (ใช้ทั้งเรียก API และเป็น cache key)
+        
+        Args:
+            text: ข้อความที่ต้องการแปลง
+            voice_type: ประเภทเสียงหรือชื่อเสียงเต็ม (None = เสียงของ instance)
+            audio_encoding: LINEAR16 / OGG_OPUS / MP3 (None = tts_config.AUDIO_ENCODING)
+        """
+        return synthesis_params(text, resolve_voice(voice_type, self.voice_name),
+                                audio_encoding=audio_encoding)
+    
+    def synthesize(self, text: str, voice_type: Optional[str] = None,
+                   audio_encoding: Optional[str] = None) -> Optional[bytes]:
+        """
+        แปลงข้อความเป็นเสียง (audio_content ตาม AUDIO_ENCODING) โดยใช้ cache ก่อนเรียก API
         
         Args:
             text: ข้อความที่ต้องการแปลง
-            filename: ชื่อไฟล์เสียง (optional)
             voice_type: ประเภทเสียง (optional)
+            audio_encoding: encoding ของคำขอนี้ เช่น OGG_OPUS สำหรับส่งไป browser (optional)
             
         Returns:
-            path ของไฟล์เสียง หรือ None หากล้มเหลว
+            ข้อมูลเสียง (LINEAR16 = ไฟล์ WAV ทั้งไฟล์) หรือ None หากล้มเหลว
         """
-        if not self.is_ready:
-            print("❌ Google TTS ไม่พร้อมใช้งาน")
-            return None
-        
         if not text or not text.strip():
             print("❌ ข้อความว่าง")
             return None
         
-        # สร้างชื่อไฟล์ถ้าไม่ได้ระบุ
-        if filename is None:
-            timestamp = int(time.time())
-            filename = TEMP_DIR / f"tts_output_{timestamp}.wav"
-        else:
-            filename = Path(filename)
+        params = self.build_synthesis_params(text, voice_type, audio_encoding)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(params)
+            audio_content = self.cache.get(cache_key)
+            if audio_content is not None:
+                print(f"⚡ ใช้เสียงจาก cache: '{text[:50]}{'...' if len(text) > 50 else ''}'")
+                return audio_content
         
-        # เปลี่ยนเสียงถ้าได้ระบุ
-        current_voice = tts_config.VOICE_NAME
-        if voice_type and voice_type in tts_config.VOICE_OPTIONS:
-            current_voice = tts_config.VOICE_OPTIONS[voice_type]
+        if not self.is_ready:
+            print("❌ Google TTS ไม่พร้อมใช้งาน")
+            return self._local_fallback(text, params["audio_encoding"])
+        
+        if not self.breaker.allow():
+            return self._local_fallback(text, params["audio_encoding"])
         
         try:
             print(f"🗣️  กำลังสร้างเสียงจาก: '{text[:50]}{'...' if len(text) > 50 else ''}'")
             
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=tts_config.LANGUAGE_CODE,
-                name=current_voice
-            )
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.LINEAR16,
-                sample_rate_hertz=tts_config.SAMPLE_RATE,
-                speaking_rate=tts_config.SPEAKING_RATE,
-                pitch=tts_config.PITCH,
-                volume_gain_db=tts_config.VOLUME_GAIN_DB
-            )
-
+            voice, audio_config = voice_and_audio_config(texttospeech, params)
             start_time = time.time()
+            # deadline ของ gRPC - เกินเวลาแล้ว RPC ถูกยกเลิกทันที (ไม่ retry ให้เลยกำหนด)
             response = self.client.synthesize_speech(
-                input=synthesis_input, 
+                input=texttospeech.SynthesisInput(text=params["text"]), 
                 voice=voice, 
-                audio_config=audio_config
+                audio_config=audio_config,
+                retry=None,
+                timeout=tts_config.DEADLINE or None
             )
+            print(f"✅ สร้างเสียงสำเร็จ ({time.time() - start_time:.1f}s)")
             
+        except Exception as e:
+            print(f"❌ ไม่สามารถสร้างเสียงได้: {e}")
+            self._record_error(e)
+            return self._local_fallback(text, params["audio_encoding"])
+        
+        self.breaker.record_success()
+        if cache_key is not None:
+            self.cache.put(cache_key, response.audio_content)
+        return response.audio_content
+    
+    def _record_error(self, error: Exception):
+        """นับเฉพาะ error ที่แปลว่าบริการล่ม/ช้า/เต็ม - คำขอที่ผิดเองไม่เปิดวงจร"""
+        if is_outage(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+    
+    def _local_fallback(self, text: str, audio_encoding: str) -> Optional[bytes]:
+        """
+        เสียงสำรองในเครื่อง (ไม่เก็บ cache - ครั้งหน้าได้เสียงจาก Google เมื่อกลับมาใช้งานได้)
+        
+        คืน None หากได้ encoding ไม่ตรงกับที่ขอ (ผู้เรียกถือว่า bytes เป็น encoding ที่ขอเสมอ)
+        """
+        if self.local is None:
+            return None
+        result = self.local.synthesize(text, audio_encoding=audio_encoding)
+        if result is None:
+            return None
+        audio_content, encoding = result
+        if encoding != audio_encoding:
+            print(f"⚠️ เสียงสำรองเป็น {encoding} ไม่ใช่ {audio_encoding} - ไม่ใช้")
+            return None
+        return audio_content
+    
+    def synthesize_many(self, texts: List[str], voice_type: Optional[str] = None,
+                        audio_encoding: Optional[str] = None) -> List[Optional[bytes]]:
+        """
+        แปลงหลายข้อความเป็นเสียงด้วย RPC น้อยที่สุด
+        
+        ข้อความที่ยังไม่อยู่ใน cache จะถูกรวมเป็น SSML ชุดละไม่เกิน SSML_MAX_BYTES
+        แล้วตัดเสียงที่ได้ตามเวลาของ <mark> หากเสียง/encoding ไม่รองรับ timepoints
+        จะถอยไปสังเคราะห์ทีละข้อ
+        
+        Args:
+            texts: รายการข้อความ
+            voice_type: ประเภทเสียง (optional)
+            audio_encoding: encoding ของคำขอนี้ (SSML batch ใช้ได้เฉพาะ LINEAR16)
+            
+        Returns:
+            ข้อมูลเสียงของแต่ละข้อความตามลำดับ (None = ล้มเหลว)
+        """
+        results: List[Optional[bytes]] = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            params = self.build_synthesis_params(text, voice_type, audio_encoding)
+            cached = self.cache.get(self.cache.key(params)) if self.cache is not None else None
+            if cached is not None:
+                results[i] = cached
+            elif text and text.strip():
+                pending.append(i)
+        
+        batch_ok = (tts_config.BATCH_SYNTHESIS and self.is_ready
+                    and (audio_encoding or tts_config.AUDIO_ENCODING) == "LINEAR16")
+        batches = [[pending[j] for j in batch] for batch in batch_texts([texts[i] for i in pending])
+                   if len(batch) > 1] if batch_ok else []
+        # ชุดต่างๆ เป็น RPC แยกกัน - ส่งพร้อมกัน (แต่ละชุดผ่าน breaker/BATCH_DEADLINE)
+        with ThreadPoolExecutor(max_workers=max(1, min(len(batches), tts_config.PREFETCH_WORKERS)),
+                                thread_name_prefix="tts-batch") as executor:
+            batch_clips = list(executor.map(
+                lambda indexes: self._synthesize_ssml_batch([texts[i] for i in indexes], voice_type),
+                batches))
+        for indexes, clips in zip(batches, batch_clips):
+            if clips is None:
+                continue
+            for i, clip in zip(indexes, clips):
+                results[i] = clip
+                if self.cache is not None:
+                    params = self.build_synthesis_params(texts[i], voice_type, audio_encoding)
+                    self.cache.put(self.cache.key(params), clip)
+        
+        # ข้อที่ยังไม่ได้ (ชุดเดียว/ชุดที่ล้มเหลว/ปิด batch) - สังเคราะห์ทีละข้อ
+        for i in pending:
+            if results[i] is None:
+                results[i] = self.synthesize(texts[i], voice_type, audio_encoding)
+        return results
+    
+    def _synthesize_ssml_batch(self, texts: List[str], voice_type: Optional[str]) -> Optional[List[bytes]]:
+        """
+        สังเคราะห์หลายข้อความใน SSML เดียวแล้วตัดตาม mark - คืน None ถ้าไม่ได้ timepoints ครบ
+        
+        ผ่าน circuit breaker เดียวกับ synthesize() และจำกัดเวลาด้วย BATCH_DEADLINE
+        """
+        if not self.breaker.allow():
+            return None
+        
+        try:
+            from google.cloud import texttospeech_v1beta1 as tts_beta
+            
+            ssml, marks = build_ssml(texts)
+            params = self.build_synthesis_params(ssml, voice_type)
+            voice, audio_config = voice_and_audio_config(tts_beta, params)
+            
+            print(f"🗣️  กำลังสร้างเสียง {len(texts)} ข้อความใน request เดียว (SSML)")
+            start_time = time.time()
+            response = get_beta_client(self.credentials_path).synthesize_speech(
+                request=tts_beta.SynthesizeSpeechRequest(
+                    input=tts_beta.SynthesisInput(ssml=ssml),
+                    voice=voice,
+                    audio_config=audio_config,
+                    enable_time_pointing=[tts_beta.SynthesizeSpeechRequest.TimepointType.SSML_MARK]
+                ),
+                retry=None,
+                timeout=tts_config.BATCH_DEADLINE or None
+            )
+        except Exception as e:
+            print(f"⚠️ สังเคราะห์แบบ SSML ไม่สำเร็จ ({e}) - สังเคราะห์ทีละข้อแทน")
+            self._record_error(e)
+            return None
+        
+        # RPC สำเร็จ - ปัญหา timepoints/การตัดด้านล่างไม่ใช่ความล้มเหลวของบริการ
+        self.breaker.record_success()
+        times = {tp.mark_name: tp.time_seconds for tp in response.timepoints}
+        if any(mark not in times for mark in marks) or END_MARK not in times:
+            print("⚠️ เสียงนี้ไม่รองรับ SSML timepoints - สังเคราะห์ทีละข้อแทน")
+            return None
+        
+        starts = [times[mark] for mark in marks]
+        bounds = list(zip(starts, starts[1:] + [times[END_MARK]]))
+        try:
+            clips = split_wav(response.audio_content, bounds)
+        except Exception as e:
+            print(f"⚠️ ตัดเสียงตาม mark ไม่สำเร็จ ({e}) - สังเคราะห์ทีละข้อแทน")
+            return None
+        print(f"✅ สร้างเสียงสำเร็จ {len(texts)} ข้อความ ({time.time() - start_time:.1f}s)")
+        return clips
+    
+    def text_to_speech(self, text: str, filename: Optional[str] = None, voice_type: Optional[str] = None) -> Optional[str]:
+        """
+        แปลงข้อความเป็นเสียง wav
+        
+        Args:
+            text: ข้อความที่ต้องการแปลง
+            filename: ชื่อไฟล์เสียง (optional)
+            voice_type: ประเภทเสียง (optional)
+            
+        Returns:
+            path ของไฟล์เสียง หรือ None หากล้มเหลว
+        """
+        audio_content = self.synthesize(text, voice_type)
+        if audio_content is None:
+            return None
+        
+        # สร้างชื่อไฟล์ถ้าไม่ได้ระบุ
+        if filename is None:
+            timestamp = int(time.time())
+            filename = TEMP_DIR / f"tts_output_{timestamp}.wav"
+        else:
+            filename = Path(filename)
+        
+        try:
             # บันทึกไฟล์ wav
             with open(filename, "wb") as f:
-                f.write(response.audio_content)
-            
-            process_time = time.time() - start_time
-            print(f"✅ สร้างเสียงสำเร็จ: {filename} ({process_time:.1f}s)")
+                f.write(audio_content)
             return str(filename)
-            
         except Exception as e:
-            print(f"❌ ไม่สามารถสร้างเสียงได้: {e}")
+            print(f"❌ ไม่สามารถบันทึกไฟล์เสียง: {e}")
             return None
 
     def play_audio(self, filename: str, wait: bool = True) -> bool:
@@ -190,78 +395,191 @@ class GoogleTTS:
             return False
 
         try:
-            # หยุดเสียงก่อนหน้า
-            pygame.mixer.music.stop()
-            
-            # โหลดและเล่นไฟล์
-            pygame.mixer.music.load(filename)
-            pygame.mixer.music.play()
-            
-            print(f"🔊 เล่นเสียง: {Path(filename).name}")
-
-            # รอจนกว่าเสียงเล่นเสร็จ
-            if wait:
-                while pygame.mixer.music.get_busy():
-                    pygame.time.wait(100)
-                print("✅ เล่นเสียงเสร็จ")
-            
-            return True
-            
+            with open(filename, "rb") as f:
+                audio_content = f.read()
         except Exception as e:
-            print(f"❌ ไม่สามารถเล่นเสียงได้: {e}")
+            print(f"❌ ไม่สามารถอ่านไฟล์เสียง: {e}")
+            return False
+        
+        print(f"🔊 เล่นไฟล์: {Path(filename).name}")
+        return self.play_bytes(audio_content, wait)
+    
+    def play_bytes(self, audio_content: bytes, wait: bool = True, owner: Optional[Hashable] = None) -> bool:
+        """
+        เล่นเสียง WAV จากหน่วยความจำ (ไม่ผ่านไฟล์)
+        
+        Args:
+            audio_content: ข้อมูลเสียง WAV (เช่นผลจาก synthesize)
+            wait: รอจนกว่าเล่นเสร็จ
+            owner: เจ้าของเสียง - ตัดเฉพาะเสียงก่อนหน้าของ owner เดียวกัน (None = thread ที่เรียก)
+            
+        Returns:
+            True หากเล่นสำเร็จ
+        """
+        if not self.pygame_initialized:
+            print("❌ pygame mixer ไม่พร้อมใช้งาน")
             return False
+        
+        # หยุดเสียงก่อนหน้าของผู้เรียกคนเดียวกันแล้วเล่นแทนที่ (ไม่ตัดเสียงของ session อื่น)
+        done = self.player.enqueue(audio_content, interrupt=True, owner=self._owner(owner))
+        if not wait:
+            return True
+        
+        if done.result():
+            print("✅ เล่นเสียงเสร็จ")
+            return True
+        return False
     
     def speak(self, text: str, voice_type: Optional[str] = None, save_file: bool = False) -> bool:
         """
-        พูดข้อความ (สร้างเสียงและเล่นทันที)
+        พูดข้อความ (สร้างเสียงและเล่นทันทีจากหน่วยความจำ)
         
         Args:
             text: ข้อความที่จะพูด
             voice_type: ประเภทเสียง
-            save_file: บันทึกไฟล์หรือไม่
+            save_file: บันทึกไฟล์ลง AUDIO_DIR ด้วยหรือไม่
             
         Returns:
             True หากสำเร็จ
         """
-        # สร้างไฟล์เสียง
+        audio_content = self.synthesize(text, voice_type)
+        if audio_content is None:
+            return False
+        
         if save_file:
-            timestamp = int(time.time())
-            filename = AUDIO_DIR / f"speech_{timestamp}.wav"
-        else:
-            filename = TEMP_DIR / f"temp_speech_{int(time.time())}.wav"
+            self.save_audio(audio_content)
         
-        audio_file = self.text_to_speech(text, filename, voice_type)
-        if audio_file:
-            success = self.play_audio(audio_file)
-            
-            # ลบไฟล์ temp หลังใช้
-            if not save_file:
-                try:
-                    os.remove(audio_file)
-                except:
-                    pass
+        return self.play_bytes(audio_content)
+    
+    def save_audio(self, audio_content: bytes, name: str = "speech") -> Optional[Path]:
+        """บันทึกเสียงลง AUDIO_DIR (คืน path หรือ None หากล้มเหลว)"""
+        filename = AUDIO_DIR / f"{name}_{int(time.time())}.wav"
+        try:
+            with open(filename, "wb") as f:
+                f.write(audio_content)
+            print(f"💾 บันทึกเสียง: {filename}")
+            return filename
+        except Exception as e:
+            print(f"⚠️ ไม่สามารถบันทึกไฟล์เสียง: {e}")
+            return None
+    
+    def speak_streaming(self, text: str, voice_type: Optional[str] = None,
+                        owner: Optional[Hashable] = None) -> bool:
+        """
+        พูดข้อความยาวแบบ streaming (เช่นรายงานสรุป)
+        
+        ตัดข้อความเป็นช่วง (ช่วงแรกสั้น) แล้วส่งสังเคราะห์ทุกช่วงเข้า thread pool ตามลำดับ
+        เล่นช่วงแรกทันทีที่ได้เสียง ระหว่างนั้นช่วงถัดไปถูกสังเคราะห์อยู่เบื้องหลัง
+        
+        Args:
+            text: ข้อความที่จะพูด (markdown ได้)
+            voice_type: ประเภทเสียง
+            owner: เจ้าของเสียง - ตัดเฉพาะเสียงก่อนหน้าของ owner เดียวกัน (None = thread ที่เรียก)
             
-            return success
-        return False
+        Returns:
+            True หากเล่นได้อย่างน้อยหนึ่งช่วง
+        """
+        segments = split_sentences(text)
+        if not segments or not self.pygame_initialized:
+            return False
+        
+        owner = self._owner(owner)
+        player = self.player
+        self._stream_stop.clear()
+        start_time = time.time()
+        executor = ThreadPoolExecutor(max_workers=tts_config.STREAM_WORKERS,
+                                      thread_name_prefix="tts-stream")
+        futures = [executor.submit(self.synthesize, segment, voice_type) for segment in segments]
+        executor.shutdown(wait=False)
+        
+        # ช่วงถัดไปเข้าคิวทันทีที่สังเคราะห์เสร็จ - เล่นต่อกันโดยไม่มีช่องว่าง
+        player.cancel(owner)
+        self._stream_owners.add(owner)
+        queued = []
+        try:
+            for i, future in enumerate(futures, 1):
+                audio_content = future.result()
+                if self._stream_stop.is_set():
+                    break
+                if audio_content is None:
+                    print(f"⚠️ ข้ามช่วงที่ {i}/{len(futures)} (สังเคราะห์ไม่สำเร็จ)")
+                    continue
+                if not queued:
+                    print(f"⚡ เริ่มเล่นเสียงใน {time.time() - start_time:.2f}s ({len(futures)} ช่วง)")
+                queued.append(player.enqueue(audio_content, owner=owner))
+        finally:
+            # ยกเลิกช่วงที่ยังไม่เริ่มสังเคราะห์ (เมื่อถูกหยุดกลางคัน)
+            for future in futures:
+                future.cancel()
+        
+        try:
+            played = sum(done.result() for done in queued)
+        finally:
+            self._stream_owners.discard(owner)
+        if self._stream_stop.is_set():
+            print("⏹️ หยุดการพูดแบบ streaming")
+        return played > 0
     
-    def stop_audio(self):
-        """หยุดการเล่นเสียง"""
+    def synthesize_long(self, text: str, voice_type: Optional[str] = None,
+                        audio_encoding: str = "MP3") -> Optional[bytes]:
+        """
+        สังเคราะห์ข้อความยาว (เกินขีดจำกัดต่อ request) เป็นคลิปเดียวสำหรับส่งไป browser
+        
+        ตัดเป็นช่วงด้วย split_sentences แล้วสังเคราะห์พร้อมกัน จากนั้นต่อ frame MP3
+        ของทุกช่วงเข้าด้วยกัน (MP3 ต่อกันตรงๆ ได้ - LINEAR16/OGG_OPUS ต่อแบบนี้ไม่ได้)
+        
+        Returns:
+            ข้อมูลเสียง MP3 หรือ None หากไม่มีช่วงใดสำเร็จ
+        """
+        if audio_encoding != "MP3":
+            raise ValueError("synthesize_long รองรับเฉพาะ MP3")
+        segments = split_sentences(text, first_max_chars=tts_config.STREAM_SEGMENT_MAX_CHARS)
+        with ThreadPoolExecutor(max_workers=tts_config.STREAM_WORKERS,
+                                thread_name_prefix="tts-long") as executor:
+            clips = list(executor.map(lambda segment: self.synthesize(segment, voice_type, audio_encoding),
+                                      segments))
+        # ต่อได้เฉพาะ MP3 จริง - ช่วงอื่น (เช่นเสียงสำรองที่แปลงไม่ได้) ทำให้ไฟล์เสีย
+        mp3_clips = [clip for clip in clips if clip and is_mp3(clip)]
+        if len(mp3_clips) < len([clip for clip in clips if clip]):
+            print("⚠️ ข้ามช่วงที่ไม่ใช่ MP3")
+        return b"".join(mp3_clips) if mp3_clips else None
+    
+    def stop_streaming(self):
+        """หยุด speak_streaming() ที่กำลังทำงาน (เรียกจาก thread อื่นได้)"""
+        self._stream_stop.set()
+        if self.pygame_initialized:
+            for owner in list(self._stream_owners):
+                self.player.cancel(owner)
+    
+    def stop_audio(self, owner: Optional[Hashable] = None):
+        """
+        หยุดการเล่นเสียง
+        
+        Args:
+            owner: หยุดเฉพาะเสียงของ owner นี้ (None = หยุดทุกเสียงใน process)
+        """
         if self.pygame_initialized:
-            pygame.mixer.music.stop()
+            if owner is None:
+                pygame.mixer.music.stop()
+            self.player.cancel(owner)
     
     def is_playing(self) -> bool:
         """ตรวจสอบว่าเสียงกำลังเล่นอยู่หรือไม่"""
-        return pygame.mixer.music.get_busy() if self.pygame_initialized else False
+        if not self.pygame_initialized:
+            return False
+        return pygame.mixer.music.get_busy() or self.player.is_busy()
 
 # สร้าง instance หลัก
 google_tts = GoogleTTS()
 
 # Legacy functions สำหรับ backward compatibility
 def create_tts_client(json_path):
-    """Legacy function - สร้าง TTS client"""
+    """Legacy function - คืน TTS client ที่ใช้ร่วมกันทั้ง process (สร้างครั้งแรกเท่านั้น)"""
+    if not os.path.exists(json_path):
+        print(f"❌ ไม่พบไฟล์ Google Credentials: {json_path}")
+        return None
     try:
-        tts = GoogleTTS(json_path)
-        return tts.client if tts.is_ready else None
+        return get_client(json_path)
     except Exception as e:
         print(f"❌ ไม่สามารถสร้าง TTS client: {e}")
         return None
@@ -278,7 +596,38 @@ def speak(text, voice_type=None):
     """Legacy function - พูดข้อความ"""
     return google_tts.speak(text, voice_type)
 
-def read_questions(tts_client, questions_array, prefix="question"):
+def speak_streaming(text, voice_type=None):
+    """พูดข้อความยาวทีละช่วง (เริ่มเล่นได้ก่อนสังเคราะห์ครบ)"""
+    return google_tts.speak_streaming(text, voice_type)
+
+def synthesize(text, voice_type=None, audio_encoding=None):
+    """สร้างเสียงเป็น bytes (WAV หรือ encoding ที่ระบุ) โดยไม่เขียนไฟล์"""
+    return google_tts.synthesize(text, voice_type, audio_encoding)
+
+def synthesize_long(text, voice_type=None):
+    """สร้างเสียง MP3 ของข้อความยาว (เช่นรายงานสรุป) เป็นคลิปเดียว"""
+    return google_tts.synthesize_long(text, voice_type)
+
+def play_bytes(audio_content):
+    """เล่นเสียง WAV จากหน่วยความจำ"""
+    return google_tts.play_bytes(audio_content)
+
+def prefetch_questions(questions, voice_type=None, audio_encoding=None) -> QuestionPrefetcher:
+    """เริ่มสังเคราะห์เสียงคำถามทุกข้อพร้อมกันใน background"""
+    return QuestionPrefetcher(google_tts, questions, voice_type, audio_encoding=audio_encoding)
+
+def archive_question_audio(audio_content, session, question, prefix="question"):
+    """เก็บเสียงคำถาม: ลง audio archive เมื่อมี session (และเปิด ARCHIVE) ไม่เช่นนั้นเขียน WAV ลง AUDIO_DIR"""
+    if session is not None and audio_config.ARCHIVE:
+        try:
+            get_audio_archive().add_wav(session, question, audio_content, kind="question")
+            return
+        except Exception as e:
+            print(f"⚠️ เก็บเสียงลง archive ไม่สำเร็จ ({e}) - บันทึกเป็นไฟล์แทน")
+    google_tts.save_audio(audio_content, f"{prefix}_{question}")
+
+def read_questions(tts_client, questions_array, prefix="question", session=None, first_question=1,
+                   clips=None):
     """
     อ่านคำถามทั้งหมดด้วยเสียง (Enhanced)
     
@@ -286,29 +635,49 @@ def read_questions(tts_client, questions_array, prefix="question"):
         tts_client: TTS client object (ignored - ใช้ google_tts)
         questions_array: รายการคำถาม
         prefix: prefix สำหรับชื่อไฟล์
+        session: รหัส session สำหรับเก็บเสียงลง audio archive (เมื่อเปิด SAVE_AUDIO)
+        first_question: ลำดับของคำถามแรกใน questions_array
+        clips: เสียงที่สังเคราะห์ไว้แล้วของแต่ละคำถาม (เช่นจาก QuestionPrefetcher.get) -
+               สังเคราะห์ใหม่เฉพาะข้อที่เป็น None
         
     Returns:
         True หากสำเร็จ
     """
-    if not google_tts.is_ready:
+    clips = list(clips) if clips is not None else [None] * len(questions_array)
+    if (any(clip is None for clip in clips)
+            and not google_tts.is_ready and google_tts.local is None):
         print("❌ Google TTS ไม่พร้อมใช้งาน")
         return False
     
+    if not google_tts.pygame_initialized:
+        print("❌ pygame mixer ไม่พร้อมใช้งาน")
+        return False
+    
     success = True
+    queued = []
     
-    for i, question in enumerate(questions_array, 1):
+    # สังเคราะห์ข้อถัดไประหว่างที่คิวกำลังเล่นข้อก่อนหน้า (ช่วงเงียบคั่นอยู่ในคิว ไม่ต้อง sleep)
+    for i, (question, audio_content) in enumerate(zip(questions_array, clips), first_question):
         print(f"🔊 คำถามที่ {i}: {question}")
         
-        # สร้างและเล่นเสียง
-        if not google_tts.speak(question, save_file=True):
+        if audio_content is None:
+            audio_content = google_tts.synthesize(question)
+        if audio_content is None:
             print(f"❌ ไม่สามารถพูดคำถามที่ {i}")
             success = False
             continue
-            
-        print(f"✅ เล่นคำถามที่ {i} เรียบร้อย")
+        if tts_config.SAVE_AUDIO:
+            archive_question_audio(audio_content, session, i, prefix)
         
-        # หน่วงเวลาก่อนคำถามถัดไป
-        time.sleep(0.5)
+        queued.append((i, google_tts.player.enqueue(audio_content, gap=tts_config.QUESTION_GAP,
+                                                     owner=threading.get_ident())))
+    
+    for i, done in queued:
+        if done.result():
+            print(f"✅ เล่นคำถามที่ {i} เรียบร้อย")
+        else:
+            print(f"❌ ไม่สามารถพูดคำถามที่ {i}")
+            success = False
     
     return success
 
@@ -316,6 +685,8 @@ def cleanup_pygame():
     """ทำความสะอาด pygame mixer"""
     if google_tts.pygame_initialized:
         google_tts.stop_audio()
+        shutdown_shared_player()
+        google_tts.pygame_initialized = False
     try:
         pygame.mixer.quit()
     except:
@@ -6,11 +6,15 @@ import pyttsx3
 import queue
 import time
 
+try:
+    from .vad import VoiceActivityDetector
+except ImportError:
+    from vad import VoiceActivityDetector
+
 # ตั้งค่า
 RATE = 16000       # sample rate
 CHUNK = 1024       # ขนาด frame
-SILENCE_THRESHOLD = 500  # ปรับตามความดังไมค์
-SILENCE_DURATION = 5     # วินาทีที่ถือว่าเงียบ -> หยุดบันทึก
+SILENCE_DURATION = 5     # วินาทีที่ยังไม่เริ่มพูด -> หยุดบันทึก
 
 # โหลดโมเดล Whisper
 model = whisper.load_model("medium")
@@ -35,19 +39,17 @@ def record_voice(filename="recorded.wav"):
             print(status)
         q.put(indata.copy())
 
+    vad = VoiceActivityDetector(RATE)
     with sd.InputStream(samplerate=RATE, channels=1, callback=callback, blocksize=CHUNK):
-        silent_chunks = 0
         while True:
             chunk = q.get()
             recording.append(chunk)
-            amplitude = np.max(np.abs(chunk))
-            if amplitude < SILENCE_THRESHOLD:
-                silent_chunks += 1
-            else:
-                silent_chunks = 0
+            vad.process(chunk)
 
-            # ถ้าเงียบครบ SILENCE_DURATION
-            if silent_chunks * CHUNK / RATE >= SILENCE_DURATION:
+            # หยุดเมื่อพูดจบ หรือยังไม่เริ่มพูดภายใน SILENCE_DURATION
+            if vad.end_of_speech:
+                break
+            if not vad.speech_started and len(recording) * CHUNK / RATE >= SILENCE_DURATION:
                 break
 
     audio = np.concatenate(recording, axis=0)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+🗃️ audio_archive.py - Append-Only Compressed Audio Archive
+===========================================================
+ฟีเจอร์หลัก:
+- เก็บเสียงคำถาม/คำตอบทุกข้อในไฟล์ segment ไม่กี่ไฟล์ แทน WAV ไฟล์เล็กนับพันไฟล์
+- แต่ละคลิปถูกบีบอัดเป็น FLAC (lossless) หรือ Opus แล้วต่อท้าย segment (append-only)
+- index (JSON Lines) เก็บ session, question, offset, length, duration, rms ของทุกคลิป
+- แสดงรายการ/สรุปทั้งหมดจาก index โดยไม่ต้องเปิดไฟล์เสียง
+- เล่นซ้ำคลิปใดก็ได้ด้วยการ seek ไปที่ offset (random access)
+- ขึ้น segment ใหม่เมื่อไฟล์ปัจจุบันใหญ่เกิน ARCHIVE_SEGMENT_MB
+- เขียนพร้อมกันได้หลาย process (เช่น CLI + Streamlit) - ล็อกด้วย OS file lock (archive.lock)
+
+ความสามารถ:
+- AudioArchive.add() / add_wav(): เก็บเสียงจาก numpy array หรือไฟล์ WAV ในหน่วยความจำ
+- AudioArchive.entries(): รายการคลิป (กรองตาม session / kind)
+- AudioArchive.read() / read_bytes(): ถอดเสียงกลับเป็น array หรือคืนข้อมูลที่บีบอัดไว้
+- get_audio_archive(): archive เดียวต่อ process
+- new_session_id(): รหัส session ของการสัมภาษณ์แต่ละครั้ง
+
+การใช้งาน:
+  python modules/audio_archive.py list
+  python modules/audio_archive.py import answer_*.wav --session legacy
+===========================================================
+"""
+import argparse
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .config import audio_config, DATA_DIR
+except ImportError:
+    from config import audio_config, DATA_DIR
+
+
+# รูปแบบที่รองรับ -> (format, subtype) ของ soundfile
+FORMATS = {
+    "FLAC": ("FLAC", "PCM_16"),
+    "OPUS": ("OGG", "OPUS"),
+}
+# MIME type ของข้อมูลที่ read_bytes() คืน (สำหรับ st.audio)
+MIME_TYPES = {
+    "FLAC": "audio/flac",
+    "OPUS": "audio/ogg",
+}
+
+INDEX_NAME = "index.jsonl"
+LOCK_NAME = "archive.lock"
+
+_archive_lock = threading.Lock()
+_archive: Optional["AudioArchive"] = None
+
+
+def new_session_id() -> str:
+    """รหัส session ที่เรียงตามเวลา เช่น 20250101-093000-1a2b"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
+
+
+def _segment_name(number: int) -> str:
+    return f"segment_{number:05d}.seg"
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """ล็อกข้าม process (fcntl บน POSIX, msvcrt บน Windows)"""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class AudioArchive:
+    """คลังเสียงแบบ append-only: segment files + index"""
+
+    def __init__(self, directory=None, audio_format: Optional[str] = None,
+                 segment_max_bytes: Optional[int] = None):
+        """
+        Args:
+            directory: โฟลเดอร์ของ archive (default DATA_DIR/audio_archive)
+            audio_format: FLAC หรือ OPUS (default audio_config.ARCHIVE_FORMAT)
+            segment_max_bytes: ขนาดสูงสุดต่อ segment ก่อนขึ้นไฟล์ใหม่
+        """
+        self.directory = Path(directory or DATA_DIR / "audio_archive")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.audio_format = (audio_format or audio_config.ARCHIVE_FORMAT).upper()
+        if self.audio_format not in FORMATS:
+            raise ValueError(f"ไม่รองรับรูปแบบ {self.audio_format} (รองรับ: {', '.join(FORMATS)})")
+        self.segment_max_bytes = (segment_max_bytes if segment_max_bytes is not None
+                                  else audio_config.ARCHIVE_SEGMENT_MB * 1024 * 1024)
+        self.index_path = self.directory / INDEX_NAME
+        self.lock_path = self.directory / LOCK_NAME
+        self._lock = threading.Lock()
+        self._entries: List[Dict] = []
+        self._index_pos = 0
+        self._load_index()
+        self._segment = max((entry["segment"] for entry in self._entries), default=1)
+
+    def _load_index(self):
+        """อ่านบรรทัดที่เพิ่มต่อท้าย index ตั้งแต่ครั้งก่อน (รวมที่ process อื่นเขียน)"""
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_pos)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # process อื่นกำลังเขียนบรรทัดนี้ - อ่านครั้งหน้า
+                self._index_pos += len(line)
+                try:
+                    self._entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # บรรทัดที่เขียนไม่จบ (เช่นโปรแกรมถูกปิดกลางคัน) - ข้ามไป
+                    continue
+
+    def _last_byte(self) -> bytes:
+        with open(self.index_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1)
+
+    def _encode(self, audio: np.ndarray, sample_rate: int) -> bytes:
+        import soundfile as sf
+
+        fmt, subtype = FORMATS[self.audio_format]
+        output = io.BytesIO()
+        sf.write(output, audio, sample_rate, format=fmt, subtype=subtype)
+        return output.getvalue()
+
+    def add(self, session: str, question: int, audio: np.ndarray, sample_rate: int,
+            kind: str = "answer") -> Dict:
+        """
+        บีบอัดและต่อท้ายคลิปเข้า archive
+
+        Args:
+            session: รหัส session (ดู new_session_id)
+            question: ลำดับคำถาม (เริ่มที่ 1)
+            audio: เสียง mono float ช่วง [-1, 1]
+            sample_rate: sample rate ของ audio
+            kind: question (เสียง TTS) หรือ answer (เสียงผู้สมัคร)
+
+        Returns:
+            entry ใน index ของคลิปนี้
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        data = self._encode(audio, sample_rate)
+
+        with self._lock, _file_lock(self.lock_path):
+            # process อื่นอาจเพิ่มคลิป/ขึ้น segment ใหม่ไปแล้ว
+            self._load_index()
+            self._segment = max([self._segment] + [entry["segment"] for entry in self._entries])
+            segment_path = self.directory / _segment_name(self._segment)
+            if segment_path.exists() and segment_path.stat().st_size + len(data) > self.segment_max_bytes:
+                self._segment += 1
+                segment_path = self.directory / _segment_name(self._segment)
+
+            with open(segment_path, "ab") as f:
+                # ตำแหน่งท้ายไฟล์จริงภายใต้ file lock (tell() หลังเปิด append ไม่รับประกันข้าม process)
+                offset = f.seek(0, os.SEEK_END)
+                f.write(data)
+
+            entry = {
+                "session": session,
+                "question": question,
+                "kind": kind,
+                "segment": self._segment,
+                "offset": offset,
+                "length": len(data),
+                "duration": round(len(audio) / sample_rate, 3),
+                "rms": round(float(np.sqrt(np.mean(np.square(audio)))) if audio.size else 0.0, 5),
+                "sample_rate": sample_rate,
+                "format": self.audio_format,
+                "created": round(time.time(), 3),
+            }
+            # เขียนข้อมูลเสียงก่อน index เสมอ - index ไม่มีทางชี้ไปยังข้อมูลที่ไม่มีอยู่
+            with open(self.index_path, "ab") as f:
+                if f.seek(0, os.SEEK_END) > 0 and self._last_byte() != b"\n":
+                    f.write(b"\n")  # ปิดบรรทัดที่เขียนไม่จบจากครั้งก่อน - ไม่ให้ต่อกับ entry นี้
+                f.write((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+            self._load_index()
+
+        print(f"🗃️ เก็บเสียง {kind} ข้อ {question} ลง archive "
+              f"({entry['duration']:.1f}s, {len(data) / 1024:.0f} KB)")
+        return entry
+
+    def add_wav(self, session: str, question: int, wav_bytes: bytes, kind: str = "question") -> Dict:
+        """เก็บไฟล์ WAV ในหน่วยความจำ (เช่นผลจาก GoogleTTS.synthesize) ลง archive"""
+        import soundfile as sf
+
+        audio, sample_rate = sf.read(io.BytesIO(wav_bytes), dtype="float32")
+        return self.add(session, question, audio, sample_rate, kind)
+
+    def entries(self, session: Optional[str] = None, kind: Optional[str] = None) -> List[Dict]:
+        """รายการคลิปจาก index (ไม่เปิดไฟล์เสียง)"""
+        with self._lock:
+            self._load_index()
+            return [entry for entry in self._entries
+                    if (session is None or entry["session"] == session)
+                    and (kind is None or entry["kind"] == kind)]
+
+    def sessions(self) -> List[str]:
+        with self._lock:
+            self._load_index()
+            return list(dict.fromkeys(entry["session"] for entry in self._entries))
+
+    def read_bytes(self, entry: Dict) -> bytes:
+        """ข้อมูลเสียงที่บีบอัดไว้ของคลิป (FLAC/Ogg Opus ทั้งไฟล์ - ส่งให้ st.audio ได้ตรงๆ)"""
+        with open(self.directory / _segment_name(entry["segment"]), "rb") as f:
+            f.seek(entry["offset"])
+            return f.read(entry["length"])
+
+    def read(self, entry: Dict) -> Tuple[np.ndarray, int]:
+        """ถอดคลิปกลับเป็น (audio float32, sample_rate)"""
+        import soundfile as sf
+
+        audio, sample_rate = sf.read(io.BytesIO(self.read_bytes(entry)), dtype="float32")
+        return audio, sample_rate
+
+    def size_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.glob("segment_*.seg"))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._load_index()
+            entries = list(self._entries)
+        return {
+            "clips": len(entries),
+            "sessions": len({entry["session"] for entry in entries}),
+            "duration": round(sum(entry["duration"] for entry in entries), 1),
+            "bytes": self.size_bytes(),
+            "format": self.audio_format,
+        }
+
+
+def get_audio_archive() -> AudioArchive:
+    """AudioArchive ที่ใช้ร่วมกันทั้ง process (สร้างครั้งแรกที่เรียก)"""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = AudioArchive()
+        return _archive
+
+
+def archive_locator(entry: Dict) -> str:
+    """ตัวอ้างอิงคลิปแบบข้อความ (ใช้แทน path ของไฟล์เสียง)"""
+    return f"archive:{entry['session']}/{entry['kind']}/{entry['question']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="จัดการคลังเสียงคำถาม/คำตอบ")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="แสดงรายการคลิปจาก index")
+    list_parser.add_argument("--session", help="แสดงเฉพาะ session นี้")
+
+    import_parser = subparsers.add_parser("import", help="ย้ายไฟล์ WAV เดิมเข้า archive")
+    import_parser.add_argument("files", nargs="+", help="ไฟล์ WAV เช่น answer_*.wav")
+    import_parser.add_argument("--session", default="imported", help="รหัส session ของไฟล์ที่นำเข้า")
+    import_parser.add_argument("--kind", default="answer", choices=["question", "answer"])
+    args = parser.parse_args()
+
+    archive = get_audio_archive()
+    if args.command == "list":
+        for entry in archive.entries(args.session):
+            print(f"{entry['session']}  {entry['kind']:8s} ข้อ {entry['question']:<3} "
+                  f"{entry['duration']:6.1f}s  rms {entry['rms']:.3f}  {entry['length'] / 1024:6.0f} KB")
+        stats = archive.stats()
+        print(f"\n📊 {stats['clips']} คลิป, {stats['sessions']} session, "
+              f"{stats['duration']:.0f}s, {stats['bytes'] / 1024 / 1024:.1f} MB ({stats['format']})")
+        return
+
+    total_before = 0
+    for path in map(Path, args.files):
+        # ใช้ตัวเลขในชื่อไฟล์เป็นลำดับคำถาม (answer_3.wav -> 3)
+        match = re.search(r"(\d+)", path.stem)
+        question = int(match.group(1)) if match else 0
+        try:
+            archive.add_wav(args.session, question, path.read_bytes(), args.kind)
+            total_before += path.stat().st_size
+        except Exception as e:
+            print(f"❌ นำเข้า {path} ไม่สำเร็จ: {e}")
+    print(f"✅ นำเข้าแล้ว - WAV เดิมรวม {total_before / 1024 / 1024:.1f} MB, "
+          f"archive ตอนนี้ {archive.size_bytes() / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+🎚️ audio_buffer.py - Preallocated Ring Buffer for Microphone Capture
+=====================================================================
+ฟีเจอร์หลัก:
+- Buffer NumPy ขนาดคงที่ จองครั้งเดียวตามระยะอัดสูงสุด
+- เขียนจาก sounddevice callback โดยไม่จองหน่วยความจำใหม่ต่อ chunk
+- เก็บค่า peak และ RMS แบบสะสม ไม่ต้องวนทั้งคลิปซ้ำตอนจบ
+- ส่งคลิปที่อัดเสร็จออกเป็น view (zero-copy)
+
+ความสามารถ:
+- AudioRingBuffer.write(): เรียกจาก audio callback ได้ (copy ลง slice เท่านั้น)
+- AudioRingBuffer.wait(): main loop รอข้อมูลใหม่ด้วย Event แทน queue
+- AudioRingBuffer.view() / clip(): อ่านช่วงที่ต้องการแบบไม่ copy
+- เขียนวนทับข้อมูลเก่าเมื่อเต็ม (ใช้เป็น pre-roll buffer ได้)
+
+การใช้งาน: from modules.audio_buffer import AudioRingBuffer
+=====================================================================
+"""
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Ring buffer เสียง mono ที่จองหน่วยความจำไว้ล่วงหน้า"""
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        """
+        Args:
+            capacity: จำนวน sample สูงสุดที่เก็บได้
+            dtype: ชนิดข้อมูลของ sample
+        """
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=dtype)
+        self._event = threading.Event()
+        self.reset()
+
+    def reset(self):
+        """ล้างข้อมูลและค่าสถิติ (ไม่จองหน่วยความจำใหม่)"""
+        self.written = 0  # จำนวน sample ที่เคยเขียนทั้งหมด (เพิ่มขึ้นเรื่อยๆ)
+        self.peak = 0.0
+        self._sum_squares = 0.0
+        self._event.clear()
+
+    @property
+    def available(self) -> int:
+        """จำนวน sample ที่ยังอยู่ใน buffer"""
+        return min(self.written, self.capacity)
+
+    @property
+    def oldest(self) -> int:
+        """ตำแหน่ง (นับแบบ written) ของ sample เก่าที่สุดที่ยังอยู่ใน buffer"""
+        return self.written - self.available
+
+    @property
+    def rms(self) -> float:
+        """RMS ของทุก sample ที่เขียนมา"""
+        return float(np.sqrt(self._sum_squares / self.written)) if self.written else 0.0
+
+    @property
+    def wrapped(self) -> bool:
+        return self.written > self.capacity
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        เขียน sample ต่อท้าย (เรียกจาก audio callback ได้ - ไม่จองหน่วยความจำใหม่)
+
+        Returns:
+            จำนวน sample ที่เขียน
+        """
+        n = len(samples)
+        if n == 0:
+            return 0
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:]
+
+        # อัปเดตสถิติแบบสะสม: max/min/dot ไม่สร้าง array ชั่วคราว
+        self.peak = max(self.peak, float(samples.max()), -float(samples.min()))
+        self._sum_squares += float(np.dot(samples, samples))
+        self.written += n
+        self._event.set()
+        return n
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """รอจนกว่าจะมีข้อมูลใหม่ถูกเขียน คืน False ถ้าหมดเวลา"""
+        if self._event.wait(timeout):
+            self._event.clear()
+            return True
+        return False
+
+    def view(self, start: int, end: Optional[int] = None) -> np.ndarray:
+        """
+        อ่านช่วง [start, end) ตามตำแหน่งแบบ written
+
+        คืน view (ไม่ copy) เมื่อช่วงนั้นไม่คร่อมจุดวนของ ring และ copy เฉพาะกรณีคร่อม
+        """
+        end = self.written if end is None else end
+        start = max(start, self.oldest)
+        if end <= start:
+            return self._data[:0]
+
+        s, e = start % self.capacity, end % self.capacity
+        if s < e or e == 0:
+            return self._data[s:e or self.capacity]
+        return np.concatenate((self._data[s:], self._data[:e]))
+
+    def clip(self) -> np.ndarray:
+        """ข้อมูลทั้งหมดที่ยังอยู่ใน buffer เรียงตามเวลา (zero-copy หากยังไม่วนทับ)"""
+        return self.view(self.oldest)
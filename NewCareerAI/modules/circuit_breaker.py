@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+🔌 circuit_breaker.py - Circuit Breaker for Remote Services
+============================================================
+ฟีเจอร์หลัก:
+- นับความล้มเหลว/หมดเวลาติดกันของบริการภายนอก (เช่น Google Cloud TTS)
+- เมื่อเกินเกณฑ์ (open) จะข้ามการเรียกบริการนั้นทันทีจนกว่าจะครบ cooldown
+- หลัง cooldown ปล่อยคำขอทดลองทีละหนึ่ง (half-open) - สำเร็จจึงกลับมาใช้ตามปกติ
+- Thread-safe ใช้ร่วมกันได้ทุก session
+
+ความสามารถ:
+- CircuitBreaker.allow(): ควรเรียกบริการหรือไม่
+- CircuitBreaker.record_success() / record_failure(): รายงานผลการเรียก
+- get_breaker(): breaker ที่ใช้ร่วมกันตามชื่อบริการ (หนึ่งตัวต่อ process)
+
+การใช้งาน:
+  breaker = get_breaker("google-tts")
+  if breaker.allow(): ...
+============================================================
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_registry_lock = threading.Lock()
+_breakers: Dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitBreaker:
+    """ตัดการเรียกบริการที่ล้มเหลวติดกัน แล้วลองใหม่หลัง cooldown"""
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 30.0):
+        """
+        Args:
+            name: ชื่อบริการ (ใช้ในข้อความ log)
+            failure_threshold: ล้มเหลวติดกันกี่ครั้งจึงเปิดวงจร
+            cooldown: วินาทีที่ข้ามบริการก่อนปล่อยคำขอทดลอง
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """คืน True หากควรเรียกบริการ (half-open ปล่อยคำขอทดลองได้ครั้งละหนึ่ง)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = HALF_OPEN
+                self._trial_running = False
+            if self._state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"✅ {self.name} กลับมาใช้งานได้")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    print(f"⚠️ {self.name} ล้มเหลว {self._failures} ครั้งติดกัน - "
+                          f"ข้ามไป {self.cooldown:.0f}s")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """คืนสิทธิ์คำขอทดลองโดยไม่นับผล (เช่นคำขอผิดรูปแบบ - ไม่ได้บอกว่าบริการล่ม)"""
+        with self._lock:
+            self._trial_running = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"name": self.name, "state": self._state, "failures": self._failures}
+
+
+def get_breaker(name: str, failure_threshold: Optional[int] = None,
+                cooldown: Optional[float] = None) -> CircuitBreaker:
+    """breaker ที่ใช้ร่วมกันทั้ง process ตามชื่อบริการ (ค่าตั้งต้นใช้เมื่อสร้างครั้งแรกเท่านั้น)"""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            kwargs = {}
+            if failure_threshold is not None:
+                kwargs["failure_threshold"] = failure_threshold
+            if cooldown is not None:
+                kwargs["cooldown"] = cooldown
+            breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+        return breaker
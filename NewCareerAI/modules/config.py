@@ -47,6 +47,7 @@ PROJECT_ROOT = Path(__file__).parent.parent
 AUDIO_DIR = PROJECT_ROOT / "audio_files"
 TEMP_DIR = PROJECT_ROOT / "temp"
 DATA_DIR = PROJECT_ROOT / "data"
+MODEL_DIR = Path(os.getenv("WHISPER_MODEL_DIR", PROJECT_ROOT / "models"))  # โมเดลที่แปลงเป็น safetensors
 
 # สร้างโฟลเดอร์หากไม่มี
 for dir_path in [AUDIO_DIR, TEMP_DIR, DATA_DIR]:
@@ -100,11 +101,37 @@ class AudioConfig:
     """การตั้งค่าเสียง"""
     SAMPLE_RATE = 16000
     CHUNK_SIZE = 1024
-    SILENCE_THRESHOLD = 500
-    SILENCE_DURATION = 3  # วินาที
+    SILENCE_THRESHOLD = 500  # legacy (สเกล int16) - การอัดใช้ VAD ด้านล่างแทน
+    SILENCE_PEAK = SILENCE_THRESHOLD / 32768  # SILENCE_THRESHOLD ในสเกล float [-1, 1] ของ sounddevice
+    SILENCE_DURATION = 3  # วินาที - หยุดอัดถ้ายังไม่เริ่มพูดภายในเวลานี้
     MIN_RECORDING_DURATION = 1  # วินาที
     MAX_RECORDING_DURATION = 30  # วินาที
     
+    # เปิดไมโครโฟนค้างไว้ตลอดการสัมภาษณ์ และเก็บเสียงก่อนเริ่มอัด (pre-roll)
+    PERSISTENT_STREAM = os.getenv("MIC_PERSISTENT_STREAM", "false").lower() == "true"
+    PRE_ROLL = 0.5  # วินาที
+    
+    # Voice activity detection (modules/vad.py) - ค่าพลังงานเป็นสเกล float [-1, 1]
+    VAD_FRAME_MS = 20  # ความยาว frame
+    VAD_CALIBRATION_MS = 300  # ช่วงแรกที่ใช้วัด noise floor
+    VAD_ENERGY_RATIO = 3.0  # เสียงพูดต้องดังกว่า noise floor กี่เท่า
+    VAD_MIN_ENERGY = 0.005  # RMS ขั้นต่ำที่ถือว่าเป็นเสียงพูด
+    VAD_ZCR_MAX = 0.35  # ZCR สูงกว่านี้ถือเป็น noise (ยกเว้นพลังงานสูงมาก)
+    VAD_MIN_SPEECH = 0.2  # วินาที - เสียงพูดสะสมขั้นต่ำก่อนเริ่มนับ endpoint
+    VAD_HANGOVER = 0.6  # วินาที - เงียบหลังพูดเท่านี้ถือว่าพูดจบ
+    VAD_NOISE_MAX_RISE = 2.0  # noise floor ที่ปรับระหว่างอัดสูงได้ไม่เกินกี่เท่าของค่าที่ calibrate
+    VAD_NOISE_FLOOR_MAX = 0.02  # เพดาน noise floor (RMS) - คลิปที่พูดเกือบตลอดจะไม่ถูกมองว่าเงียบทั้งคลิป
+    
+    # ตัดช่วงเงียบหัว/ท้ายคลิปก่อนส่งถอดเสียง
+    TRIM_SILENCE = True
+    TRIM_PADDING = 0.25  # วินาที - เผื่อไว้ก่อน/หลังช่วงเสียงพูด
+    
+    # เก็บเสียงคำถาม/คำตอบใน archive แบบบีบอัด (data/audio_archive) แทนไฟล์ WAV แยกทีละไฟล์
+    # ปิดไว้ก่อน: เมื่อเปิด คำตอบจะไม่ถูกเขียนเป็น answer_N.wav และ path ที่คืนจะเป็น archive:...
+    ARCHIVE = os.getenv("AUDIO_ARCHIVE", "false").lower() == "true"
+    ARCHIVE_FORMAT = os.getenv("AUDIO_ARCHIVE_FORMAT", "FLAC")  # FLAC (lossless) หรือ OPUS
+    ARCHIVE_SEGMENT_MB = 64  # ขึ้น segment ใหม่เมื่อไฟล์ปัจจุบันใหญ่เกินนี้
+    
     @classmethod
     def to_dict(cls) -> Dict:
         return {
@@ -114,6 +141,11 @@ class AudioConfig:
             "silence_duration": cls.SILENCE_DURATION,
             "min_recording_duration": cls.MIN_RECORDING_DURATION,
             "max_recording_duration": cls.MAX_RECORDING_DURATION,
+            "vad_hangover": cls.VAD_HANGOVER,
+            "persistent_stream": cls.PERSISTENT_STREAM,
+            "pre_roll": cls.PRE_ROLL,
+            "trim_silence": cls.TRIM_SILENCE,
+            "archive": cls.ARCHIVE,
         }
 
 class TTSConfig:
@@ -133,6 +165,50 @@ class TTSConfig:
         "premium": "th-TH-Chirp3-HD-Erinome"
     }
     
+    # บันทึกเสียงคำถามที่พูดลง AUDIO_DIR ด้วย (ปกติเล่นจากหน่วยความจำอย่างเดียว)
+    SAVE_AUDIO = os.getenv("TTS_SAVE_AUDIO", "false").lower() == "true"
+    
+    # ช่วงเงียบคั่นระหว่างคำถามเมื่ออ่านหลายข้อต่อกัน (วินาที)
+    QUESTION_GAP = 0.5
+    
+    # Cache เสียงที่สังเคราะห์แล้ว (memory LRU + DATA_DIR/tts_cache)
+    CACHE = os.getenv("TTS_CACHE", "true").lower() == "true"
+    CACHE_MEMORY_ITEMS = 64
+    CACHE_DISK_MB = 256
+    
+    # สังเคราะห์เสียงคำถามทั้งชุดล่วงหน้าหลังสร้างคำถาม (จำนวนคำขอพร้อมกันสูงสุด)
+    PREFETCH_WORKERS = 4
+    
+    # รวมหลายข้อความใน RPC เดียวด้วย SSML <mark> (ต้องใช้ LINEAR16 และเสียงที่รองรับ SSML)
+    BATCH_SYNTHESIS = os.getenv("TTS_BATCH_SSML", "true").lower() == "true"
+    SSML_MAX_BYTES = 5000  # ขีดจำกัด input ต่อ request ของ Google TTS
+    SSML_MAX_ITEMS = 4  # ข้อความต่อ request สูงสุด - แบ่งเป็นหลายชุดเล็กที่สังเคราะห์พร้อมกันได้
+    BATCH_GAP_MS = 300  # ช่วงเงียบคั่นระหว่างข้อความ (กลายเป็นช่วงเงียบท้ายคลิป)
+    
+    # พูดข้อความยาวแบบ streaming: ตัดเป็นช่วงแล้วสังเคราะห์ล่วงหน้าขณะเล่นช่วงก่อนหน้า
+    STREAM_SEGMENT_MAX_CHARS = 200
+    STREAM_FIRST_SEGMENT_CHARS = 60  # ช่วงแรกสั้น - จำกัดเวลาก่อนได้ยินเสียงแรก
+    STREAM_WORKERS = 2
+    
+    # AsyncGoogleTTS: จำนวนคำขอพร้อมกันสูงสุดต่อ instance
+    ASYNC_CONCURRENCY = 8
+    
+    # ที่เล่นเสียงในหน้าเว็บ: server = pygame บนเครื่อง server, browser = ส่งไฟล์บีบอัดให้ st.audio
+    DELIVERY_MODE = os.getenv("TTS_DELIVERY", "server")
+    BROWSER_ENCODING = os.getenv("TTS_BROWSER_ENCODING", "OGG_OPUS")  # OGG_OPUS หรือ MP3
+    
+    # เวลาสูงสุดที่รอ Google TTS ต่อคำขอ (gRPC deadline) ก่อนถอยไปใช้เสียงในเครื่อง
+    DEADLINE = float(os.getenv("TTS_DEADLINE", "4.0"))  # วินาที (0 = ไม่จำกัด)
+    BATCH_DEADLINE = 15.0  # คำขอ SSML หลายข้อความ (prefetch เบื้องหลัง)
+    LOCAL_FALLBACK = os.getenv("TTS_LOCAL_FALLBACK", "true").lower() == "true"  # pyttsx3
+    LOCAL_VOICE = os.getenv("TTS_LOCAL_VOICE", "")  # ว่าง = เลือกเสียงไทยในเครื่องอัตโนมัติ
+    LOCAL_RATE = 175
+    # Circuit breaker: ล้มเหลว/หมดเวลาติดกันเท่านี้ ข้าม Google TTS ไปจนครบ cooldown
+    BREAKER_FAILURES = 3
+    BREAKER_COOLDOWN = 30.0  # วินาที
+    # endpoint gRPC อื่นแทน Google (เช่น localhost:6020 จาก modules/tts_standin.py) - ว่าง = Google
+    API_ENDPOINT = os.getenv("TTS_API_ENDPOINT", "")
+    
     @classmethod
     def to_dict(cls) -> Dict:
         return {
@@ -143,6 +219,10 @@ class TTSConfig:
             "speaking_rate": cls.SPEAKING_RATE,
             "pitch": cls.PITCH,
             "volume_gain_db": cls.VOLUME_GAIN_DB,
+            "cache": cls.CACHE,
+            "delivery_mode": cls.DELIVERY_MODE,
+            "deadline": cls.DEADLINE,
+            "local_fallback": cls.LOCAL_FALLBACK,
         }
 
 class WhisperConfig:
@@ -152,6 +232,61 @@ class WhisperConfig:
     LANGUAGE = "th"
     TEMPERATURE = 0.0  # ความสม่ำเสมอในผลลัพธ์
     
+    # STT backend: whisper (openai-whisper) หรือ faster-whisper (CTranslate2)
+    BACKEND = os.getenv("STT_BACKEND", "whisper")
+    DEVICE = os.getenv("WHISPER_DEVICE", "auto")  # auto, cpu, cuda
+    COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")  # faster-whisper เท่านั้น
+    CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0 = ใช้ค่า default ของ backend
+    BEAM_SIZE = 5  # faster-whisper เท่านั้น
+    
+    # STT worker: ใช้โมเดลร่วมกันทุก session ผ่าน local socket (modules/stt_worker.py)
+    USE_WORKER = os.getenv("STT_WORKER", "false").lower() == "true"
+    WORKER_HOST = os.getenv("STT_WORKER_HOST", "127.0.0.1")  # ต้องเป็น loopback เท่านั้น
+    WORKER_PORT = int(os.getenv("STT_WORKER_PORT", "6010"))
+    # ว่าง = worker สุ่ม key ใหม่แล้วเขียนลง WORKER_KEY_FILE (อ่านได้เฉพาะเจ้าของ) ให้ client อ่าน
+    WORKER_AUTHKEY = os.getenv("STT_WORKER_AUTHKEY", "")
+    WORKER_KEY_FILE = Path(os.getenv("STT_WORKER_KEY_FILE", str(DATA_DIR / "stt_worker.key")))
+    WORKER_TIMEOUT = 120  # วินาที - เวลารอผลจาก worker สูงสุด
+    
+    # Batched decoding: รวมคำตอบสั้นที่มาพร้อมกันจากหลาย session เป็น batch เดียว
+    BATCHING = os.getenv("STT_BATCHING", "false").lower() == "true"
+    BATCH_MAX_SIZE = 8
+    BATCH_MAX_WAIT = 0.15  # วินาที - latency ที่ยอมเพิ่มเพื่อรอรวม batch
+    BATCH_MAX_DURATION = 30  # วินาที - คลิปที่ยาวกว่านี้ถอดแยก
+    
+    # งบหน่วยความจำรวมของโมเดลที่โหลดค้างไว้ (0 = ไม่จำกัด) - ขนาดที่ไม่ได้ใช้จะถูกปล่อยแบบ LRU
+    MODEL_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "8192"))
+    
+    # Tiered mode: ถอดด้วยโมเดลเล็กก่อน แล้วถอดใหม่ด้วย MODEL_SIZE เฉพาะ segment ที่ไม่มั่นใจ
+    TIERED = os.getenv("STT_TIERED", "false").lower() == "true"
+    FAST_MODEL_SIZE = os.getenv("WHISPER_FAST_MODEL_SIZE", "base")
+    ESCALATE_LOGPROB = -0.7  # avg_logprob ต่ำกว่านี้ถือว่าไม่มั่นใจ
+    ESCALATE_COMPRESSION = 2.4  # compression_ratio สูงกว่านี้ถือว่าข้อความซ้ำวน
+    ESCALATE_NO_SPEECH = 0.6  # no_speech_prob สูงกว่านี้แต่มีข้อความ ถือว่าน่าสงสัย
+    
+    # Parallel decoding: ตัดคำตอบยาวที่จุดหยุดพูดแล้วถอดพร้อมกันใน process pool
+    PARALLEL_WORKERS = int(os.getenv("STT_PARALLEL_WORKERS", "0"))  # 0 = ปิด
+    PARALLEL_MIN_DURATION = 12.0  # วินาที - คลิปสั้นกว่านี้ถอดใน process หลักตามปกติ
+    PARALLEL_MIN_SEGMENT = 4.0  # วินาที - ความยาวขั้นต่ำของแต่ละช่วง
+    PARALLEL_MIN_PAUSE = 0.3  # วินาที - ช่วงเงียบขั้นต่ำที่ตัดได้
+    TORCH_THREADS_PER_WORKER = int(os.getenv("STT_THREADS_PER_WORKER", "0"))  # 0 = แบ่ง core เท่าๆ กัน
+    PARALLEL_IDLE_TIMEOUT = float(os.getenv("STT_PARALLEL_IDLE_TIMEOUT", "300"))  # วินาที - ปิด pool เมื่อว่าง (0 = ไม่ปิด)
+    
+    # Transcription cache: จำผลตาม hash ของเสียง (memory LRU + DATA_DIR/stt_cache)
+    CACHE = os.getenv("STT_CACHE", "true").lower() == "true"
+    CACHE_MEMORY_ITEMS = 128
+    CACHE_DISK_MB = 64
+    
+    # Streaming mode: ถอดเสียงทีละหน้าต่างระหว่างที่ยังอัดอยู่
+    STREAMING = os.getenv("WHISPER_STREAMING", "false").lower() == "true"
+    STREAMING_WINDOW = 8.0  # วินาที - ความยาวหน้าต่างสูงสุดก่อนตัดส่งถอดเสียง
+    STREAMING_MIN_WINDOW = 3.0  # วินาที - ตัดหน้าต่างที่ช่วงเงียบได้เมื่อยาวอย่างน้อยเท่านี้
+    
+    # Short-utterance mode (openai-whisper เท่านั้น): รัน encoder บนหน้าต่างสั้นกว่า 30 วินาที
+    SHORT_UTTERANCE = os.getenv("WHISPER_SHORT_UTTERANCE", "false").lower() == "true"
+    SHORT_UTTERANCE_MAX = 12.0  # วินาที - คลิปที่ยาวกว่านี้ใช้หน้าต่าง 30 วินาทีตามปกติ
+    SHORT_UTTERANCE_BUCKET = 2.0  # วินาที - ปัดความยาวหน้าต่างขึ้นเป็นช่วงละเท่านี้
+    
     MODEL_OPTIONS = {
         "tiny": "เร็วที่สุด แต่แม่นยำน้อย",
         "base": "สมดุลระหว่างความเร็วและความแม่นยำ", 
@@ -160,12 +295,32 @@ class WhisperConfig:
         "large": "แม่นยำที่สุด ใช้เวลานานที่สุด"
     }
     
+    BACKEND_OPTIONS = {
+        "whisper": "openai-whisper (PyTorch) - ค่าเริ่มต้น",
+        "faster-whisper": "CTranslate2 + int8 quantization - เร็วกว่ามากบน CPU"
+    }
+    
     @classmethod
     def to_dict(cls) -> Dict:
         return {
             "model_size": cls.MODEL_SIZE,
+            "backend": cls.BACKEND,
+            "device": cls.DEVICE,
+            "compute_type": cls.COMPUTE_TYPE,
+            "use_worker": cls.USE_WORKER,
+            "batching": cls.BATCHING,
+            "cache": cls.CACHE,
+            "model_memory_budget_mb": cls.MODEL_MEMORY_BUDGET_MB,
+            "tiered": cls.TIERED,
+            "fast_model_size": cls.FAST_MODEL_SIZE,
+            "parallel_workers": cls.PARALLEL_WORKERS,
             "language": cls.LANGUAGE,
             "temperature": cls.TEMPERATURE,
+            "streaming": cls.STREAMING,
+            "streaming_window": cls.STREAMING_WINDOW,
+            "streaming_min_window": cls.STREAMING_MIN_WINDOW,
+            "short_utterance": cls.SHORT_UTTERANCE,
+            "short_utterance_max": cls.SHORT_UTTERANCE_MAX,
         }
 
 class InterviewConfig:
@@ -244,7 +399,7 @@ def print_config_status():
     print("\n� Audio Configuration:")
     print(f"   🎤 Sample Rate: {audio_config.SAMPLE_RATE:,} Hz")
     print(f"   ⏱️  Max Recording: {audio_config.MAX_RECORDING_DURATION} วินาที")
-    print(f"   🔇 Silence Duration: {audio_config.SILENCE_DURATION} วินาที")
+    print(f"   🔇 End-of-speech Hangover: {audio_config.VAD_HANGOVER} วินาที")
     
     # TTS Settings
     print("\n🔊 Text-to-Speech Configuration:")
@@ -255,6 +410,7 @@ def print_config_status():
     # Whisper Settings
     print("\n🧠 Whisper STT Configuration:")
     print(f"   📊 Model Size: {whisper_config.MODEL_SIZE}")
+    print(f"   ⚙️  Backend: {whisper_config.BACKEND}")
     print(f"   💬 Language: {whisper_config.LANGUAGE}")
     
     # Interview Settings
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+🗄️ disk_cache.py - Two-Tier (Memory LRU + Disk) Cache
+======================================================
+ฟีเจอร์หลัก:
+- Memory tier: LRU จำกัดจำนวนรายการ (OrderedDict) - hit ภายในไม่กี่ไมโครวินาที
+- Disk tier: เก็บเป็นไฟล์ต่อ key ใต้โฟลเดอร์ที่กำหนด อยู่รอดข้ามการรีสตาร์ท
+- จำกัดขนาด disk tier ได้ (ลบไฟล์ที่ใช้ล่าสุดนานที่สุดก่อน)
+- Thread-safe ใช้ร่วมกันได้ทุก session
+
+ความสามารถ:
+- LRUCache: cache ในหน่วยความจำ
+- DiskCache: cache เป็นไฟล์ (เขียนแบบ atomic ด้วย os.replace)
+- TieredCache: รวมสองชั้น พร้อม serializer สำหรับชั้น disk
+- hash_key(): สร้าง key จากหลายส่วน (bytes / str / ตัวเลข) ด้วย sha256
+
+การใช้งาน: from modules.disk_cache import TieredCache, hash_key
+======================================================
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+def hash_key(*parts) -> str:
+    """
+    สร้าง key แบบ sha256 จากหลายส่วน (bytes/memoryview ใช้ตรง ส่วนอื่นแปลงเป็น str)
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        else:
+            digest.update(repr(part).encode("utf-8"))
+        # คั่นแต่ละส่วนเพื่อไม่ให้ ("ab", "c") ชนกับ ("a", "bc")
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Cache ในหน่วยความจำ จำกัดจำนวนรายการ (ลบรายการที่ใช้ล่าสุดนานที่สุด)"""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: str, value: Any):
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class DiskCache:
+    """Cache เป็นไฟล์ต่อ key (ใช้ mtime เป็นเวลาใช้งานล่าสุดสำหรับการลบ)"""
+
+    def __init__(self, directory, max_bytes: Optional[int] = None, suffix: str = ".bin"):
+        """
+        Args:
+            directory: โฟลเดอร์เก็บไฟล์ cache
+            max_bytes: ขนาดรวมสูงสุด (None = ไม่จำกัด)
+            suffix: นามสกุลไฟล์
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _files(self):
+        return [p for p in self.directory.glob(f"*{self.suffix}") if p.is_file()]
+
+    @property
+    def size(self) -> int:
+        """ขนาดรวมของไฟล์ cache (bytes)"""
+        with self._lock:
+            if self._size is None:
+                self._size = sum(p.stat().st_size for p in self._files())
+            return self._size
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # บันทึกว่าเพิ่งถูกใช้
+            return data
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        # pid + thread - หลาย process (เช่น Streamlit + STT worker) เขียน cache เดียวกันได้
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            old_size = path.stat().st_size if path.exists() else 0
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ ไม่สามารถเขียน cache: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data) - old_size
+        self._evict()
+
+    def _evict(self):
+        """ลบไฟล์ที่ใช้ล่าสุดนานที่สุดจนขนาดรวมไม่เกิน max_bytes"""
+        if self.max_bytes is None or self.size <= self.max_bytes:
+            return
+        with self._lock:
+            entries = []
+            for path in self._files():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+            self._size = total
+
+    def clear(self):
+        with self._lock:
+            for path in self._files():
+                path.unlink(missing_ok=True)
+            self._size = 0
+
+
+class TieredCache:
+    """Memory LRU ด้านหน้า disk cache - hit จาก disk จะถูกดึงขึ้น memory"""
+
+    def __init__(self, memory_items: int, directory=None, max_bytes: Optional[int] = None,
+                 dumps: Callable[[Any], bytes] = bytes, loads: Callable[[bytes], Any] = bytes,
+                 suffix: str = ".bin"):
+        """
+        Args:
+            memory_items: จำนวนรายการสูงสุดใน memory tier
+            directory: โฟลเดอร์ disk tier (None = ใช้เฉพาะ memory)
+            max_bytes: ขนาดสูงสุดของ disk tier
+            dumps / loads: แปลงค่าเป็น bytes และกลับสำหรับ disk tier
+            suffix: นามสกุลไฟล์ของ disk tier
+        """
+        self.memory = LRUCache(memory_items)
+        self.disk = DiskCache(directory, max_bytes, suffix) if directory is not None else None
+        self._dumps = dumps
+        self._loads = loads
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None:
+                try:
+                    value = self._loads(data)
+                except Exception:
+                    value = None
+                if value is not None:
+                    self.memory.put(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, self._dumps(value))
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_items": len(self.memory),
+            "disk_bytes": self.disk.size if self.disk is not None else 0,
+        }
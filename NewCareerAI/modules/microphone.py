@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+🎙️ microphone.py - Persistent Microphone Session with Pre-roll
+===============================================================
+ฟีเจอร์หลัก:
+- เปิด sd.InputStream ครั้งเดียวค้างไว้ตลอดการสัมภาษณ์
+- เก็บเสียงช่วงสั้นๆ ก่อนเริ่มอัด (pre-roll) ต่อเนื่องตลอดเวลา
+- ส่งเสียงคำตอบพร้อม pre-roll ให้ recorder โดยไม่ต้องเปิดอุปกรณ์ใหม่
+- ใช้ร่วมกันได้หลาย session (st.cache_resource) - capture ที่ซ้อนกันได้ buffer ของตัวเองคนละตัว
+- ค้นหารายการอุปกรณ์เสียงครั้งเดียวแล้วเก็บไว้ใช้ซ้ำ
+
+ความสามารถ:
+- MicrophoneSession.open() / close() หรือใช้เป็น context manager
+- MicrophoneSession.capture(buffer): ส่งเสียงเข้า AudioRingBuffer ระหว่างอัด (หลาย buffer พร้อมกันได้)
+- input_devices() / default_input_name(): ข้อมูลอุปกรณ์ (cache แล้ว)
+
+การใช้งาน:
+  with MicrophoneSession() as mic:
+      stt = WhisperSTT(mic_session=mic)
+===============================================================
+"""
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+import sounddevice as sd
+
+try:
+    from .config import audio_config
+    from .audio_buffer import AudioRingBuffer
+except ImportError:
+    from config import audio_config
+    from audio_buffer import AudioRingBuffer
+
+
+class MicrophoneSession:
+    """Input stream ที่เปิดค้างไว้ พร้อม pre-roll buffer"""
+
+    def __init__(self, sample_rate: Optional[int] = None, blocksize: Optional[int] = None,
+                 pre_roll: Optional[float] = None, device: Optional[int] = None):
+        """
+        Args:
+            sample_rate: sample rate ของการอัด
+            blocksize: ขนาด block ต่อ callback
+            pre_roll: ความยาวเสียงก่อนเริ่มอัดที่เก็บไว้ (วินาที)
+            device: index ของอุปกรณ์ input (None = default)
+        """
+        self.sample_rate = sample_rate or audio_config.SAMPLE_RATE
+        self.blocksize = blocksize or audio_config.CHUNK_SIZE
+        self.pre_roll_seconds = audio_config.PRE_ROLL if pre_roll is None else pre_roll
+        self.device = device
+        self.pre_roll = AudioRingBuffer(max(1, int(self.pre_roll_seconds * self.sample_rate)))
+        self._stream = None
+        self._targets: List[AudioRingBuffer] = []  # หนึ่ง buffer ต่อ capture ที่กำลังอัด
+        self._lock = threading.Lock()
+        self._devices: Optional[List[Tuple[int, str]]] = None
+        self._default_input: Optional[str] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._stream is not None
+
+    def open(self):
+        """เปิด input stream (ถ้ายังไม่เปิด)"""
+        if self._stream is None:
+            stream = sd.InputStream(samplerate=self.sample_rate, channels=1, dtype="float32",
+                                    blocksize=self.blocksize, device=self.device,
+                                    callback=self._callback)
+            stream.start()
+            self._stream = stream
+            print(f"🎙️  เปิดไมโครโฟนค้างไว้ (pre-roll {self.pre_roll_seconds:.1f}s)")
+        return self
+
+    def close(self):
+        """ปิด input stream"""
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            print(f"⚠️ Audio callback status: {status}")
+        samples = indata[:, 0]
+        with self._lock:
+            self.pre_roll.write(samples)
+            for target in self._targets:
+                target.write(samples)
+
+    @contextmanager
+    def capture(self, buffer: AudioRingBuffer, include_pre_roll: bool = True):
+        """
+        ส่งเสียงจาก stream เข้า buffer ระหว่างอยู่ใน block นี้
+
+        หลาย session อัดพร้อมกันได้ - แต่ละ capture ได้สำเนาเสียงของตัวเองใน buffer ของตน
+
+        Args:
+            buffer: buffer ปลายทาง (จะถูก reset ก่อนเริ่ม)
+            include_pre_roll: ใส่เสียงช่วงก่อนเริ่มอัดไว้ต้น buffer
+        """
+        self.open()
+        with self._lock:
+            buffer.reset()
+            if include_pre_roll:
+                buffer.write(self.pre_roll.clip())
+            self._targets.append(buffer)
+        try:
+            yield buffer
+        finally:
+            with self._lock:
+                self._targets.remove(buffer)
+
+    def input_devices(self) -> List[Tuple[int, str]]:
+        """รายการอุปกรณ์ input (index, name) - ค้นหาครั้งแรกครั้งเดียว"""
+        if self._devices is None:
+            devices = sd.query_devices()
+            self._devices = [(i, d["name"]) for i, d in enumerate(devices)
+                             if d["max_input_channels"] > 0]
+            default_index = sd.default.device[0] if sd.default.device[0] else 0
+            self._default_input = devices[default_index]["name"]
+        return self._devices
+
+    def default_input_name(self) -> Optional[str]:
+        """ชื่อไมโครโฟนหลัก"""
+        self.input_devices()
+        return self._default_input
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+🗃️ model_manager.py - Memory-Bounded STT Model Registry
+========================================================
+ฟีเจอร์หลัก:
+- เก็บโมเดลที่โหลดแล้วภายใต้งบหน่วยความจำที่กำหนด (MODEL_MEMORY_BUDGET_MB)
+- นับการใช้งาน (reference count) - โมเดลที่กำลังถอดเสียงอยู่จะไม่ถูกปล่อย
+- ปล่อยขนาดที่ใช้ล่าสุดนานที่สุดก่อน (LRU) เมื่อโหลดขนาดใหม่แล้วเกินงบ
+- โหลดใน background และไม่โหลดซ้ำถ้ามีคนรอขนาดเดียวกันอยู่แล้ว
+
+ความสามารถ:
+- ModelManager.load_async(): Future ของ engine (คืนทันทีถ้าโหลดอยู่แล้ว)
+- ModelManager.lease(): context manager ที่ยึดโมเดลไว้ระหว่างใช้งาน
+- ModelManager.peek(): Future ของโมเดลที่อยู่ในทะเบียน โดยไม่โหลดและไม่ขยับลำดับ LRU
+- ModelManager.reserve() / release(): นับหน่วยความจำนอก process (เช่น process pool) เข้างบเดียวกัน
+- ModelManager.resident_bytes() / stats(): หน่วยความจำที่โมเดลใช้อยู่ตอนนี้
+
+การใช้งาน:
+  manager = ModelManager(loader)
+  with manager.lease("whisper", "small") as engine:
+      engine.transcribe(audio)
+========================================================
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    from .config import whisper_config
+    from .stt_engines import STTEngine, estimate_model_bytes
+except ImportError:
+    from config import whisper_config
+    from stt_engines import STTEngine, estimate_model_bytes
+
+
+ModelKey = Tuple[str, str]  # (backend, model_size)
+
+MB = 1024 * 1024
+
+
+class _Entry:
+    """โมเดลหนึ่งตัวในทะเบียน"""
+
+    def __init__(self, future: Future, estimate: int):
+        self.future = future
+        self.bytes = estimate
+        self.refs = 0
+
+    @property
+    def engine(self) -> Optional[STTEngine]:
+        if not self.future.done():
+            return None
+        return self.future.result()
+
+
+class ModelManager:
+    """ทะเบียนโมเดลที่จำกัดหน่วยความจำรวม และปล่อยโมเดลแบบ LRU"""
+
+    def __init__(self, loader: Callable[[str, str], Optional[STTEngine]],
+                 budget_bytes: Optional[int] = None):
+        """
+        Args:
+            loader: ฟังก์ชัน (backend, model_size) -> engine ที่โหลดแล้ว หรือ None หากล้มเหลว
+            budget_bytes: งบหน่วยความจำรวม (default ตาม whisper_config.MODEL_MEMORY_BUDGET_MB)
+        """
+        self._loader = loader
+        if budget_bytes is None:
+            budget_bytes = whisper_config.MODEL_MEMORY_BUDGET_MB * MB
+        self.budget_bytes = budget_bytes
+        self._entries: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def load_async(self, backend: str, model_size: str) -> Future:
+        """
+        เริ่มโหลดโมเดลใน background (หรือใช้ตัวที่โหลด/กำลังโหลดอยู่)
+
+        Returns:
+            Future ของ engine (None หากโหลดไม่สำเร็จ)
+        """
+        key = (backend, model_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry.future
+
+            estimate = estimate_model_bytes(backend, model_size)
+            self._evict(estimate, exclude=key)
+            entry = _Entry(Future(), estimate)
+            self._entries[key] = entry
+
+        threading.Thread(target=self._load, args=(key, entry),
+                         name="whisper-loader", daemon=True).start()
+        return entry.future
+
+    def peek(self, backend: str, model_size: str) -> Optional[Future]:
+        """Future ของโมเดลที่โหลดแล้ว/กำลังโหลด (None = ไม่อยู่ในหน่วยความจำ) - ใช้ตรวจสถานะเท่านั้น"""
+        with self._lock:
+            entry = self._entries.get((backend, model_size))
+            return entry.future if entry is not None else None
+
+    def get(self, backend: str, model_size: str) -> Optional[STTEngine]:
+        """โหลดโมเดล (block จนกว่าจะโหลดเสร็จ)"""
+        return self.load_async(backend, model_size).result()
+
+    @contextmanager
+    def lease(self, backend: str, model_size: str):
+        """ยึดโมเดลไว้ระหว่างใช้งาน (จะไม่ถูกปล่อยจนกว่าจะออกจาก block)"""
+        key = (backend, model_size)
+        while True:
+            future = self.load_async(backend, model_size)
+            engine = future.result()
+            with self._lock:
+                entry = self._entries.get(key)
+                # ถูกปล่อยไประหว่างรอ - โหลดใหม่
+                if engine is not None and (entry is None or entry.future is not future):
+                    continue
+                if entry is not None:
+                    entry.refs += 1
+                break
+        try:
+            yield engine
+        finally:
+            if entry is not None:
+                with self._lock:
+                    entry.refs -= 1
+
+    def reserve(self, name: str, nbytes: int):
+        """
+        จองงบหน่วยความจำให้โมเดลที่อยู่นอกทะเบียน (เช่นโมเดลใน worker process)
+        โมเดลที่ไม่มีคนใช้จะถูกปล่อย (LRU) เพื่อให้พอดีงบ - การจองไม่ถูกปล่อยจนกว่าจะ release()
+        """
+        key = ("reserved", name)
+        future = Future()
+        future.set_result(None)  # engine เป็น None - _evict ข้ามเสมอ
+        with self._lock:
+            self._entries.pop(key, None)
+            self._evict(nbytes, exclude=key)
+            self._entries[key] = _Entry(future, nbytes)
+
+    def release(self, name: str):
+        """คืนงบที่จองด้วย reserve()"""
+        with self._lock:
+            self._entries.pop(("reserved", name), None)
+
+    def _load(self, key: ModelKey, entry: _Entry):
+        try:
+            engine = self._loader(*key)
+        except Exception as e:
+            print(f"❌ ไม่สามารถโหลดโมเดล Whisper: {e}")
+            engine = None
+
+        with self._lock:
+            if engine is None:
+                # ไม่เก็บความล้มเหลวไว้ - เรียกครั้งหน้าจะลองโหลดใหม่
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            else:
+                entry.bytes = engine.memory_bytes()
+                self._evict(0, exclude=key)
+        entry.future.set_result(engine)
+        if engine is not None:
+            print(f"🗃️  โมเดลในหน่วยความจำ: {self.resident_bytes() / MB:.0f}/"
+                  f"{self.budget_bytes / MB:.0f} MB")
+
+    def _evict(self, incoming: int, exclude: ModelKey):
+        """ปล่อยโมเดลที่ไม่มีคนใช้ (LRU ก่อน) จนรวมกับ incoming แล้วไม่เกินงบ (ต้องถือ lock)"""
+        if self.budget_bytes <= 0:
+            return
+        for key in list(self._entries):
+            if self._resident() + incoming <= self.budget_bytes:
+                return
+            entry = self._entries[key]
+            if key == exclude or entry.refs > 0 or entry.engine is None:
+                continue
+            del self._entries[key]
+            entry.engine.unload()
+            self.evictions += 1
+            print(f"♻️  ปล่อยโมเดล {key[1]} ({key[0]}) ออกจากหน่วยความจำ")
+
+        if self._resident() + incoming > self.budget_bytes:
+            print("⚠️ โมเดลที่ใช้งานอยู่เกินงบหน่วยความจำ (MODEL_MEMORY_BUDGET_MB)")
+
+    def _resident(self) -> int:
+        # นับรวมตัวที่กำลังโหลด (ใช้ค่าประเมิน) เพื่อไม่ให้โหลดพร้อมกันจนเกินงบ
+        return sum(entry.bytes for entry in self._entries.values())
+
+    def resident_bytes(self) -> int:
+        """หน่วยความจำรวมของโมเดลที่โหลดอยู่ (รวมที่กำลังโหลด)"""
+        with self._lock:
+            return self._resident()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "budget_mb": self.budget_bytes / MB,
+                "resident_mb": self._resident() / MB,
+                "evictions": self.evictions,
+                "models": [
+                    {"backend": key[0], "model_size": key[1], "mb": entry.bytes / MB,
+                     "refs": entry.refs, "loaded": entry.engine is not None}
+                    for key, entry in self._entries.items()
+                ],
+            }
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+📦 model_store.py - Memory-Mapped Whisper Weights (safetensors)
+================================================================
+ฟีเจอร์หลัก:
+- แปลง checkpoint ของ Whisper เป็น safetensors + dims JSON ใน MODEL_DIR (ทำครั้งเดียว offline)
+- โหลดโมเดลโดย map ไฟล์เข้าหน่วยความจำ (mmap) แทนการ deserialize ทั้ง checkpoint
+- สร้างโมเดลบน meta device แล้วผูก tensor จากไฟล์เข้าไปตรงๆ (load_state_dict assign=True)
+- ทุก process ที่โหลดโมเดลเดียวกันใช้ page cache ของ OS ร่วมกัน
+
+ความสามารถ:
+- convert_model(): แปลงโมเดลตามขนาด (ต้องมี openai-whisper + safetensors)
+- is_converted() / load_converted(): ใช้โดย WhisperEngine อัตโนมัติเมื่อมีไฟล์
+- อ่านไฟล์ safetensors เองด้วย torch.frombuffer (ไม่ต้องติดตั้ง safetensors ตอนโหลด)
+
+การใช้งาน:
+  python modules/model_store.py small large
+  (หลังจากนั้น WhisperEngine จะโหลดจาก MODEL_DIR ให้เอง)
+================================================================
+"""
+import argparse
+import json
+import mmap
+import struct
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    from .config import MODEL_DIR
+except ImportError:
+    from config import MODEL_DIR
+
+
+# ชนิดข้อมูลใน header ของ safetensors -> ชื่อ dtype ของ torch
+_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+
+def model_paths(model_size: str, model_dir=None) -> Tuple[Path, Path]:
+    """path ของไฟล์น้ำหนัก (.safetensors) และ dims (.json) ของโมเดลขนาดนี้"""
+    model_dir = Path(model_dir or MODEL_DIR)
+    return (model_dir / f"whisper-{model_size}.safetensors",
+            model_dir / f"whisper-{model_size}.json")
+
+
+def is_converted(model_size: str, model_dir=None) -> bool:
+    weights_path, dims_path = model_paths(model_size, model_dir)
+    return weights_path.exists() and dims_path.exists()
+
+
+def convert_model(model_size: str, model_dir=None) -> Path:
+    """
+    แปลงโมเดล Whisper เป็น safetensors (ดาวน์โหลด checkpoint ถ้ายังไม่มี)
+
+    Returns:
+        path ของไฟล์ safetensors
+    """
+    import whisper
+    from safetensors.torch import save_file
+
+    weights_path, dims_path = model_paths(model_size, model_dir)
+    weights_path.parent.mkdir(parents=True, exist_ok=True)
+
+    model = whisper.load_model(model_size, device="cpu")
+    state = {name: tensor.contiguous() for name, tensor in model.state_dict().items()}
+    save_file(state, str(weights_path), metadata={"model_size": model_size})
+
+    alignment_heads = getattr(whisper, "_ALIGNMENT_HEADS", {}).get(model_size)
+    info = {
+        "model_size": model_size,
+        "dims": asdict(model.dims),
+        "alignment_heads": alignment_heads.decode("ascii") if alignment_heads else None,
+    }
+    dims_path.write_text(json.dumps(info, indent=2), encoding="utf-8")
+    return weights_path
+
+
+def map_safetensors(path) -> Dict:
+    """
+    map ไฟล์ safetensors เป็น tensor ที่อ้างอิงหน้าหน่วยความจำของไฟล์โดยตรง (ไม่ copy)
+
+    ใช้ mmap แบบ copy-on-write: หน้าที่ไม่ถูกแก้ไขใช้ page cache ร่วมกันทุก process
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        header_len = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_len))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_len
+    tensors = {}
+    for name, meta in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _DTYPES[meta["dtype"]])
+        shape = meta["shape"]
+        begin, end = meta["data_offsets"]
+        if end == begin:
+            tensors[name] = torch.empty(shape, dtype=dtype)
+            continue
+        count = (end - begin) // torch.empty(0, dtype=dtype).element_size()
+        tensors[name] = torch.frombuffer(buffer, dtype=dtype, count=count,
+                                         offset=data_start + begin).reshape(shape)
+    return tensors
+
+
+def load_converted(model_size: str, device: Optional[str] = None, model_dir=None):
+    """
+    โหลดโมเดล Whisper จากไฟล์ที่แปลงไว้ (แทน whisper.load_model)
+
+    Args:
+        model_size: ขนาดโมเดล
+        device: cpu / cuda (None = cuda ถ้ามี)
+        model_dir: โฟลเดอร์ของไฟล์ (default MODEL_DIR)
+    """
+    import torch
+    from whisper.model import ModelDimensions, Whisper
+
+    weights_path, dims_path = model_paths(model_size, model_dir)
+    info = json.loads(dims_path.read_text(encoding="utf-8"))
+    dims = ModelDimensions(**info["dims"])
+
+    # สร้างโครงโมเดลบน meta device (ไม่จองหน่วยความจำ/ไม่สุ่มค่าเริ่มต้น)
+    with torch.device("meta"):
+        model = Whisper(dims)
+    model.load_state_dict(map_safetensors(weights_path), assign=True)
+    _rebuild_buffers(model, dims, info.get("alignment_heads"))
+
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    return model.to(device) if device != "cpu" else model
+
+
+def _rebuild_buffers(model, dims, alignment_heads: Optional[str]):
+    """สร้าง buffer ที่ไม่ได้อยู่ใน state_dict (persistent=False) ใหม่บน CPU"""
+    import torch
+
+    n_ctx = dims.n_text_ctx
+    model.decoder.register_buffer(
+        "mask", torch.empty(n_ctx, n_ctx).fill_(-float("inf")).triu_(1), persistent=False)
+
+    # ค่า default เดียวกับ Whisper.__init__: ใช้ครึ่งหลังของ decoder layer
+    all_heads = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+    all_heads[dims.n_text_layer // 2:] = True
+    model.register_buffer("alignment_heads", all_heads.to_sparse(), persistent=False)
+    if alignment_heads:
+        model.set_alignment_heads(alignment_heads.encode("ascii"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="แปลงโมเดล Whisper เป็น safetensors สำหรับโหลดแบบ mmap")
+    parser.add_argument("sizes", nargs="+", help="ขนาดโมเดลที่จะแปลง เช่น small large")
+    parser.add_argument("--model-dir", default=str(MODEL_DIR), help="โฟลเดอร์ปลายทาง")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"📦 กำลังแปลงโมเดล {size}...")
+        try:
+            path = convert_model(size, args.model_dir)
+        except Exception as e:
+            print(f"❌ แปลงโมเดล {size} ไม่สำเร็จ: {e}")
+            continue
+        print(f"✅ บันทึกที่ {path} ({path.stat().st_size / 1024 / 1024:.0f} MB)")
+
+        start_time = time.time()
+        load_converted(size, "cpu", args.model_dir)
+        print(f"⚡ ทดสอบโหลดแบบ mmap: {time.time() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
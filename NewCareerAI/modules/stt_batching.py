@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+📦 stt_batching.py - Cross-Session Batched Transcription Scheduler
+===================================================================
+ฟีเจอร์หลัก:
+- รวมคำตอบสั้นๆ ที่รอถอดเสียงพร้อมกันจากหลาย session เป็น batch เดียว
+- รัน encoder/decoder ครั้งเดียวต่อ batch เพื่อเพิ่ม throughput บน CPU หลายคอร์
+- จำกัด latency ที่เพิ่มขึ้นไม่เกิน max_wait ที่ตั้งไว้
+
+ความสามารถ:
+- BatchScheduler: รับงานแล้วคืน Future, ส่งผลกลับให้ผู้เรียกแต่ละราย
+- รอรวม batch ไม่เกิน BATCH_MAX_WAIT นับจากงานแรกใน batch
+- งานที่ยาวเกิน BATCH_MAX_DURATION หรือมี initial_prompt ถอดแยกทีละงาน
+- get_scheduler(): scheduler ที่ใช้ร่วมกันต่อ engine (ผูกไว้กับ engine, หยุดเมื่อ engine.unload())
+
+การใช้งาน:
+  scheduler = get_scheduler(engine)
+  future = scheduler.submit(audio)
+  result = future.result()
+===================================================================
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+try:
+    from .config import whisper_config, audio_config
+except ImportError:
+    from config import whisper_config, audio_config
+
+
+RATE = audio_config.SAMPLE_RATE
+
+
+class BatchScheduler:
+    """รวมงานถอดเสียงที่มาใกล้กันเป็น batch แล้วส่งผลกลับแยกตามผู้เรียก"""
+
+    def __init__(self, engine, max_batch: Optional[int] = None, max_wait: Optional[float] = None,
+                 max_duration: Optional[float] = None):
+        """
+        Args:
+            engine: STTEngine ที่โหลดแล้ว
+            max_batch: จำนวนงานสูงสุดต่อ batch
+            max_wait: เวลารอรวม batch สูงสุด (วินาที) นับจากงานแรก
+            max_duration: ความยาวเสียงสูงสุดที่รวม batch ได้ (วินาที)
+        """
+        self.engine = engine
+        self.max_batch = max_batch or whisper_config.BATCH_MAX_SIZE
+        self.max_wait = whisper_config.BATCH_MAX_WAIT if max_wait is None else max_wait
+        self.max_samples = int((max_duration or whisper_config.BATCH_MAX_DURATION) * RATE)
+        self.batches_run = 0
+        self.requests_batched = 0
+        self._requests = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, audio, language: Optional[str] = None, temperature: Optional[float] = None,
+               initial_prompt: Optional[str] = None) -> Future:
+        """
+        ส่งงานถอดเสียงเข้าคิว
+
+        Returns:
+            Future ที่ให้ result dict ของงานนี้
+        """
+        future = Future()
+        options = {"language": language, "temperature": temperature, "initial_prompt": initial_prompt}
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("BatchScheduler ถูกปิดแล้ว")
+            self._requests.put((audio, options, future))
+        return future
+
+    def close(self):
+        """หยุด thread ของ scheduler (งานที่ค้างในคิวจะได้ RuntimeError)"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(None)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _batchable(self, audio, options: Dict) -> bool:
+        return (not isinstance(audio, str) and len(audio) <= self.max_samples
+                and options["initial_prompt"] is None)
+
+    def _run(self):
+        while True:
+            first = self._requests.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+
+            # รวมงานที่มาถึงภายใน max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._requests.put(None)
+                    break
+                batch.append(request)
+
+            self._dispatch(batch)
+
+        # engine ถูก unload แล้ว - งานที่ยังค้างอยู่ถอดต่อไม่ได้
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and request[2].set_running_or_notify_cancel():
+                request[2].set_exception(RuntimeError("BatchScheduler ถูกปิดแล้ว"))
+
+    def _dispatch(self, batch: List):
+        # แยกงานที่ batch ได้ตาม decode options เดียวกัน ส่วนที่เหลือถอดทีละงาน
+        groups: Dict[tuple, List] = {}
+        singles = []
+        for audio, options, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            if self._batchable(audio, options):
+                groups.setdefault((options["language"], options["temperature"]), []).append((audio, future))
+            else:
+                singles.append((audio, options, future))
+
+        for (language, temperature), items in groups.items():
+            if len(items) == 1:
+                audio, future = items[0]
+                singles.append((audio, {"language": language, "temperature": temperature,
+                                        "initial_prompt": None}, future))
+                continue
+            try:
+                results = self.engine.transcribe_batch([audio for audio, _ in items],
+                                                       language=language, temperature=temperature)
+                self.batches_run += 1
+                self.requests_batched += len(items)
+                for (_, future), result in zip(items, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+
+        for audio, options, future in singles:
+            try:
+                future.set_result(self.engine.transcribe(audio, **options))
+            except Exception as e:
+                future.set_exception(e)
+
+
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(engine) -> BatchScheduler:
+    """
+    scheduler ที่ใช้ร่วมกันสำหรับ engine ตัวนี้ (หนึ่งตัวต่อ engine)
+
+    scheduler ผูกไว้ที่ engine._scheduler จึงถูกเก็บกวาดไปพร้อม engine
+    และ STTEngine.unload() จะ close() ให้เพื่อหยุด thread
+    """
+    with _schedulers_lock:
+        scheduler = getattr(engine, "_scheduler", None)
+        if scheduler is None or scheduler.closed:
+            scheduler = BatchScheduler(engine)
+            engine._scheduler = scheduler
+        return scheduler
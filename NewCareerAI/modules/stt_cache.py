@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+🧾 stt_cache.py - Content-Hash Transcription Cache
+===================================================
+ฟีเจอร์หลัก:
+- จำผลถอดเสียงตาม hash ของ PCM samples (ไม่ใช่ชื่อไฟล์)
+- key รวม backend, ขนาดโมเดล, ภาษา และ decode options
+- Memory LRU + disk tier ใต้ DATA_DIR/stt_cache (อยู่รอดข้ามการรีสตาร์ท)
+
+ความสามารถ:
+- Streamlit rerun / อัดซ้ำ / เปิด answer_N.wav เดิมทำรายงานใหม่ ได้ผลทันที
+- TranscriptionCache.key(): สร้าง key จากเสียง float32 mono 16 kHz
+- TranscriptionCache.get() / put(): เก็บ result dict รูปแบบเดียวกับ STTEngine
+
+การใช้งาน: from modules.stt_cache import TranscriptionCache
+===================================================
+"""
+import json
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    from .config import whisper_config, DATA_DIR
+    from .disk_cache import TieredCache, hash_key
+except ImportError:
+    from config import whisper_config, DATA_DIR
+    from disk_cache import TieredCache, hash_key
+
+
+def _dumps(result: Dict) -> bytes:
+    return json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data: bytes) -> Dict:
+    return json.loads(data.decode("utf-8"))
+
+
+class TranscriptionCache:
+    """Cache ผลถอดเสียงตามเนื้อหาเสียง"""
+
+    def __init__(self, memory_items: Optional[int] = None, directory=None,
+                 max_bytes: Optional[int] = None):
+        """
+        Args:
+            memory_items: จำนวนผลที่เก็บในหน่วยความจำ
+            directory: โฟลเดอร์ disk tier (default DATA_DIR/stt_cache)
+            max_bytes: ขนาดสูงสุดของ disk tier
+        """
+        memory_items = whisper_config.CACHE_MEMORY_ITEMS if memory_items is None else memory_items
+        directory = directory or DATA_DIR / "stt_cache"
+        max_bytes = whisper_config.CACHE_DISK_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self._cache = TieredCache(memory_items, directory, max_bytes,
+                                  dumps=_dumps, loads=_loads, suffix=".json")
+
+    @staticmethod
+    def key(audio: np.ndarray, backend: str, model_size: str,
+            language: Optional[str] = None, **options) -> str:
+        """
+        สร้าง key จาก PCM samples และการตั้งค่าที่มีผลต่อผลลัพธ์
+
+        Args:
+            audio: เสียง float32 mono 16 kHz (หลังตัดช่วงเงียบ)
+            backend / model_size / language: ตัวถอดเสียงที่ใช้
+            options: decode options อื่นๆ (เช่น temperature, short_utterance)
+        """
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        return hash_key(
+            memoryview(audio).cast("B"),
+            backend,
+            model_size,
+            language or whisper_config.LANGUAGE,
+            sorted(options.items()),
+        )
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._cache.get(key)
+
+    def put(self, key: str, result: Dict):
+        self._cache.put(key, result)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict:
+        return self._cache.stats()
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+🧩 stt_engines.py - Pluggable Speech-to-Text Engine Registry
+=============================================================
+ฟีเจอร์หลัก:
+- Registry ของ STT backend ที่เลือกได้จาก config (WhisperConfig.BACKEND)
+- openai-whisper backend (PyTorch) แบบเดิม - โหลดแบบ mmap เมื่อแปลงโมเดลไว้แล้ว
+- faster-whisper backend (CTranslate2, int8 quantized) สำหรับเครื่อง CPU
+- Short-utterance mode: คลิปสั้นรัน encoder บนหน้าต่างสั้นกว่า 30 วินาที
+- ผลลัพธ์รูปแบบเดียวกันทุก backend
+
+ความสามารถ:
+- STTEngine: base class ที่ทุก backend ต้อง implement (load, transcribe)
+- register_engine(): decorator สำหรับเพิ่ม backend ใหม่
+- create_engine(): สร้าง engine ตามชื่อ backend และขนาดโมเดล
+- to_whisper_audio() / load_audio_file(): เตรียมเสียง float32 mono 16 kHz
+- estimate_model_bytes() / STTEngine.memory_bytes(): ขนาดหน่วยความจำของโมเดล
+
+รูปแบบผลลัพธ์ (dict):
+- text: ข้อความทั้งหมด
+- segments: [{id, start, end, text, avg_logprob, no_speech_prob, compression_ratio}]
+- language, backend, model_size
+
+การใช้งาน: from modules.stt_engines import create_engine
+=============================================================
+"""
+import gc
+import sys
+import time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from scipy.io.wavfile import read
+from scipy.signal import resample_poly
+
+try:
+    from .config import whisper_config, audio_config
+    from .vad import to_float_audio
+    from .model_store import is_converted, load_converted
+except ImportError:
+    from config import whisper_config, audio_config
+    from vad import to_float_audio
+    from model_store import is_converted, load_converted
+
+
+RATE = audio_config.SAMPLE_RATE
+
+# ทะเบียน backend: ชื่อ -> class
+_ENGINES: Dict[str, type] = {}
+
+# จำนวนพารามิเตอร์โดยประมาณของแต่ละขนาดโมเดล (ใช้ประเมินหน่วยความจำก่อนโหลด)
+MODEL_PARAMS = {
+    "tiny": 39e6,
+    "base": 74e6,
+    "small": 244e6,
+    "medium": 769e6,
+    "large": 1550e6,
+    "turbo": 809e6,
+}
+
+# bytes ต่อพารามิเตอร์ตาม compute type ของ faster-whisper
+COMPUTE_TYPE_BYTES = {"int8": 1, "int8_float16": 1, "int8_float32": 1, "float16": 2, "float32": 4}
+
+
+def register_engine(name: str):
+    """Decorator สำหรับลงทะเบียน STT backend"""
+    def decorator(cls):
+        cls.name = name
+        _ENGINES[name] = cls
+        return cls
+    return decorator
+
+
+def available_engines() -> List[str]:
+    """รายชื่อ backend ที่ลงทะเบียนไว้"""
+    return list(_ENGINES.keys())
+
+
+def create_engine(backend: Optional[str] = None, model_size: Optional[str] = None) -> "STTEngine":
+    """
+    สร้าง engine ตามชื่อ backend (ยังไม่โหลดโมเดล)
+
+    Args:
+        backend: ชื่อ backend (default ตาม whisper_config.BACKEND)
+        model_size: ขนาดโมเดล (default ตาม whisper_config.MODEL_SIZE)
+    """
+    backend = backend or whisper_config.BACKEND
+    if backend not in _ENGINES:
+        raise ValueError(f"ไม่รู้จัก STT backend: {backend} (มี: {', '.join(available_engines())})")
+    return _ENGINES[backend](model_size or whisper_config.MODEL_SIZE)
+
+
+def estimate_model_bytes(backend: Optional[str], model_size: str) -> int:
+    """ประเมินหน่วยความจำที่โมเดลจะใช้หลังโหลด (bytes)"""
+    name = model_size.replace(".en", "")
+    params = MODEL_PARAMS.get(name)
+    if params is None:
+        # เช่น large-v2, large-v3, large-v3-turbo (turbo ต้องตรวจก่อน large)
+        params = next((p for key, p in reversed(MODEL_PARAMS.items()) if key in name),
+                      MODEL_PARAMS["large"])
+    if (backend or whisper_config.BACKEND) == "faster-whisper":
+        return int(params * COMPUTE_TYPE_BYTES.get(whisper_config.COMPUTE_TYPE, 4))
+    return int(params * 4)
+
+
+def to_whisper_audio(audio: np.ndarray, sample_rate: int = RATE) -> np.ndarray:
+    """
+    แปลง buffer เสียงให้อยู่ในรูปที่ Whisper รับตรงได้: float32 mono 16 kHz
+    (ไม่ copy ถ้า audio อยู่ในรูปนั้นอยู่แล้ว)
+    """
+    audio = to_float_audio(audio)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sample_rate != RATE:
+        audio = resample_poly(audio, RATE, sample_rate).astype(np.float32)
+    return audio
+
+
+def load_audio_file(filename: str) -> np.ndarray:
+    """อ่านไฟล์ WAV เป็น float32 mono 16 kHz"""
+    sample_rate, audio = read(str(filename))
+    return to_whisper_audio(audio, sample_rate)
+
+
+def short_window_samples(n_samples: int, max_samples: int, bucket: Optional[float] = None) -> int:
+    """
+    ความยาวหน้าต่าง encoder (samples) ของคลิปสั้น: ปัดขึ้นเป็นช่วงละ bucket วินาที
+    แต่ไม่เกิน max_samples (หน้าต่างเต็ม 30 วินาทีของ Whisper)
+    """
+    bucket = int((whisper_config.SHORT_UTTERANCE_BUCKET if bucket is None else bucket) * RATE)
+    return min(max(bucket, -(-n_samples // bucket) * bucket), max_samples)
+
+
+def make_result(text: str, segments: List[Dict], language: Optional[str],
+                backend: str, model_size: str) -> Dict:
+    """สร้าง result dict รูปแบบกลางที่ทุก backend คืนค่า"""
+    return {
+        "text": text.strip(),
+        "segments": segments,
+        "language": language,
+        "backend": backend,
+        "model_size": model_size,
+    }
+
+
+class STTEngine:
+    """Base class ของ STT backend"""
+
+    name = "base"
+
+    def __init__(self, model_size: str):
+        self.model_size = model_size
+        self.model = None
+        self.load_time = 0.0
+        self._scheduler = None  # BatchScheduler ของ engine นี้ (ดู stt_batching.get_scheduler)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def load(self):
+        """โหลดโมเดล (backend ต้อง implement ใน _load)"""
+        start_time = time.time()
+        self.model = self._load()
+        self.load_time = time.time() - start_time
+        return self
+
+    def _load(self):
+        raise NotImplementedError
+
+    def unload(self):
+        """ปล่อยโมเดลออกจากหน่วยความจำ (โหลดใหม่ได้ด้วย load())"""
+        if self._scheduler is not None:
+            self._scheduler.close()
+            self._scheduler = None
+        self.model = None
+        gc.collect()
+
+    def memory_bytes(self) -> int:
+        """หน่วยความจำที่โมเดลใช้ (bytes) - default ใช้ค่าประเมินจากขนาดโมเดล"""
+        return estimate_model_bytes(self.name, self.model_size) if self.is_loaded else 0
+
+    def warmup(self) -> float:
+        """ถอดเสียงเงียบ 1 วินาทีเพื่อให้ kernel/cache พร้อมก่อนงานจริง คืนเวลาที่ใช้ (วินาที)"""
+        start_time = time.time()
+        self.transcribe(np.zeros(RATE, dtype=np.float32))
+        return time.time() - start_time
+
+    def transcribe(self, audio: Union[np.ndarray, str], language: Optional[str] = None,
+                   temperature: Optional[float] = None, initial_prompt: Optional[str] = None) -> Dict:
+        """
+        ถอดเสียงเป็นข้อความ
+
+        Args:
+            audio: float32 mono 16 kHz หรือ path ของไฟล์เสียง
+            language: รหัสภาษา (default ตาม whisper_config.LANGUAGE)
+            temperature: decoding temperature (default ตาม whisper_config.TEMPERATURE)
+            initial_prompt: ข้อความนำ (เช่นข้อความช่วงก่อนหน้า)
+
+        Returns:
+            result dict (ดู make_result)
+        """
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios: List[np.ndarray], language: Optional[str] = None,
+                         temperature: Optional[float] = None) -> List[Dict]:
+        """
+        ถอดเสียงหลายคลิปพร้อมกัน (default: ทีละคลิป - backend ที่ทำ batch ได้ให้ override)
+
+        Returns:
+            result dict ของแต่ละคลิป เรียงตาม audios
+        """
+        return [self.transcribe(audio, language, temperature) for audio in audios]
+
+
+@register_engine("whisper")
+class WhisperEngine(STTEngine):
+    """openai-whisper (PyTorch)"""
+
+    def _load(self):
+        import whisper
+        device = None if whisper_config.DEVICE == "auto" else whisper_config.DEVICE
+        if is_converted(self.model_size):
+            # map น้ำหนักจากไฟล์ safetensors ใน MODEL_DIR (ดู model_store.py)
+            return load_converted(self.model_size, device)
+        return whisper.load_model(self.model_size, device=device)
+
+    def unload(self):
+        super().unload()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def memory_bytes(self) -> int:
+        if not self.is_loaded:
+            return 0
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def transcribe(self, audio, language=None, temperature=None, initial_prompt=None) -> Dict:
+        if (whisper_config.SHORT_UTTERANCE and isinstance(audio, np.ndarray)
+                and len(audio) <= whisper_config.SHORT_UTTERANCE_MAX * RATE):
+            result = self.transcribe_short(audio, language, temperature, initial_prompt)
+            if result is not None:
+                return result
+        return self.transcribe_full(audio, language, temperature, initial_prompt)
+
+    def transcribe_full(self, audio, language=None, temperature=None, initial_prompt=None) -> Dict:
+        """ถอดเสียงด้วย whisper.transcribe ตามปกติ (หน้าต่าง 30 วินาที + temperature fallback)"""
+        result = self.model.transcribe(
+            audio,
+            language=language or whisper_config.LANGUAGE,
+            temperature=whisper_config.TEMPERATURE if temperature is None else temperature,
+            initial_prompt=initial_prompt
+        )
+        segments = [
+            {
+                "id": seg["id"],
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": seg["text"],
+                "avg_logprob": seg["avg_logprob"],
+                "no_speech_prob": seg["no_speech_prob"],
+                "compression_ratio": seg["compression_ratio"],
+            }
+            for seg in result.get("segments", [])
+        ]
+        return make_result(result.get("text", ""), segments, result.get("language"),
+                           self.name, self.model_size)
+
+    def transcribe_short(self, audio: np.ndarray, language=None, temperature=None,
+                         initial_prompt=None) -> Optional[Dict]:
+        """
+        ถอดคลิปสั้นโดยรัน encoder บนหน้าต่างที่ตัดให้พอดีกับคลิป แทนการ pad เป็น 30 วินาที
+
+        ความยาวหน้าต่างถูกปัดขึ้นเป็นช่วงละ SHORT_UTTERANCE_BUCKET วินาที
+        (เวลา encoder ลดลงตามสัดส่วนความยาว)
+
+        Returns:
+            result dict หรือ None หากผลไม่ผ่านเกณฑ์คุณภาพ (ให้ถอดใหม่แบบเต็มหน้าต่าง)
+        """
+        import torch
+        import whisper
+
+        language = language or whisper_config.LANGUAGE
+        temperature = whisper_config.TEMPERATURE if temperature is None else temperature
+
+        n_samples = short_window_samples(len(audio), whisper.audio.N_SAMPLES)
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio), n_samples),
+                                          n_mels=self.model.dims.n_mels)
+        options = whisper.DecodingOptions(
+            language=language,
+            temperature=temperature,
+            prompt=initial_prompt,
+            without_timestamps=True,
+            fp16=self.model.device.type == "cuda"
+        )
+        d = whisper.decode(_ShortWindowModel(self.model), mel.to(self.model.device), options)
+
+        if d.compression_ratio > 2.4 or d.avg_logprob < -1.0:
+            if d.no_speech_prob > 0.6:
+                return make_result("", [], language, self.name, self.model_size)
+            return None
+        return self._decoding_result(d, len(audio))
+
+    def transcribe_batch(self, audios, language=None, temperature=None) -> List[Dict]:
+        """
+        รัน encoder/decoder ครั้งเดียวกับทุกคลิป (แต่ละคลิปต้องยาวไม่เกิน 30 วินาที)
+
+        คลิปที่ผลไม่ผ่านเกณฑ์คุณภาพเดียวกับ whisper.transcribe (compression ratio /
+        logprob) จะถูกถอดใหม่แยกด้วย transcribe() แบบเต็ม
+        """
+        import torch
+        import whisper
+
+        language = language or whisper_config.LANGUAGE
+        temperature = whisper_config.TEMPERATURE if temperature is None else temperature
+
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)),
+                                        n_mels=self.model.dims.n_mels)
+            for audio in audios
+        ]).to(self.model.device)
+        options = whisper.DecodingOptions(
+            language=language,
+            temperature=temperature,
+            without_timestamps=True,
+            fp16=self.model.device.type == "cuda"
+        )
+        decoded = whisper.decode(self.model, mel, options)
+
+        results = []
+        for audio, d in zip(audios, decoded):
+            if d.compression_ratio > 2.4 or d.avg_logprob < -1.0:
+                if d.no_speech_prob > 0.6:
+                    # ช่วงเงียบ - ไม่มีข้อความ
+                    results.append(make_result("", [], language, self.name, self.model_size))
+                else:
+                    results.append(self.transcribe_full(audio, language, temperature))
+                continue
+            results.append(self._decoding_result(d, len(audio)))
+        return results
+
+    def _decoding_result(self, d, n_samples: int) -> Dict:
+        """แปลง whisper.DecodingResult ของคลิปเดียวเป็น result dict (segment เดียวทั้งคลิป)"""
+        segment = {
+            "id": 0,
+            "start": 0.0,
+            "end": n_samples / RATE,
+            "text": d.text,
+            "avg_logprob": d.avg_logprob,
+            "no_speech_prob": d.no_speech_prob,
+            "compression_ratio": d.compression_ratio,
+        }
+        return make_result(d.text, [segment], d.language, self.name, self.model_size)
+
+
+class _ShortWindowEncoder:
+    """
+    AudioEncoder ของ Whisper ที่รับ mel สั้นกว่า 3000 frame ได้
+
+    encoder เดิม assert ว่า input ต้องยาวเต็ม 30 วินาที จึงรัน layer เองโดยใช้
+    positional embedding เฉพาะช่วงแรกตามความยาว input (ไม่แก้ไขโมเดลที่ใช้ร่วมกัน)
+    """
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def __call__(self, mel):
+        import torch.nn.functional as F
+
+        enc = self.encoder
+        x = F.gelu(enc.conv1(mel))
+        x = F.gelu(enc.conv2(x))
+        x = x.permute(0, 2, 1)
+        x = (x + enc.positional_embedding[:x.shape[1]]).to(x.dtype)
+        for block in enc.blocks:
+            x = block(x)
+        return enc.ln_post(x)
+
+
+class _ShortWindowModel:
+    """ตัวห่อโมเดล Whisper ที่ใช้ _ShortWindowEncoder แทน encoder เดิมระหว่าง whisper.decode"""
+
+    def __init__(self, model):
+        self._model = model
+        self.encoder = _ShortWindowEncoder(model.encoder)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+@register_engine("faster-whisper")
+class FasterWhisperEngine(STTEngine):
+    """faster-whisper (CTranslate2) - ใช้ int8 quantization บน CPU ได้เร็วกว่าหลายเท่า"""
+
+    def _load(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel(
+            self.model_size,
+            device=whisper_config.DEVICE,
+            compute_type=whisper_config.COMPUTE_TYPE,
+            cpu_threads=whisper_config.CPU_THREADS
+        )
+
+    def transcribe(self, audio, language=None, temperature=None, initial_prompt=None) -> Dict:
+        segments, info = self.model.transcribe(
+            audio,
+            language=language or whisper_config.LANGUAGE,
+            temperature=whisper_config.TEMPERATURE if temperature is None else temperature,
+            initial_prompt=initial_prompt,
+            beam_size=whisper_config.BEAM_SIZE
+        )
+        # segments เป็น generator - การถอดเสียงเกิดขึ้นตอนวนลูปนี้
+        segment_list = [
+            {
+                "id": seg.id,
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "avg_logprob": seg.avg_logprob,
+                "no_speech_prob": seg.no_speech_prob,
+                "compression_ratio": seg.compression_ratio,
+            }
+            for seg in segments
+        ]
+        text = "".join(seg["text"] for seg in segment_list)
+        return make_result(text, segment_list, info.language, self.name, self.model_size)
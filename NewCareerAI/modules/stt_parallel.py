@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+⚡ stt_parallel.py - Parallel Transcription of Long Answers
+============================================================
+ฟีเจอร์หลัก:
+- ตัดคำตอบยาวเป็นช่วงตามจุดหยุดพูด (ใช้ VAD) ไม่ตัดกลางคำ
+- ถอดแต่ละช่วงพร้อมกันใน process pool (แต่ละ process โหลดโมเดลของตัวเองครั้งเดียว)
+- โมเดลของทุก worker นับรวมใน WHISPER_MEMORY_BUDGET_MB (จำนวน worker ถูกจำกัดตามงบ)
+- เริ่ม pool เมื่อมีงานแรก และปิดเมื่อว่างนาน PARALLEL_IDLE_TIMEOUT เพื่อคืนหน่วยความจำ
+- จำกัดจำนวน torch thread ต่อ process เพื่อไม่ให้แย่ง core กัน
+- รวมผลตามลำดับเวลา พร้อมเลื่อน timestamp ของแต่ละ segment ให้ตรงกับคลิปเดิม
+
+ความสามารถ:
+- split_at_pauses(): หาจุดตัดที่ช่วงเงียบ แบ่งงานให้พอดีกับจำนวน worker
+- ParallelTranscriber.transcribe(): คืน result dict รูปแบบเดียวกับ STTEngine
+- เวลาถอดคำตอบยาวลดลงตามจำนวน core ที่ใช้
+
+การใช้งาน: from modules.stt_parallel import ParallelTranscriber
+============================================================
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .config import whisper_config, audio_config
+    from .stt_engines import create_engine, estimate_model_bytes, make_result
+    from .vad import speech_regions
+except ImportError:
+    from config import whisper_config, audio_config
+    from stt_engines import create_engine, estimate_model_bytes, make_result
+    from vad import speech_regions
+
+
+RATE = audio_config.SAMPLE_RATE
+MAX_SEGMENT_DURATION = 30  # วินาที - หน้าต่างของ Whisper
+
+# engine ของแต่ละ worker process (สร้างใน _init_worker)
+_worker_engine = None
+
+
+def worker_threads(workers: int) -> int:
+    """จำนวน torch thread ต่อ worker (0 ใน config = แบ่ง core เท่าๆ กัน)"""
+    if whisper_config.TORCH_THREADS_PER_WORKER > 0:
+        return whisper_config.TORCH_THREADS_PER_WORKER
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _init_worker(backend: str, model_size: str, threads: int):
+    """initializer ของ worker process: จำกัด thread แล้วโหลดโมเดลครั้งเดียว"""
+    global _worker_engine
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    # faster-whisper ใช้ cpu_threads ของตัวเอง
+    whisper_config.CPU_THREADS = threads
+    _worker_engine = create_engine(backend, model_size).load()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _transcribe_segment(audio: np.ndarray, language: Optional[str],
+                        temperature: Optional[float]) -> Dict:
+    return _worker_engine.transcribe(audio, language, temperature)
+
+
+def split_at_pauses(audio: np.ndarray, parts: int, sample_rate: int = RATE,
+                    min_segment: Optional[float] = None) -> List[Tuple[int, int]]:
+    """
+    แบ่งคลิปเป็นช่วงที่ตัดตรงจุดหยุดพูด
+
+    Args:
+        audio: เสียง float32 mono
+        parts: จำนวนช่วงที่ต้องการโดยประมาณ (ปกติเท่าจำนวน worker)
+        sample_rate: sample rate ของ audio
+        min_segment: ความยาวขั้นต่ำของแต่ละช่วง (วินาที)
+
+    Returns:
+        รายการ (start_sample, end_sample) เรียงตามเวลา ไม่ซ้อนกัน
+    """
+    regions = speech_regions(audio, sample_rate, whisper_config.PARALLEL_MIN_PAUSE)
+    if not regions:
+        return [(0, len(audio))]
+
+    min_segment = whisper_config.PARALLEL_MIN_SEGMENT if min_segment is None else min_segment
+    total = regions[-1][1] - regions[0][0]
+    target = min(max(total / max(1, parts), min_segment * sample_rate),
+                 MAX_SEGMENT_DURATION * sample_rate)
+
+    groups = [list(regions[0])]
+    for start, end in regions[1:]:
+        if end - groups[-1][0] > target:
+            groups.append([start, end])
+        else:
+            groups[-1][1] = end
+
+    # ตัดกึ่งกลางช่วงเงียบระหว่างกลุ่ม เพื่อให้แต่ละช่วงมีเสียงเงียบเผื่อหัว/ท้าย
+    pad = int(audio_config.TRIM_PADDING * sample_rate)
+    bounds = []
+    for i, (start, end) in enumerate(groups):
+        cut_start = 0 if i == 0 else (groups[i - 1][1] + start) // 2
+        cut_end = len(audio) if i == len(groups) - 1 else (end + groups[i + 1][0]) // 2
+        bounds.append((max(cut_start, start - pad), min(cut_end, end + pad)))
+    return bounds
+
+
+def merge_results(results: List[Dict], offsets: List[float], backend: str,
+                  model_size: str) -> Dict:
+    """รวมผลของแต่ละช่วงตามลำดับ โดยเลื่อน timestamp ตาม offset (วินาที) ของช่วงนั้น"""
+    segments = []
+    texts = []
+    language = None
+    for result, offset in zip(results, offsets):
+        language = language or result.get("language")
+        if result["text"]:
+            texts.append(result["text"])
+        for seg in result["segments"]:
+            segments.append(dict(seg, id=len(segments),
+                                 start=seg["start"] + offset, end=seg["end"] + offset))
+    return make_result(" ".join(texts), segments, language, backend, model_size)
+
+
+class ParallelTranscriber:
+    """ถอดคำตอบยาวแบบขนานใน process pool"""
+
+    def __init__(self, backend: Optional[str] = None, model_size: Optional[str] = None,
+                 workers: Optional[int] = None, manager=None, idle_timeout: Optional[float] = None):
+        """
+        Args:
+            backend: STT backend ของ worker
+            model_size: ขนาดโมเดลของ worker
+            workers: จำนวน process (default ตาม whisper_config.PARALLEL_WORKERS)
+            manager: ModelManager ที่ใช้จองงบหน่วยความจำของ worker (None = ไม่นับรวม)
+            idle_timeout: วินาทีที่ว่างก่อนปิด pool (0 = ไม่ปิด)
+        """
+        self.backend = backend or whisper_config.BACKEND
+        self.model_size = model_size or whisper_config.MODEL_SIZE
+        self.manager = manager
+        self.idle_timeout = (whisper_config.PARALLEL_IDLE_TIMEOUT if idle_timeout is None
+                             else idle_timeout)
+        self.worker_bytes = estimate_model_bytes(self.backend, self.model_size)
+        self.workers = self._cap_workers(max(1, workers or whisper_config.PARALLEL_WORKERS))
+        self.threads = worker_threads(self.workers)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._active = 0
+        self._idle_timer: Optional[threading.Timer] = None
+
+    def _cap_workers(self, workers: int) -> int:
+        # แต่ละ worker ถือโมเดลเต็มตัว - จำกัดให้รวมกันไม่เกินงบ
+        budget = self.manager.budget_bytes if self.manager is not None else 0
+        if budget <= 0:
+            return workers
+        capped = max(1, min(workers, budget // max(1, self.worker_bytes)))
+        if capped < workers:
+            print(f"⚠️ ลด parallel worker เหลือ {capped} ตัว (งบหน่วยความจำ "
+                  f"{budget // 1024 // 1024} MB)")
+        return capped
+
+    @property
+    def _reservation(self) -> str:
+        return f"parallel:{self.backend}:{self.model_size}"
+
+    def _acquire_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._pool is None:
+                if self.manager is not None:
+                    self.manager.reserve(self._reservation, self.workers * self.worker_bytes)
+                # ใช้ spawn เพื่อไม่ fork thread/สถานะ torch ของ process หลัก
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.backend, self.model_size, self.threads)
+                )
+            self._active += 1
+            return self._pool
+
+    def _release_pool(self):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0 and self.idle_timeout > 0:
+                self._idle_timer = threading.Timer(self.idle_timeout, self._shutdown_idle)
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+
+    def _shutdown_idle(self):
+        with self._lock:
+            if self._active > 0 or self._pool is None:
+                return
+            self._stop_pool()
+        print(f"♻️  ปิด parallel worker ที่ว่างนาน {self.idle_timeout:.0f}s")
+
+    def _stop_pool(self):
+        # ต้องถือ lock
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        if self.manager is not None:
+            self.manager.release(self._reservation)
+
+    def warmup(self):
+        """เริ่ม worker ทุกตัว (โหลดโมเดลใน initializer) ก่อนมีงานจริง"""
+        pool = self._acquire_pool()
+        try:
+            futures = [pool.submit(_ping) for _ in range(self.workers)]
+            return [f.result() for f in futures]
+        finally:
+            self._release_pool()
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None,
+                   temperature: Optional[float] = None) -> Dict:
+        """
+        ถอดเสียงยาวโดยแบ่งที่จุดหยุดพูดแล้วถอดทุกช่วงพร้อมกัน
+
+        Returns:
+            result dict (segments เรียงตามเวลาในคลิปเดิม)
+        """
+        bounds = split_at_pauses(audio, self.workers)
+        pool = self._acquire_pool()
+        try:
+            futures = [
+                pool.submit(_transcribe_segment, np.ascontiguousarray(audio[start:end]),
+                            language, temperature)
+                for start, end in bounds
+            ]
+            results = [f.result() for f in futures]
+        finally:
+            self._release_pool()
+        offsets = [start / RATE for start, _ in bounds]
+        return merge_results(results, offsets, self.backend, self.model_size)
+
+    def shutdown(self):
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._pool is not None:
+                self._stop_pool()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+🪜 stt_tiered.py - Confidence-Gated Model Escalation
+=====================================================
+ฟีเจอร์หลัก:
+- ถอดเสียงด้วยโมเดลเล็ก (FAST_MODEL_SIZE) ก่อนทุกครั้ง
+- ตรวจความมั่นใจของแต่ละ segment (avg_logprob, no_speech_prob, compression_ratio)
+- ถอดใหม่ด้วยโมเดลใหญ่เฉพาะช่วงที่ไม่มั่นใจ แล้วแทนที่ในผลลัพธ์เดิม
+- เก็บสถิติว่ายกระดับบ่อยแค่ไหน
+
+ความสามารถ:
+- is_low_confidence(): เกณฑ์ตัดสิน segment ที่ต้องถอดใหม่
+- TieredTranscriber.transcribe(): คืน result dict รูปแบบเดียวกับ STTEngine
+- TieredTranscriber.stats(): อัตราการยกระดับต่อคำตอบ / ต่อ segment
+
+การใช้งาน: STT_TIERED=true (ดู WhisperSTT._decode)
+=====================================================
+"""
+import threading
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .config import whisper_config, audio_config
+    from .stt_engines import STTEngine, make_result
+except ImportError:
+    from config import whisper_config, audio_config
+    from stt_engines import STTEngine, make_result
+
+
+RATE = audio_config.SAMPLE_RATE
+
+
+def is_low_confidence(segment: Dict) -> bool:
+    """segment นี้ควรถอดใหม่ด้วยโมเดลใหญ่หรือไม่"""
+    if segment["avg_logprob"] < whisper_config.ESCALATE_LOGPROB:
+        return True
+    if segment["compression_ratio"] > whisper_config.ESCALATE_COMPRESSION:
+        # ข้อความซ้ำวน - อาการ hallucination ของโมเดลเล็ก
+        return True
+    # โมเดลคิดว่าเป็นช่วงเงียบแต่ยังให้ข้อความออกมา
+    return segment["no_speech_prob"] > whisper_config.ESCALATE_NO_SPEECH and bool(segment["text"].strip())
+
+
+def escalation_ranges(segments: List[Dict]) -> List[Tuple[int, int]]:
+    """รวม segment ที่ไม่มั่นใจและอยู่ติดกันเป็นช่วง [first, last] (index ของ segment)"""
+    ranges = []
+    for i, segment in enumerate(segments):
+        if not is_low_confidence(segment):
+            continue
+        if ranges and ranges[-1][1] == i - 1:
+            ranges[-1] = (ranges[-1][0], i)
+        else:
+            ranges.append((i, i))
+    return ranges
+
+
+class TieredTranscriber:
+    """ถอดด้วยโมเดลเล็กก่อน แล้วยกระดับเฉพาะช่วงที่ไม่มั่นใจไปโมเดลใหญ่"""
+
+    def __init__(self, lease_fast: Callable[[], ContextManager[STTEngine]],
+                 lease_accurate: Callable[[], ContextManager[STTEngine]]):
+        """
+        Args:
+            lease_fast: คืน context manager ที่ยึด engine โมเดลเล็กไว้ระหว่างใช้ (เช่น ModelManager.lease)
+            lease_accurate: เหมือนกันสำหรับโมเดลใหญ่ (เรียกเฉพาะเมื่อต้องยกระดับ)
+        """
+        self._lease_fast = lease_fast
+        self._lease_accurate = lease_accurate
+        self._lock = threading.Lock()
+        self.answers = 0
+        self.escalated_answers = 0
+        self.segments = 0
+        self.escalated_segments = 0
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None,
+                   temperature: Optional[float] = None) -> Dict:
+        """
+        Returns:
+            result dict ของโมเดลเล็กที่แทนช่วงไม่มั่นใจด้วยผลของโมเดลใหญ่
+            พร้อม key "escalated" = จำนวน segment ที่ถูกถอดใหม่
+        """
+        with self._lease_fast() as fast:
+            result = fast.transcribe(audio, language, temperature)
+        segments = result["segments"]
+        ranges = escalation_ranges(segments)
+
+        escalated = sum(last - first + 1 for first, last in ranges)
+        with self._lock:
+            self.answers += 1
+            self.segments += len(segments)
+            self.escalated_segments += escalated
+            self.escalated_answers += bool(ranges)
+
+        if not ranges:
+            result["escalated"] = 0
+            return result
+
+        with self._lease_accurate() as accurate:
+            if accurate is None:
+                print("⚠️ โหลดโมเดลใหญ่ไม่สำเร็จ - ใช้ผลจากโมเดลเล็ก")
+                result["escalated"] = 0
+                return result
+            print(f"🪜 ยกระดับ {escalated}/{len(segments)} segment ไปโมเดล {accurate.model_size}")
+
+            pad = int(audio_config.TRIM_PADDING * RATE)
+            merged: List[Dict] = []
+            cursor = 0
+            for first, last in ranges:
+                merged.extend(segments[cursor:first])
+                start = max(0, int(segments[first]["start"] * RATE) - pad)
+                end = min(len(audio), int(segments[last]["end"] * RATE) + pad)
+                redo = accurate.transcribe(np.ascontiguousarray(audio[start:end]), language, temperature)
+                offset = start / RATE
+                for seg in redo["segments"]:
+                    merged.append(dict(seg, start=seg["start"] + offset, end=seg["end"] + offset))
+                cursor = last + 1
+            merged.extend(segments[cursor:])
+
+        merged = [dict(seg, id=i) for i, seg in enumerate(merged)]
+        text = "".join(seg["text"] for seg in merged)
+        tiered = make_result(text, merged, result["language"], result["backend"],
+                             f"{result['model_size']}+{accurate.model_size}")
+        tiered["escalated"] = escalated
+        return tiered
+
+    @property
+    def escalation_rate(self) -> float:
+        """สัดส่วน segment ที่ถูกยกระดับ"""
+        return self.escalated_segments / self.segments if self.segments else 0.0
+
+    def stats(self) -> Dict:
+        return {
+            "answers": self.answers,
+            "escalated_answers": self.escalated_answers,
+            "segments": self.segments,
+            "escalated_segments": self.escalated_segments,
+            "escalation_rate": self.escalation_rate,
+        }
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+🛰️ stt_worker.py - Shared Out-of-Process Transcription Worker
+==============================================================
+ฟีเจอร์หลัก:
+- Worker process เดียวที่โหลดโมเดล STT ไว้ครั้งเดียวและอุ่นเครื่องตลอดเวลา
+- ทุก Streamlit session / CLI ส่งเสียงมาถอดผ่าน local socket
+- ได้ Future กลับทันที ไม่ต้องถอดเสียงบน script thread ของ session
+
+ความสามารถ:
+- TranscriptionServer: รับงานจากหลาย client แล้วถอดเสียงด้วยโมเดลเดียว
+- TranscriptionClient: ส่งเสียง (NumPy float32) แล้วรับ concurrent.futures.Future
+- TranscriptionClient.result(): รอผลแบบมี timeout - ทิ้งงานที่หมดเวลาและตัดการเชื่อมต่อที่ค้าง
+- RemoteEngine: ใช้แทน STTEngine ได้ทันทีใน WhisperSTT (STT_WORKER=true)
+- get_worker_client(): client ที่ใช้ร่วมกันภายใน process
+- STT_BATCHING=true: รวมงานจากหลาย client เป็น batch ผ่าน BatchScheduler
+
+โปรโตคอล (multiprocessing.connection, authkey):
+- client -> server: (request_id, audio, options)
+- server -> client: (request_id, result, error)
+
+ความปลอดภัย: multiprocessing.connection ใช้ pickle - ผู้ที่รู้ authkey รันโค้ดใน worker ได้
+- รับการเชื่อมต่อเฉพาะ loopback (127.0.0.1 / ::1 / localhost)
+- ไม่มี key ตั้งต้น: ใช้ STT_WORKER_AUTHKEY หรือสุ่ม key ใหม่ทุกครั้งที่เริ่ม worker
+  แล้วเขียนลง STT_WORKER_KEY_FILE (permission 0600) ให้ client ของผู้ใช้เดียวกันอ่าน
+
+การใช้งาน:
+  python modules/stt_worker.py --backend faster-whisper --model-size small
+  แล้วตั้ง STT_WORKER=true ให้แอป
+==============================================================
+"""
+import argparse
+import ipaddress
+import itertools
+import os
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import Client, Listener
+from typing import Dict, Optional, Tuple
+
+try:
+    from .config import whisper_config
+    from .stt_engines import STTEngine, create_engine
+    from .stt_batching import BatchScheduler
+except ImportError:
+    from config import whisper_config
+    from stt_engines import STTEngine, create_engine
+    from stt_batching import BatchScheduler
+
+
+def worker_address() -> Tuple[str, int]:
+    """address ของ worker ตาม config"""
+    return whisper_config.WORKER_HOST, whisper_config.WORKER_PORT
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def worker_authkey() -> bytes:
+    """authkey ของ client: STT_WORKER_AUTHKEY หรือ key ที่ worker เขียนไว้ใน WORKER_KEY_FILE"""
+    if whisper_config.WORKER_AUTHKEY:
+        return whisper_config.WORKER_AUTHKEY.encode("utf-8")
+    try:
+        key = whisper_config.WORKER_KEY_FILE.read_text(encoding="utf-8").strip()
+    except OSError:
+        key = ""
+    if not key:
+        raise RuntimeError(f"ไม่พบ authkey ของ STT worker - ตั้ง STT_WORKER_AUTHKEY "
+                           f"หรือเริ่ม worker ก่อน (สร้าง {whisper_config.WORKER_KEY_FILE})")
+    return key.encode("utf-8")
+
+
+def create_authkey() -> bytes:
+    """authkey ของ server: STT_WORKER_AUTHKEY หรือสุ่มใหม่แล้วเขียนลง WORKER_KEY_FILE (0600)"""
+    if whisper_config.WORKER_AUTHKEY:
+        return whisper_config.WORKER_AUTHKEY.encode("utf-8")
+    key = secrets.token_hex(32)
+    path = whisper_config.WORKER_KEY_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    # สร้างใหม่ด้วย O_EXCL - ไม่เขียนทับไฟล์/symlink ที่คนอื่นเตรียมไว้
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(key)
+    print(f"🔑 สร้าง authkey ใหม่ที่ {path}")
+    return key.encode("utf-8")
+
+
+class TranscriptionServer:
+    """Worker ที่ถือโมเดลไว้ครั้งเดียวและรับงานถอดเสียงจากหลาย client"""
+
+    def __init__(self, backend: Optional[str] = None, model_size: Optional[str] = None,
+                 address: Optional[Tuple[str, int]] = None):
+        self.engine = create_engine(backend, model_size)
+        self.address = address or worker_address()
+        if not is_loopback(self.address[0]):
+            raise ValueError(f"STT worker รับการเชื่อมต่อเฉพาะ loopback เท่านั้น (ได้ {self.address[0]})")
+        self._jobs = queue.Queue()
+        self._scheduler = None
+        self._listener = None
+        self._running = False
+
+    def serve_forever(self):
+        """โหลดโมเดล แล้วรับงานจนกว่าจะถูกหยุด"""
+        print(f"🧠 กำลังโหลดโมเดล ({self.engine.name}, {self.engine.model_size})...")
+        self.engine.load()
+        warmup_time = self.engine.warmup()
+        print(f"✅ โหลดโมเดลสำเร็จ ({self.engine.load_time:.1f}s, warm-up {warmup_time:.1f}s)")
+
+        self._listener = Listener(self.address, authkey=create_authkey())
+        self._running = True
+        if whisper_config.BATCHING:
+            self._scheduler = BatchScheduler(self.engine)
+            print(f"📦 เปิด batched decoding (สูงสุด {self._scheduler.max_batch} งาน, "
+                  f"รอ {self._scheduler.max_wait * 1000:.0f} ms)")
+        else:
+            threading.Thread(target=self._process_jobs, daemon=True).start()
+        print(f"🛰️  STT worker พร้อมใช้งานที่ {self.address[0]}:{self.address[1]}")
+
+        try:
+            while self._running:
+                conn = self._listener.accept()
+                threading.Thread(target=self._read_requests, args=(conn,), daemon=True).start()
+        except (KeyboardInterrupt, OSError):
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """หยุดรับงาน"""
+        self._running = False
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+    def _read_requests(self, conn):
+        """อ่านงานจาก client หนึ่งตัว แล้วส่งเข้าคิวกลาง"""
+        send_lock = threading.Lock()
+        try:
+            while True:
+                request_id, audio, options = conn.recv()
+                if self._scheduler is not None:
+                    future = self._scheduler.submit(audio, **options)
+                    future.add_done_callback(
+                        lambda f, rid=request_id: self._send_future(conn, send_lock, rid, f))
+                else:
+                    self._jobs.put((conn, send_lock, request_id, audio, options))
+        except (EOFError, OSError):
+            pass
+
+    def _process_jobs(self):
+        """ถอดเสียงทีละงานด้วยโมเดลเดียว"""
+        while True:
+            conn, send_lock, request_id, audio, options = self._jobs.get()
+            try:
+                result, error = self.engine.transcribe(audio, **options), None
+            except Exception as e:
+                result, error = None, str(e)
+            self._send(conn, send_lock, request_id, result, error)
+
+    def _send_future(self, conn, send_lock, request_id, future):
+        error = future.exception()
+        self._send(conn, send_lock, request_id, None if error else future.result(),
+                   str(error) if error else None)
+
+    @staticmethod
+    def _send(conn, send_lock, request_id, result, error):
+        try:
+            with send_lock:
+                conn.send((request_id, result, error))
+        except (EOFError, OSError):
+            # client ปิดการเชื่อมต่อไปแล้ว
+            pass
+
+
+class TranscriptionClient:
+    """Client สำหรับส่งงานถอดเสียงไปยัง worker"""
+
+    def __init__(self, address: Optional[Tuple[str, int]] = None):
+        self.address = address or worker_address()
+        # client ก็ unpickle ผลจาก worker - ห้ามต่อไปยังเครื่องอื่น
+        if not is_loopback(self.address[0]):
+            raise ValueError(f"STT worker ต้องอยู่บน loopback เท่านั้น (ได้ {self.address[0]})")
+        self._conn = None
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._last_response = time.monotonic()  # เวลาที่ได้ผลล่าสุด - ใช้ตรวจว่า worker ค้าง
+        # (backend, model_size) ที่ worker ใช้ถอดจริง - รู้หลังได้ผลแรก (ใช้เป็น cache key)
+        self.served_by: Optional[Tuple[str, str]] = None
+
+    def submit(self, audio, language: Optional[str] = None, temperature: Optional[float] = None,
+               initial_prompt: Optional[str] = None) -> Future:
+        """
+        ส่งเสียงไปถอดที่ worker
+
+        Returns:
+            Future ที่ให้ result dict (รูปแบบเดียวกับ STTEngine.transcribe)
+        """
+        future = Future()
+        options = {"language": language, "temperature": temperature, "initial_prompt": initial_prompt}
+
+        with self._lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self._connect()
+                self._conn.send((request_id, audio, options))
+            except Exception as e:
+                self._pending.pop(request_id, None)
+                self._disconnect()
+                future.set_exception(ConnectionError(f"ไม่สามารถส่งงานไปยัง STT worker: {e}"))
+        return future
+
+    def result(self, future: Future, timeout: Optional[float] = None) -> Dict:
+        """
+        รอผลของงานจาก submit()
+
+        เมื่อหมดเวลา: ถอนงานออกจาก _pending และ cancel future (ไม่ค้างในหน่วยความจำ)
+        หากไม่มีผลใดกลับมาเลยตลอดช่วงที่รอ ถือว่า connection ค้าง - ตัดแล้วเชื่อมต่อใหม่ในงานถัดไป
+
+        Raises:
+            concurrent.futures.TimeoutError: เมื่อหมดเวลา
+        """
+        started = time.monotonic()
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            self.abandon(future, wedged=self._last_response < started)
+            raise
+
+    def abandon(self, future: Future, wedged: bool = False):
+        """ทิ้งงานที่ไม่ต้องการผลแล้ว (wedged=True: ตัด connection และแจ้งงานอื่นที่ค้างอยู่)"""
+        with self._lock:
+            owned = False
+            for request_id, pending in list(self._pending.items()):
+                if pending is future:
+                    del self._pending[request_id]
+                    owned = True
+            # ไม่อยู่ใน _pending = reader กำลังส่งผลให้อยู่แล้ว - ปล่อยให้ future เสร็จตามปกติ
+            if owned:
+                future.cancel()
+            if wedged:
+                print("⚠️ STT worker ไม่ตอบสนอง - ตัดการเชื่อมต่อ")
+                self._disconnect()
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = Client(self.address, authkey=worker_authkey())
+            threading.Thread(target=self._read_responses, args=(self._conn,), daemon=True).start()
+
+    def _disconnect(self):
+        """ปิด connection (เรียกขณะถือ _lock) - งานที่ค้างอยู่ได้ ConnectionError"""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("การเชื่อมต่อกับ STT worker ถูกปิด"))
+
+    def _read_responses(self, conn):
+        """รับผลจาก worker แล้ว resolve future ที่ตรงกับ request_id"""
+        try:
+            while True:
+                request_id, result, error = conn.recv()
+                self._last_response = time.monotonic()
+                with self._lock:
+                    future = self._pending.pop(request_id, None)
+                if future is None:
+                    continue
+                if error is not None:
+                    future.set_exception(RuntimeError(error))
+                else:
+                    self.served_by = (result["backend"], result["model_size"])
+                    future.set_result(result)
+        except (EOFError, OSError):
+            pass
+
+        # การเชื่อมต่อหลุด - แจ้งทุกงานที่ยังค้างอยู่บน connection นี้
+        with self._lock:
+            if self._conn is conn:
+                self._conn = None
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {}
+        for future in pending.values():
+            future.set_exception(ConnectionError("การเชื่อมต่อกับ STT worker ขาดหาย"))
+
+
+_client: Optional[TranscriptionClient] = None
+_client_lock = threading.Lock()
+
+
+def get_worker_client() -> TranscriptionClient:
+    """client ที่ใช้ร่วมกันทุก session ภายใน process"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TranscriptionClient()
+        return _client
+
+
+class RemoteEngine(STTEngine):
+    """STTEngine ที่ส่งงานไปถอดที่ worker แทนการโหลดโมเดลเอง"""
+
+    name = "worker"
+
+    def __init__(self, model_size: str, client: Optional[TranscriptionClient] = None):
+        super().__init__(model_size)
+        self.client = client or get_worker_client()
+
+    def _load(self):
+        # ไม่มีโมเดลในฝั่งนี้ - คืน client เพื่อให้ is_loaded เป็น True
+        return self.client
+
+    def warmup(self) -> float:
+        # worker อุ่นเครื่องโมเดลเองตอนเริ่ม
+        return 0.0
+
+    def memory_bytes(self) -> int:
+        # โมเดลอยู่ใน worker process
+        return 0
+
+    def submit(self, audio, language=None, temperature=None, initial_prompt=None) -> Future:
+        return self.client.submit(audio, language, temperature, initial_prompt)
+
+    def transcribe(self, audio, language=None, temperature=None, initial_prompt=None) -> Dict:
+        future = self.submit(audio, language, temperature, initial_prompt)
+        return self.client.result(future, timeout=whisper_config.WORKER_TIMEOUT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STT worker ที่ใช้โมเดลร่วมกันทุก session")
+    parser.add_argument("--backend", default=whisper_config.BACKEND, help="STT backend")
+    parser.add_argument("--model-size", default=whisper_config.MODEL_SIZE, help="ขนาดโมเดล")
+    parser.add_argument("--host", default=whisper_config.WORKER_HOST)
+    parser.add_argument("--port", type=int, default=whisper_config.WORKER_PORT)
+    args = parser.parse_args()
+
+    server = TranscriptionServer(args.backend, args.model_size, (args.host, args.port))
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+⚡ tts_async.py - asyncio Google Cloud TTS (TextToSpeechAsyncClient)
+=====================================================================
+ฟีเจอร์หลัก:
+- API แบบ async สำหรับสังเคราะห์หลายข้อความพร้อมกันโดยไม่ใช้ thread ต่อคำขอ
+- จำกัดจำนวนคำขอพร้อมกันด้วย asyncio.Semaphore (ASYNC_CONCURRENCY)
+- ใช้ async client ร่วมกันต่อ event loop (ดู tts_clients.py)
+- เสียงต่อคำขอ/ต่อ instance - หลาย session ใช้คนละเสียงพร้อมกันได้อย่างปลอดภัย
+- ใช้ TTS cache เดียวกับ GoogleTTS (key เดียวกัน)
+- deadline / circuit breaker / เสียงสำรองในเครื่อง แบบเดียวกับ GoogleTTS
+
+ความสามารถ:
+- AsyncGoogleTTS.synthesize(): await เสียงของข้อความเดียว (bytes)
+- AsyncGoogleTTS.synthesize_many(): await เสียงของหลายข้อความตามลำดับ
+
+การใช้งาน:
+  tts = AsyncGoogleTTS(voice_type="male")
+  clips = await tts.synthesize_many(questions)
+=====================================================================
+"""
+import asyncio
+import time
+from typing import List, Optional
+
+try:
+    from .config import tts_config
+    from .tts_cache import TTSCache
+    from .tts_clients import (cloud_breaker, get_async_client, is_outage, resolve_voice, synthesis_params,
+                              voice_and_audio_config)
+    from .tts_local import get_local_tts
+except ImportError:
+    from config import tts_config
+    from tts_cache import TTSCache
+    from tts_clients import (cloud_breaker, get_async_client, is_outage, resolve_voice, synthesis_params,
+                             voice_and_audio_config)
+    from tts_local import get_local_tts
+
+
+class AsyncGoogleTTS:
+    """Google Cloud TTS แบบ asyncio"""
+
+    def __init__(self, credentials_path: Optional[str] = None, voice_type: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, cache: Optional[TTSCache] = None):
+        """
+        Args:
+            credentials_path: path ของ Service Account Key (None = ค่าใน config)
+            voice_type: เสียงเริ่มต้นของ instance นี้ (female/male/premium หรือชื่อเสียงเต็ม)
+            max_concurrency: จำนวนคำขอพร้อมกันสูงสุด
+            cache: TTSCache ที่ใช้ร่วม (None = สร้างใหม่ตาม tts_config.CACHE)
+        """
+        self.credentials_path = credentials_path
+        self.voice_name = resolve_voice(voice_type)
+        self.max_concurrency = max_concurrency or tts_config.ASYNC_CONCURRENCY
+        self.cache = cache if cache is not None else (TTSCache() if tts_config.CACHE else None)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.breaker = cloud_breaker()
+        self.local = get_local_tts() if tts_config.LOCAL_FALLBACK else None
+
+    def _limit(self) -> asyncio.Semaphore:
+        # สร้างภายใน loop ที่ใช้งานจริง
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def synthesize(self, text: str, voice_type: Optional[str] = None,
+                         **overrides) -> Optional[bytes]:
+        """
+        แปลงข้อความเป็นเสียง (cache ก่อนเรียก API)
+
+        Args:
+            text: ข้อความ
+            voice_type: เสียงของคำขอนี้ (None = เสียงของ instance)
+            overrides: พารามิเตอร์รายคำขอ เช่น speaking_rate, pitch
+
+        Returns:
+            ข้อมูลเสียงตาม AUDIO_ENCODING หรือ None หากล้มเหลว
+        """
+        if not text or not text.strip():
+            return None
+
+        params = synthesis_params(text, resolve_voice(voice_type, self.voice_name), **overrides)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(params)
+            audio_content = self.cache.get(cache_key)
+            if audio_content is not None:
+                return audio_content
+
+        from google.cloud import texttospeech
+
+        if not self.breaker.allow():
+            return await self._local_fallback(text, params["audio_encoding"])
+
+        async with self._limit():
+            try:
+                client = get_async_client(self.credentials_path)
+                voice, audio_config = voice_and_audio_config(texttospeech, params)
+                start_time = time.time()
+                response = await client.synthesize_speech(
+                    input=texttospeech.SynthesisInput(text=params["text"]),
+                    voice=voice,
+                    audio_config=audio_config,
+                    retry=None,
+                    timeout=tts_config.DEADLINE or None
+                )
+            except Exception as e:
+                print(f"❌ ไม่สามารถสร้างเสียงได้: {e}")
+                self._record_error(e)
+                return await self._local_fallback(text, params["audio_encoding"])
+        self.breaker.record_success()
+        print(f"✅ สร้างเสียงสำเร็จ ({time.time() - start_time:.1f}s): '{text[:30]}'")
+
+        if cache_key is not None:
+            self.cache.put(cache_key, response.audio_content)
+        return response.audio_content
+
+    def _record_error(self, error: Exception):
+        # นับเฉพาะ DEADLINE_EXCEEDED / UNAVAILABLE / RESOURCE_EXHAUSTED (ดู is_outage)
+        if is_outage(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    async def _local_fallback(self, text: str, audio_encoding: str) -> Optional[bytes]:
+        # pyttsx3 เป็น blocking API - รันใน thread เพื่อไม่ให้ event loop ค้าง
+        if self.local is None:
+            return None
+        result = await asyncio.to_thread(self.local.synthesize, text, None, audio_encoding)
+        # encoding ไม่ตรงกับที่ขอ - ผู้เรียกจะตีความ bytes ผิด
+        if result is None or result[1] != audio_encoding:
+            return None
+        return result[0]
+
+    async def synthesize_many(self, texts: List[str], voice_type: Optional[str] = None,
+                              **overrides) -> List[Optional[bytes]]:
+        """
+        แปลงหลายข้อความพร้อมกัน (ไม่เกิน max_concurrency คำขอในเวลาเดียวกัน)
+
+        Returns:
+            ข้อมูลเสียงของแต่ละข้อความตามลำดับ (None = ล้มเหลว)
+        """
+        return list(await asyncio.gather(
+            *(self.synthesize(text, voice_type, **overrides) for text in texts)
+        ))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+🗂️ tts_cache.py - Content-Addressed TTS Audio Cache
+====================================================
+ฟีเจอร์หลัก:
+- จำเสียงที่สังเคราะห์แล้วตาม hash ของข้อความและพารามิเตอร์เสียงทั้งหมด
+- Memory LRU + disk tier ใต้ DATA_DIR/tts_cache จำกัดขนาด (ลบ LRU ก่อน)
+- คำถามซ้ำ/ข้อความคงที่เล่นได้ทันทีโดยไม่เรียก Google Cloud TTS
+
+ความสามารถ:
+- TTSCache.key(): key จาก text, voice, speaking rate, pitch, gain, sample rate, encoding
+- TTSCache.get() / put(): เก็บ audio_content (bytes) ตามที่ API คืนมา
+
+การใช้งาน: from modules.tts_cache import TTSCache
+====================================================
+"""
+from typing import Dict, Optional
+
+try:
+    from .config import tts_config, DATA_DIR
+    from .disk_cache import TieredCache, hash_key
+except ImportError:
+    from config import tts_config, DATA_DIR
+    from disk_cache import TieredCache, hash_key
+
+
+# พารามิเตอร์ที่มีผลต่อเสียงที่ได้ (ลำดับคงที่เพื่อให้ key ไม่เปลี่ยน)
+KEY_FIELDS = (
+    "text",
+    "language_code",
+    "voice_name",
+    "speaking_rate",
+    "pitch",
+    "volume_gain_db",
+    "sample_rate_hertz",
+    "audio_encoding",
+)
+
+
+class TTSCache:
+    """Cache เสียงสังเคราะห์ตามเนื้อหา"""
+
+    def __init__(self, memory_items: Optional[int] = None, directory=None,
+                 max_bytes: Optional[int] = None):
+        """
+        Args:
+            memory_items: จำนวนเสียงที่เก็บในหน่วยความจำ
+            directory: โฟลเดอร์ disk tier (default DATA_DIR/tts_cache)
+            max_bytes: ขนาดสูงสุดของ disk tier
+        """
+        memory_items = tts_config.CACHE_MEMORY_ITEMS if memory_items is None else memory_items
+        directory = directory or DATA_DIR / "tts_cache"
+        max_bytes = tts_config.CACHE_DISK_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self._cache = TieredCache(memory_items, directory, max_bytes, suffix=".audio")
+
+    @staticmethod
+    def key(params: Dict) -> str:
+        """สร้าง key จากพารามิเตอร์การสังเคราะห์ (ดู GoogleTTS.build_synthesis_params)"""
+        return hash_key(*(params.get(field) for field in KEY_FIELDS))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def put(self, key: str, audio_content: bytes):
+        self._cache.put(key, audio_content)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict:
+        return self._cache.stats()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+🔌 tts_clients.py - Shared Google TTS Clients and Request Parameters
+=====================================================================
+ฟีเจอร์หลัก:
+- client ของ Google Cloud TTS หนึ่งตัวต่อ process (ต่อ credentials) - ใช้ gRPC channel ร่วมกัน
+- สร้าง client ครั้งเดียวภายใต้ lock (ไม่สร้างซ้ำทุกครั้งที่เริ่มสัมภาษณ์/Streamlit rerun)
+- async client (grpc.aio) ผูกกับ event loop - แยกหนึ่งตัวต่อ loop
+- พารามิเตอร์การสังเคราะห์ส่งต่อ request (ไม่แก้ tts_config.VOICE_NAME ร่วมกัน)
+- TTS_API_ENDPOINT: ต่อ gRPC แบบ insecure ไปยัง server อื่น (เช่น stand-in สำหรับทดสอบ)
+
+ความสามารถ:
+- get_client() / get_beta_client() / get_async_client(): client ที่ใช้ร่วมกัน
+- resolve_voice(): voice_type (female/male/premium) หรือชื่อเสียงเต็ม -> ชื่อเสียง
+- synthesis_params(): dict พารามิเตอร์ (ใช้ทั้งเรียก API และเป็น cache key)
+- voice_and_audio_config(): สร้าง VoiceSelectionParams / AudioConfig จาก params
+- mime_type(): MIME type ของ audio_encoding (สำหรับส่งให้ browser)
+- is_mp3(): ตรวจว่าข้อมูลเป็น MP3 จริง (ID3 tag หรือ frame sync) ก่อนต่อคลิป
+- cloud_breaker(): circuit breaker ของ Google TTS (ใช้ร่วมกันทั้ง process)
+- is_outage(): error ที่นับเป็นความล้มเหลวของบริการ (DEADLINE_EXCEEDED / UNAVAILABLE / RESOURCE_EXHAUSTED)
+
+การใช้งาน: from modules.tts_clients import get_client, synthesis_params
+=====================================================================
+"""
+import asyncio
+import sys
+import threading
+import weakref
+from typing import Dict, Optional
+
+try:
+    from .config import tts_config, api_config
+    from .circuit_breaker import CircuitBreaker, get_breaker
+except ImportError:
+    from config import tts_config, api_config
+    from circuit_breaker import CircuitBreaker, get_breaker
+
+
+# MIME type ของ audio_content แต่ละ encoding (LINEAR16 จาก API เป็นไฟล์ WAV ทั้งไฟล์)
+AUDIO_MIME_TYPES = {
+    "LINEAR16": "audio/wav",
+    "OGG_OPUS": "audio/ogg",
+    "MP3": "audio/mpeg",
+}
+
+_lock = threading.Lock()
+_clients: Dict = {}
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _create(factory, credentials_path: str, transport: str):
+    if tts_config.API_ENDPOINT:
+        import grpc
+
+        # server ทดสอบ/ภายใน - ไม่ต้องใช้ credentials
+        channel = (grpc.aio.insecure_channel(tts_config.API_ENDPOINT) if transport == "grpc_asyncio"
+                   else grpc.insecure_channel(tts_config.API_ENDPOINT))
+        return factory(transport=factory.get_transport_class(transport)(channel=channel))
+    return factory.from_service_account_file(credentials_path)
+
+
+def _shared(kind: str, credentials_path: Optional[str], factory):
+    credentials_path = credentials_path or api_config.google_credentials_path
+    key = (kind, credentials_path)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _create(factory, credentials_path, "grpc")
+            _clients[key] = client
+    return client
+
+
+def get_client(credentials_path: Optional[str] = None):
+    """TextToSpeechClient (v1) ที่ใช้ร่วมกันทั้ง process"""
+    from google.cloud import texttospeech
+    return _shared("v1", credentials_path, texttospeech.TextToSpeechClient)
+
+
+def get_beta_client(credentials_path: Optional[str] = None):
+    """TextToSpeechClient (v1beta1 - รองรับ SSML timepoints) ที่ใช้ร่วมกันทั้ง process"""
+    from google.cloud import texttospeech_v1beta1
+    return _shared("v1beta1", credentials_path, texttospeech_v1beta1.TextToSpeechClient)
+
+
+def get_async_client(credentials_path: Optional[str] = None):
+    """
+    TextToSpeechAsyncClient ของ event loop ปัจจุบัน (ต้องเรียกภายใน coroutine)
+
+    channel ของ grpc.aio ใช้ได้เฉพาะใน loop ที่สร้าง จึงเก็บแยกต่อ loop
+    (ถูกทิ้งอัตโนมัติเมื่อ loop ถูกเก็บกวาด)
+    """
+    from google.cloud import texttospeech
+
+    credentials_path = credentials_path or api_config.google_credentials_path
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(credentials_path)
+        if client is None:
+            client = _create(texttospeech.TextToSpeechAsyncClient, credentials_path, "grpc_asyncio")
+            clients[credentials_path] = client
+    return client
+
+
+def resolve_voice(voice_type: Optional[str] = None, default: Optional[str] = None) -> str:
+    """
+    Args:
+        voice_type: ประเภทเสียง (female, male, premium) หรือชื่อเสียงเต็ม เช่น th-TH-Wavenet-B
+        default: เสียงเมื่อไม่ระบุ voice_type (None = tts_config.VOICE_NAME)
+    """
+    if voice_type in tts_config.VOICE_OPTIONS:
+        return tts_config.VOICE_OPTIONS[voice_type]
+    if voice_type and voice_type.startswith(tts_config.LANGUAGE_CODE):
+        return voice_type
+    return default or tts_config.VOICE_NAME
+
+
+def synthesis_params(text: str, voice_name: Optional[str] = None, **overrides) -> Dict:
+    """
+    รวมพารามิเตอร์ทั้งหมดที่มีผลต่อเสียงที่สังเคราะห์ได้
+
+    Args:
+        text: ข้อความ (หรือ SSML)
+        voice_name: ชื่อเสียง (None = tts_config.VOICE_NAME)
+        overrides: แทนค่า default รายคำขอ เช่น speaking_rate=1.2
+    """
+    params = {
+        "text": text,
+        "language_code": tts_config.LANGUAGE_CODE,
+        "voice_name": voice_name or tts_config.VOICE_NAME,
+        "speaking_rate": tts_config.SPEAKING_RATE,
+        "pitch": tts_config.PITCH,
+        "volume_gain_db": tts_config.VOLUME_GAIN_DB,
+        "sample_rate_hertz": tts_config.SAMPLE_RATE,
+        "audio_encoding": tts_config.AUDIO_ENCODING,
+    }
+    params.update((key, value) for key, value in overrides.items() if value is not None)
+    return params
+
+
+def voice_and_audio_config(tts_types, params: Dict):
+    """สร้าง VoiceSelectionParams / AudioConfig จาก params (tts_types = texttospeech หรือ v1beta1)"""
+    voice = tts_types.VoiceSelectionParams(
+        language_code=params["language_code"],
+        name=params["voice_name"]
+    )
+    audio_config = tts_types.AudioConfig(
+        audio_encoding=tts_types.AudioEncoding[params["audio_encoding"]],
+        sample_rate_hertz=params["sample_rate_hertz"],
+        speaking_rate=params["speaking_rate"],
+        pitch=params["pitch"],
+        volume_gain_db=params["volume_gain_db"]
+    )
+    return voice, audio_config
+
+
+def mime_type(audio_encoding: Optional[str] = None) -> str:
+    return AUDIO_MIME_TYPES.get(audio_encoding or tts_config.AUDIO_ENCODING, "audio/wav")
+
+
+def is_mp3(audio_content: bytes) -> bool:
+    if audio_content[:3] == b"ID3":
+        return True
+    return len(audio_content) > 1 and audio_content[0] == 0xFF and audio_content[1] & 0xE0 == 0xE0
+
+
+# gRPC status ที่แปลว่าบริการล่ม/ช้า/เต็ม - error อื่น (เช่น INVALID_ARGUMENT) บริการยังตอบอยู่
+OUTAGE_STATUS_CODES = ("DEADLINE_EXCEEDED", "UNAVAILABLE", "RESOURCE_EXHAUSTED")
+
+
+def is_outage(error: BaseException) -> bool:
+    """error นี้ควรนับเป็นความล้มเหลวของ circuit breaker หรือไม่"""
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        api_exceptions = None
+    if api_exceptions is not None and isinstance(error, (api_exceptions.DeadlineExceeded,
+                                                         api_exceptions.ServiceUnavailable,
+                                                         api_exceptions.ResourceExhausted)):
+        return True
+    grpc = sys.modules.get("grpc")
+    if grpc is not None and isinstance(error, grpc.RpcError) and callable(getattr(error, "code", None)):
+        code = error.code()
+        return getattr(code, "name", None) in OUTAGE_STATUS_CODES
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+
+def cloud_breaker() -> CircuitBreaker:
+    return get_breaker("Google Cloud TTS", tts_config.BREAKER_FAILURES, tts_config.BREAKER_COOLDOWN)
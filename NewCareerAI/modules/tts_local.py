@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+🗣️ tts_local.py - Offline Fallback TTS (pyttsx3)
+=================================================
+ฟีเจอร์หลัก:
+- สังเคราะห์เสียงในเครื่องด้วย pyttsx3 (SAPI5 / NSSpeechSynthesizer / eSpeak)
+- ใช้แทน Google Cloud TTS เมื่อเกิน deadline, ไม่มี credentials หรือ circuit breaker เปิดอยู่
+- คืน (ข้อมูลเสียง, encoding) - แปลงเป็น encoding ที่ขอด้วย soundfile เมื่อทำได้
+- เลือกเสียงภาษาไทยที่ติดตั้งในเครื่องอัตโนมัติ (หรือกำหนดด้วย TTS_LOCAL_VOICE)
+
+ความสามารถ:
+- LocalTTS.synthesize(): เขียนเสียงด้วย save_to_file ลงไฟล์ชั่วคราวแล้วอ่านกลับ
+- transcode(): แปลงไฟล์เสียงเป็น LINEAR16 (WAV) / OGG_OPUS / MP3
+- get_local_tts(): instance เดียวต่อ process (pyttsx3 engine ไม่ thread-safe - ใช้ lock)
+
+หมายเหตุ: pyttsx3 เขียน WAV (Windows/Linux) หรือ AIFF (macOS) - หากแปลงไม่ได้ (ไม่มี soundfile
+หรือ libsndfile ไม่รองรับ) จะคืน encoding เดิมของไฟล์ ผู้เรียกต้องตรวจ encoding ที่ได้เอง
+เสียงสำรองไม่ถูกเก็บใน TTS cache (ให้ครั้งถัดไปได้เสียงจาก Google เมื่อกลับมาใช้งานได้)
+
+การใช้งาน: from modules.tts_local import get_local_tts
+=================================================
+"""
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+
+try:
+    from .config import tts_config, TEMP_DIR
+except ImportError:
+    from config import tts_config, TEMP_DIR
+
+
+# เสียงไทยของแต่ละระบบ: th-TH.Kanya (macOS), TTS_MS_TH-TH_PATTARA (Windows), thai (eSpeak)
+_THAI_VOICE = re.compile(r"(^|[^a-z])th([^a-z]|$)|thai|kanya")
+
+# encoding ของ Google TTS -> (format, subtype) ของ soundfile
+ENCODING_FORMATS = {
+    "LINEAR16": ("WAV", "PCM_16"),
+    "OGG_OPUS": ("OGG", "OPUS"),
+    "MP3": ("MP3", "MPEG_LAYER_III"),
+}
+
+_local_lock = threading.Lock()
+_local: Optional["LocalTTS"] = None
+
+
+class LocalTTS:
+    """เสียงสังเคราะห์ในเครื่องด้วย pyttsx3"""
+
+    def __init__(self, voice: Optional[str] = None, rate: Optional[int] = None):
+        """
+        Args:
+            voice: id ของเสียง pyttsx3 (None = หาเสียงภาษาไทยอัตโนมัติ)
+            rate: ความเร็วการพูด (คำต่อนาที)
+        """
+        self.voice = voice or tts_config.LOCAL_VOICE or None
+        self.rate = rate or tts_config.LOCAL_RATE
+        self._lock = threading.Lock()
+        self._voice_id = None
+        self.is_ready = self._check()
+
+    def _check(self) -> bool:
+        try:
+            import pyttsx3  # noqa: F401
+            return True
+        except ImportError:
+            print("⚠️ ไม่พบ pyttsx3 - ไม่มีเสียงสำรองในเครื่อง")
+            return False
+
+    def _select_voice(self, engine) -> Optional[str]:
+        if self.voice:
+            return self.voice
+        for voice in engine.getProperty("voices"):
+            languages = " ".join(str(lang) for lang in (getattr(voice, "languages", None) or []))
+            label = f"{voice.id} {voice.name} {languages}".lower()
+            if _THAI_VOICE.search(label):
+                return voice.id
+        return None
+
+    def synthesize(self, text: str, voice_type: Optional[str] = None,
+                   audio_encoding: Optional[str] = None) -> Optional[Tuple[bytes, str]]:
+        """
+        แปลงข้อความเป็นเสียงในเครื่อง (voice_type ไม่มีผล - รับไว้ให้ interface ตรงกัน)
+
+        Args:
+            text: ข้อความ
+            audio_encoding: encoding ที่ต้องการ (None = tts_config.AUDIO_ENCODING)
+
+        Returns:
+            (ข้อมูลไฟล์เสียง, encoding ที่ได้จริง) หรือ None หากล้มเหลว
+        """
+        if not self.is_ready or not text or not text.strip():
+            return None
+
+        import pyttsx3
+
+        fd, path = tempfile.mkstemp(suffix=".wav", dir=TEMP_DIR)
+        os.close(fd)
+        try:
+            with self._lock:
+                start_time = time.time()
+                engine = pyttsx3.init()
+                if self._voice_id is None:
+                    self._voice_id = self._select_voice(engine) or ""
+                if self._voice_id:
+                    engine.setProperty("voice", self._voice_id)
+                engine.setProperty("rate", self.rate)
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+            with open(path, "rb") as f:
+                audio_content = f.read()
+        except Exception as e:
+            print(f"❌ สร้างเสียงในเครื่องไม่สำเร็จ: {e}")
+            return None
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        if not audio_content:
+            return None
+        print(f"🗣️  ใช้เสียงสำรองในเครื่อง ({time.time() - start_time:.1f}s)")
+
+        audio_encoding = audio_encoding or tts_config.AUDIO_ENCODING
+        encoding = native_encoding(audio_content)
+        if encoding != audio_encoding:
+            converted = transcode(audio_content, audio_encoding)
+            if converted is not None:
+                return converted, audio_encoding
+        return audio_content, encoding
+
+
+def native_encoding(audio_content: bytes) -> str:
+    """encoding ของไฟล์ที่ pyttsx3 เขียน (ดูจาก header)"""
+    return "LINEAR16" if audio_content[:4] == b"RIFF" else "AIFF"
+
+
+def transcode(audio_content: bytes, audio_encoding: str) -> Optional[bytes]:
+    """แปลงไฟล์เสียงเป็น audio_encoding ด้วย soundfile (None = แปลงไม่ได้)"""
+    if audio_encoding not in ENCODING_FORMATS:
+        return None
+    try:
+        import soundfile as sf
+
+        audio, sample_rate = sf.read(io.BytesIO(audio_content), dtype="float32")
+        fmt, subtype = ENCODING_FORMATS[audio_encoding]
+        output = io.BytesIO()
+        sf.write(output, audio, sample_rate, format=fmt, subtype=subtype)
+        return output.getvalue()
+    except Exception as e:
+        print(f"⚠️ แปลงเสียงสำรองเป็น {audio_encoding} ไม่ได้: {e}")
+        return None
+
+
+def get_local_tts() -> LocalTTS:
+    """LocalTTS ที่ใช้ร่วมกันทั้ง process"""
+    global _local
+    with _local_lock:
+        if _local is None:
+            _local = LocalTTS()
+        return _local
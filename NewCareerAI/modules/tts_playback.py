@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+🎧 tts_playback.py - Background Playback Queue (pygame mixer)
+==============================================================
+ฟีเจอร์หลัก:
+- thread เดียวเป็นเจ้าของ pygame mixer - ผู้เรียกไม่ต้องรอเสียงเล่นจบเอง
+- คิวเสียงเล่นต่อกันตามลำดับ (ช่วงเงียบคั่นได้ต่อรายการ)
+- แจ้งผลผ่าน Future: ผู้เรียกทำงานอื่น (สังเคราะห์ข้อถัดไป/เตรียมไมค์) ระหว่างเล่นได้
+- รอจนเสียงจบด้วย Event.wait(ความยาวเสียง) แทนการ poll get_busy() ทุก 100ms
+- cancel() ตัดเสียงที่กำลังเล่นได้ทันที และทิ้งรายการที่ค้างในคิว
+- owner: แต่ละผู้เรียก (เช่น session ของ Streamlit) ยกเลิกได้เฉพาะเสียงของตัวเอง
+
+ความสามารถ:
+- PlaybackWorker.enqueue(): เพิ่มเสียงเข้าคิว คืน Future (True = เล่นจบ, False = ถูกยกเลิก/ล้มเหลว)
+- PlaybackWorker.cancel(owner): หยุดเสียงของ owner (หรือทั้งหมดเมื่อไม่ระบุ) และล้างคิวส่วนนั้น
+- PlaybackWorker.flush(): รอจนคิวว่าง
+- make_sound(): สร้าง pygame Sound จาก WAV ในหน่วยความจำ
+- shared_player(): worker เดียวต่อ process (mixer มีชุดเดียว)
+- shutdown_shared_player(): ปิด worker ที่ใช้ร่วมกัน (shared_player() ครั้งถัดไปสร้างใหม่)
+
+การใช้งาน:
+  player = PlaybackWorker()
+  done = player.enqueue(audio_content)
+  ...  # ทำงานอื่นระหว่างเล่น
+  done.result()
+==============================================================
+"""
+import io
+import queue
+import threading
+import wave
+from concurrent.futures import Future
+from typing import Dict, Hashable, Optional
+
+import pygame
+
+
+_player_lock = threading.Lock()
+_player: Optional["PlaybackWorker"] = None
+
+
+def make_sound(audio_content: bytes) -> "pygame.mixer.Sound":
+    """สร้าง pygame Sound จากข้อมูลเสียงในหน่วยความจำ (WAV หรือรูปแบบอื่นที่ pygame อ่านได้)"""
+    try:
+        with wave.open(io.BytesIO(audio_content), "rb") as wav:
+            frequency, _, channels = pygame.mixer.get_init()
+            if (wav.getframerate() == frequency and wav.getnchannels() == channels
+                    and wav.getsampwidth() == 2):
+                # PCM ตรงกับ mixer อยู่แล้ว - ส่ง frames เข้าไปตรงๆ ไม่ต้อง decode ซ้ำ
+                return pygame.mixer.Sound(buffer=wav.readframes(wav.getnframes()))
+    except (wave.Error, EOFError):
+        # ไม่ใช่ WAV PCM (เช่น AIFF จากเสียงสำรองในเครื่องบน macOS)
+        pass
+    # รูปแบบไม่ตรงกับ mixer - ให้ pygame แปลงเอง (ยังอ่านจากหน่วยความจำ)
+    return pygame.mixer.Sound(file=io.BytesIO(audio_content))
+
+
+class PlaybackWorker:
+    """คิวเล่นเสียงเบื้องหลัง (ต้อง pygame.mixer.init() ก่อนใช้งาน)"""
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._interrupt = threading.Event()
+        self._cond = threading.Condition()
+        self._generation = 0  # เพิ่มทุกครั้งที่ cancel() ทั้งหมด - รายการที่เข้าคิวก่อนหน้าจะถูกข้าม
+        self._owner_generations: Dict[Hashable, int] = {}  # generation แยกต่อ owner
+        self._owner_pending: Dict[Hashable, int] = {}
+        self._current_owner = None
+        self._pending = 0
+        self._closed = False
+        self.current_audio = None
+        self._thread = threading.Thread(target=self._run, name="tts-playback", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, audio_content: bytes, gap: float = 0.0, interrupt: bool = False,
+                owner: Optional[Hashable] = None) -> Future:
+        """
+        เพิ่มเสียงเข้าคิว
+
+        Args:
+            audio_content: ข้อมูลเสียง WAV
+            gap: ช่วงเงียบหลังเล่นจบ (วินาที) ก่อนเล่นรายการถัดไป
+            interrupt: หยุดเสียงของ owner เดียวกันที่กำลังเล่น/ค้างในคิวก่อน
+            owner: ผู้เป็นเจ้าของเสียง (None = ไม่ระบุ - ยกเลิกได้ด้วย cancel() ทั้งหมดเท่านั้น)
+
+        Returns:
+            Future ที่ได้ True เมื่อเล่นจบ หรือ False เมื่อถูกยกเลิก/เล่นไม่ได้
+        """
+        if interrupt:
+            self.cancel(owner)
+        future: Future = Future()
+        with self._cond:
+            self._pending += 1
+            self._owner_pending[owner] = self._owner_pending.get(owner, 0) + 1
+            tag = (self._generation, owner, self._owner_generations.get(owner, 0))
+        self._queue.put((tag, audio_content, gap, future))
+        return future
+
+    def cancel(self, owner: Optional[Hashable] = None):
+        """
+        หยุดเสียงที่กำลังเล่นและทิ้งรายการที่ค้างในคิว
+
+        Args:
+            owner: ยกเลิกเฉพาะเสียงของ owner นี้ (None = ทุกรายการของทุก owner)
+        """
+        with self._cond:
+            if owner is None:
+                self._generation += 1
+                self._interrupt.set()
+                return
+            if not self._owner_pending.get(owner):
+                return
+            self._owner_generations[owner] = self._owner_generations.get(owner, 0) + 1
+            if self._current_owner == owner:
+                self._interrupt.set()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """รอจนเล่นทุกรายการในคิวจบ (คืน False หากหมดเวลา)"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def is_busy(self) -> bool:
+        with self._cond:
+            return self._pending > 0
+
+    def shutdown(self):
+        self._closed = True
+        self.cancel()
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            (generation, owner, owner_generation), audio_content, gap, future = item
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                with self._cond:
+                    current = (generation == self._generation
+                               and owner_generation == self._owner_generations.get(owner, 0))
+                    if current:
+                        self._interrupt.clear()
+                        self._current_owner = owner
+                future.set_result(self._play(audio_content, gap) if current else False)
+            except Exception as e:
+                print(f"❌ ไม่สามารถเล่นเสียงได้: {e}")
+                if not future.done():
+                    future.set_result(False)
+            finally:
+                with self._cond:
+                    self._current_owner = None
+                    self._pending -= 1
+                    self._owner_pending[owner] -= 1
+                    if not self._owner_pending[owner]:
+                        # ไม่มีเสียงของ owner นี้ค้างแล้ว - ไม่ต้องเก็บ generation ไว้อีก
+                        del self._owner_pending[owner]
+                        self._owner_generations.pop(owner, None)
+                    self._cond.notify_all()
+
+    def _play(self, audio_content: bytes, gap: float) -> bool:
+        self.current_audio = make_sound(audio_content)
+        channel = self.current_audio.play()
+        if channel is None:
+            print("❌ ไม่มี channel ว่างสำหรับเล่นเสียง")
+            return False
+        length = self.current_audio.get_length()
+        print(f"🔊 เล่นเสียง ({length:.1f}s)")
+
+        # หลับจนเสียงจบ - ตื่นทันทีหากถูก cancel()
+        if self._interrupt.wait(length):
+            channel.stop()
+            return False
+        if gap and self._interrupt.wait(gap):
+            return False
+        return True
+
+
+def shared_player() -> PlaybackWorker:
+    """PlaybackWorker ที่ใช้ร่วมกันทั้ง process (สร้างครั้งแรกที่เรียก)"""
+    global _player
+    with _player_lock:
+        # สร้างใหม่หาก worker เดิมถูก shutdown() ไปแล้ว (เช่นหลัง cleanup_pygame)
+        if _player is None or _player._closed or not _player._thread.is_alive():
+            _player = PlaybackWorker()
+        return _player
+
+
+def shutdown_shared_player():
+    """ปิด PlaybackWorker ที่ใช้ร่วมกัน (เรียกก่อน pygame.mixer.quit())"""
+    global _player
+    with _player_lock:
+        if _player is not None:
+            _player.shutdown()
+            _player = None
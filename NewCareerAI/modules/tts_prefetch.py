@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+⏩ tts_prefetch.py - Concurrent Pre-Synthesis of Interview Questions
+====================================================================
+ฟีเจอร์หลัก:
+- สังเคราะห์เสียงคำถามทุกข้อพร้อมกันทันทีหลังสร้างคำถามเสร็จ
+- จำกัดจำนวนงานพร้อมกันด้วย thread pool (PREFETCH_WORKERS)
+- BATCH_SYNTHESIS: รวมคำถามเป็นชุด SSML ละหนึ่ง RPC (ชุดต่างๆ ยังรันพร้อมกัน)
+  เฉพาะ LINEAR16 - encoding อื่น (เช่นส่งไป browser) สังเคราะห์ข้อละหนึ่งงานพร้อมกัน
+- ผลลัพธ์ถูกเก็บใน TTS cache และในตัว prefetcher - เล่นคำถามได้ทันที
+- ดูสถานะความพร้อมรายข้อได้โดยไม่ block
+
+ความสามารถ:
+- QuestionPrefetcher.is_ready(i) / ready_count(): สถานะแบบไม่ block
+- QuestionPrefetcher.get(i): รอเสียงของคำถามข้อ i (คืน bytes)
+- QuestionPrefetcher.cancel(): ยกเลิกงานที่ยังไม่เริ่ม (เช่นสร้างคำถามชุดใหม่)
+
+การใช้งาน:
+  prefetcher = QuestionPrefetcher(google_tts, questions)
+  audio = prefetcher.get(0)
+====================================================================
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import List, Optional
+
+try:
+    from .config import tts_config
+    from .tts_ssml import batch_texts
+except ImportError:
+    from config import tts_config
+    from tts_ssml import batch_texts
+
+
+class QuestionPrefetcher:
+    """สังเคราะห์เสียงคำถามทั้งชุดล่วงหน้าใน background"""
+
+    def __init__(self, tts, questions: List[str], voice_type: Optional[str] = None,
+                 max_workers: Optional[int] = None, audio_encoding: Optional[str] = None):
+        """
+        Args:
+            tts: GoogleTTS instance (ต้องมี synthesize และ synthesize_many)
+            questions: รายการคำถาม
+            voice_type: ประเภทเสียง (None = เสียงปัจจุบัน)
+            max_workers: จำนวนคำขอ TTS พร้อมกันสูงสุด
+            audio_encoding: encoding ของเสียง (None = tts_config.AUDIO_ENCODING)
+        """
+        self.questions = list(questions)
+        self.voice_type = voice_type
+        self.audio_encoding = audio_encoding
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or tts_config.PREFETCH_WORKERS,
+            thread_name_prefix="tts-prefetch"
+        )
+        self._futures: List[Future] = [Future() for _ in self.questions]
+        # SSML batch ตัดเสียงได้เฉพาะ LINEAR16 - encoding อื่น synthesize_many จะเรียกทีละข้อ
+        # ตามลำดับใน thread เดียว จึงแยกเป็นงานละข้อเพื่อให้สังเคราะห์พร้อมกันและเล่นข้อแรกได้ก่อน
+        encoding = audio_encoding or tts_config.AUDIO_ENCODING
+        if tts_config.BATCH_SYNTHESIS and encoding == "LINEAR16":
+            batches = batch_texts(self.questions)
+        else:
+            batches = [[i] for i in range(len(self.questions))]
+        for batch in batches:
+            self._executor.submit(self._run, tts, batch)
+        # ไม่รับงานเพิ่ม - thread จะปิดเองเมื่องานครบ
+        self._executor.shutdown(wait=False)
+
+    def _run(self, tts, batch: List[int]):
+        """สังเคราะห์คำถามหนึ่งชุดแล้วส่งผลให้ future ของแต่ละข้อ"""
+        batch = [i for i in batch if self._futures[i].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            if len(batch) == 1:
+                results = [tts.synthesize(self.questions[batch[0]], self.voice_type, self.audio_encoding)]
+            else:
+                results = tts.synthesize_many([self.questions[i] for i in batch], self.voice_type,
+                                              self.audio_encoding)
+        except Exception as e:
+            print(f"❌ สังเคราะห์เสียงล่วงหน้าไม่สำเร็จ: {e}")
+            results = [None] * len(batch)
+        for i, audio_content in zip(batch, results):
+            self._futures[i].set_result(audio_content)
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def is_ready(self, index: int) -> bool:
+        """เสียงของคำถามข้อ index (เริ่มที่ 0) สังเคราะห์สำเร็จแล้วหรือยัง"""
+        future = self._futures[index]
+        return future.done() and not future.cancelled() and future.result() is not None
+
+    def is_failed(self, index: int) -> bool:
+        future = self._futures[index]
+        return future.done() and (future.cancelled() or future.result() is None)
+
+    def ready_count(self) -> int:
+        return sum(self.is_ready(i) for i in range(len(self._futures)))
+
+    def get(self, index: int, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        รอเสียงของคำถามข้อ index
+
+        Returns:
+            ข้อมูลเสียง หรือ None หากล้มเหลว/ถูกยกเลิก/หมดเวลา
+        """
+        future = self._futures[index]
+        if future.cancelled():
+            return None
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            return None
+
+    def cancel(self):
+        """ยกเลิกงานที่ยังไม่เริ่ม"""
+        for future in self._futures:
+            future.cancel()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+✂️ tts_segment.py - Thai Sentence/Phrase Segmentation for Streaming TTS
+========================================================================
+ฟีเจอร์หลัก:
+- ตัดข้อความยาว (เช่นรายงานสรุปจาก Gemini) เป็นประโยค/วลีสำหรับสังเคราะห์ทีละช่วง
+- ภาษาไทยไม่มีเครื่องหมายจบประโยค - ใช้ช่องว่าง ขึ้นบรรทัดใหม่ และเครื่องหมายวรรคตอนเป็นจุดตัด
+- ช่วงแรกสั้นเป็นพิเศษ เพื่อให้เริ่มได้ยินเสียงเร็วที่สุด
+- ลบสัญลักษณ์ markdown ที่ไม่ควรถูกอ่านออกเสียง
+
+ความสามารถ:
+- clean_for_speech(): ลบ markdown (#, *, _, `, >, ลิงก์)
+- split_sentences(): รวมวลีเป็นช่วงยาวไม่เกินที่กำหนด
+
+การใช้งาน: from modules.tts_segment import split_sentences
+========================================================================
+"""
+import re
+from typing import List, Optional
+
+try:
+    from .config import tts_config
+except ImportError:
+    from config import tts_config
+
+
+# จุดตัด: หลังเครื่องหมายจบประโยค, ขึ้นบรรทัดใหม่, หรือช่องว่าง (ช่องว่างในภาษาไทยคั่นวลี/ประโยค)
+_BOUNDARY = re.compile(r"(?<=[.!?…;:])\s*|\n+|\s+")
+_MARKDOWN = re.compile(r"[#*_`>|]+")
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_BULLET = re.compile(r"^\s*(?:[-+•]|\d+\.)\s+", re.MULTILINE)
+
+
+def clean_for_speech(text: str) -> str:
+    """ลบสัญลักษณ์ markdown ที่ไม่ควรอ่านออกเสียง (คงการขึ้นบรรทัดใหม่ไว้เป็นจุดตัด)"""
+    text = _LINK.sub(r"\1", text)
+    text = _BULLET.sub("", text)
+    return _MARKDOWN.sub(" ", text)
+
+
+def _hard_split(phrase: str, limit: int) -> List[str]:
+    # วลีที่ยาวเกิน (ไม่มีช่องว่างเลย) - ตัดตามจำนวนตัวอักษร
+    return [phrase[i:i + limit] for i in range(0, len(phrase), limit)]
+
+
+def split_sentences(text: str, max_chars: Optional[int] = None,
+                    first_max_chars: Optional[int] = None) -> List[str]:
+    """
+    ตัดข้อความเป็นช่วงสำหรับ streaming TTS
+
+    Args:
+        text: ข้อความ (markdown ได้)
+        max_chars: ความยาวสูงสุดต่อช่วง
+        first_max_chars: ความยาวสูงสุดของช่วงแรก (สั้นเพื่อลดเวลาก่อนได้ยินเสียงแรก)
+
+    Returns:
+        รายการช่วงข้อความตามลำดับ
+    """
+    max_chars = max_chars or tts_config.STREAM_SEGMENT_MAX_CHARS
+    first_max_chars = first_max_chars or tts_config.STREAM_FIRST_SEGMENT_CHARS
+
+    phrases = [p for p in _BOUNDARY.split(clean_for_speech(text)) if p and p.strip()]
+    segments: List[str] = []
+    current = ""
+    for phrase in phrases:
+        limit = first_max_chars if not segments else max_chars
+        for piece in _hard_split(phrase.strip(), limit):
+            if current and len(current) + 1 + len(piece) > limit:
+                segments.append(current)
+                current = piece
+                limit = max_chars
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        segments.append(current)
+    return segments
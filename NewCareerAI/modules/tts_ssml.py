@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+🧷 tts_ssml.py - Batched Synthesis Helpers (SSML marks)
+========================================================
+ฟีเจอร์หลัก:
+- รวมหลายข้อความเป็น SSML เอกสารเดียว คั่นแต่ละข้อด้วย <mark>
+- แบ่งรายการเป็นชุดที่ไม่เกินขีดจำกัดขนาด input ของ Google TTS (5000 bytes)
+- ตัดเสียง LINEAR16 ที่ได้เป็นคลิปรายข้อตามเวลาของ mark (timepoints)
+
+ความสามารถ:
+- build_ssml(): สร้าง SSML พร้อมชื่อ mark ของแต่ละข้อ
+- batch_texts(): จัดกลุ่ม index ของข้อความตามขนาด SSML
+- split_wav(): ตัดไฟล์ WAV เป็นหลายไฟล์ตามช่วงเวลา (วินาที)
+
+การใช้งาน: ใช้โดย GoogleTTS.synthesize_many()
+========================================================
+"""
+import io
+import wave
+from typing import List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+try:
+    from .config import tts_config
+except ImportError:
+    from config import tts_config
+
+
+END_MARK = "end"
+
+
+def mark_name(index: int) -> str:
+    return f"q{index}"
+
+
+def _item_ssml(index: int, text: str) -> str:
+    # เว้นช่วงเงียบท้ายแต่ละข้อ เพื่อให้จุดตัดไม่ตรงกับเสียงพูด
+    return (f'<mark name="{mark_name(index)}"/>{escape(text)}'
+            f'<break time="{tts_config.BATCH_GAP_MS}ms"/>')
+
+
+def build_ssml(texts: Sequence[str]) -> Tuple[str, List[str]]:
+    """
+    Returns:
+        (ssml, ชื่อ mark ของแต่ละข้อตามลำดับ)
+    """
+    body = "".join(_item_ssml(i, text) for i, text in enumerate(texts))
+    return f'<speak>{body}<mark name="{END_MARK}"/></speak>', [mark_name(i) for i in range(len(texts))]
+
+
+def batch_texts(texts: Sequence[str], max_bytes: Optional[int] = None,
+                max_items: Optional[int] = None) -> List[List[int]]:
+    """
+    จัดกลุ่มข้อความติดกันให้ SSML ของแต่ละกลุ่มไม่เกิน max_bytes และไม่เกิน max_items ข้อ
+
+    ข้อความเดียวที่ยาวเกินจะอยู่กลุ่มของตัวเอง (ให้ผู้เรียกถอยไปสังเคราะห์ทีละข้อ)
+    """
+    max_bytes = max_bytes or tts_config.SSML_MAX_BYTES
+    max_items = max_items or tts_config.SSML_MAX_ITEMS
+    overhead = len(build_ssml([])[0].encode("utf-8"))
+    batches: List[List[int]] = []
+    size = overhead
+    for i, text in enumerate(texts):
+        # ความยาวของ mark ขึ้นกับ index ภายในกลุ่ม - ประเมินด้วย index สูงสุดที่เป็นไปได้
+        item = len(_item_ssml(len(texts), text).encode("utf-8"))
+        if batches and size + item <= max_bytes and len(batches[-1]) < max_items:
+            batches[-1].append(i)
+            size += item
+        else:
+            batches.append([i])
+            size = overhead + item
+    return batches
+
+
+def split_wav(audio_content: bytes, bounds: Sequence[Tuple[float, float]]) -> List[bytes]:
+    """
+    ตัดไฟล์ WAV (LINEAR16) เป็นหลายไฟล์ตามช่วงเวลา
+
+    Args:
+        audio_content: ไฟล์ WAV ทั้งไฟล์ตามที่ API คืนมา
+        bounds: [(start_seconds, end_seconds)] ของแต่ละคลิป
+
+    Returns:
+        ไฟล์ WAV ของแต่ละช่วง (header เดียวกับต้นฉบับ)
+    """
+    with wave.open(io.BytesIO(audio_content), "rb") as source:
+        params = source.getparams()
+        frames = source.readframes(source.getnframes())
+
+    frame_size = params.sampwidth * params.nchannels
+    n_frames = len(frames) // frame_size
+    clips = []
+    for start, end in bounds:
+        first = min(n_frames, max(0, int(round(start * params.framerate))))
+        last = min(n_frames, max(first, int(round(end * params.framerate))))
+        output = io.BytesIO()
+        with wave.open(output, "wb") as clip:
+            clip.setnchannels(params.nchannels)
+            clip.setsampwidth(params.sampwidth)
+            clip.setframerate(params.framerate)
+            clip.writeframes(frames[first * frame_size:last * frame_size])
+        clips.append(output.getvalue())
+    return clips
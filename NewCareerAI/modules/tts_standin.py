@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+🧪 tts_standin.py - Local Stand-In for the Google Cloud TTS gRPC API
+=====================================================================
+ฟีเจอร์หลัก:
+- gRPC server ในเครื่องที่รับ SynthesizeSpeech แบบเดียวกับ Google Cloud TTS (v1 และ v1beta1)
+- v1beta1 ตอบ timepoints ของ <mark> ใน SSML - ทดสอบการสังเคราะห์แบบ batch (TTS_BATCH_SYNTHESIS) ได้
+- ใส่ความหน่วง / jitter / error ได้ - ใช้ทดสอบ deadline, circuit breaker และเสียงสำรอง
+- ตอบเป็นเสียง WAV (LINEAR16) สั้นๆ ตามความยาวข้อความ ไม่ต้องมี credentials หรือ internet
+- ใช้ message ของ google-cloud-texttospeech (proto-plus) โดยตรงผ่าน generic handler
+
+ความสามารถ:
+- TTSStandInServer: start() / stop() ฝังในสคริปต์ทดสอบได้
+- main(): รันเป็น server แยก แล้วชี้แอปมาที่ TTS_API_ENDPOINT=localhost:<port>
+- self_test(): เรียก GoogleTTS ผ่าน stand-in หลายครั้ง แสดงเวลา สถานะ breaker และจำนวน RPC
+
+การใช้งาน:
+  python modules/tts_standin.py --port 6020 --delay 6        # ช้ากว่า TTS_DEADLINE เสมอ
+  python modules/tts_standin.py --delay 1 --jitter 4 --error-rate 0.2
+  TTS_API_ENDPOINT=localhost:6020 python main.py
+  python modules/tts_standin.py --delay 6 --self-test       # ตรวจ deadline + breaker + fallback
+=====================================================================
+"""
+import argparse
+import html
+import io
+import math
+import random
+import re
+import struct
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+SERVICE_NAME = "google.cloud.texttospeech.v1.TextToSpeech"
+BETA_SERVICE_NAME = "google.cloud.texttospeech.v1beta1.TextToSpeech"
+SECONDS_PER_CHAR = 0.06  # ความยาวเสียงตอบกลับโดยประมาณต่อหนึ่งตัวอักษร
+MAX_SECONDS = 10.0
+
+
+def tone_wav(seconds: float, sample_rate: int = 16000, frequency: float = 440.0) -> bytes:
+    """เสียง sine แบบ WAV LINEAR16 mono (แทนเสียงพูดจริง)"""
+    n_frames = max(1, int(seconds * sample_rate))
+    frames = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)))
+        for i in range(n_frames)
+    )
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(frames)
+    return output.getvalue()
+
+
+_MARK = re.compile(r'<mark\s+name="([^"]*)"\s*/>')
+_TAG = re.compile(r"<[^>]+>")
+
+
+def speech_seconds(text: str) -> float:
+    """ความยาวเสียงที่ stand-in ตอบสำหรับข้อความนี้"""
+    return min(MAX_SECONDS, 0.2 + len(text) * SECONDS_PER_CHAR)
+
+
+def ssml_timepoints(ssml: str) -> Tuple[List[Tuple[str, float]], float]:
+    """
+    เวลาของแต่ละ <mark> เมื่ออ่าน SSML ด้วยความเร็ว SECONDS_PER_CHAR
+
+    Returns:
+        ([(ชื่อ mark, วินาที), ...], ความยาวเสียงทั้งหมด)
+    """
+    timepoints = []
+    seconds = 0.0
+    parts = _MARK.split(ssml)
+    # parts = [ข้อความ, ชื่อ mark, ข้อความ, ชื่อ mark, ..., ข้อความ]
+    for i, part in enumerate(parts):
+        if i % 2:
+            timepoints.append((part, seconds))
+            continue
+        text = html.unescape(_TAG.sub("", part)).strip()
+        if text:
+            seconds += len(text) * SECONDS_PER_CHAR
+    return timepoints, max(seconds, 0.2)
+
+
+class TTSStandInServer:
+    """gRPC server ที่ทำตัวเหมือน Google Cloud TTS พร้อมความหน่วงที่กำหนดได้"""
+
+    def __init__(self, port: int = 6020, delay: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, max_workers: int = 8):
+        """
+        Args:
+            port: port ที่รับคำขอ (0 = สุ่ม port ว่าง - ดูค่าจริงที่ self.port หลัง start)
+            delay: ความหน่วงคงที่ต่อคำขอ (วินาที)
+            jitter: ความหน่วงสุ่มเพิ่ม 0..jitter วินาที
+            error_rate: สัดส่วนคำขอที่ตอบ UNAVAILABLE
+            max_workers: จำนวนคำขอที่ประมวลผลพร้อมกัน
+        """
+        self.port = port
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_workers = max_workers
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _synthesize(self, request, context, texttospeech=None):
+        import grpc
+        if texttospeech is None:
+            from google.cloud import texttospeech
+
+        with self._lock:
+            self.requests += 1
+        wait = self.delay + random.uniform(0, self.jitter)
+        # หลับทีละช่วงสั้นๆ - หยุดทันทีเมื่อ client ยกเลิก (เกิน deadline)
+        end_time = time.monotonic() + wait
+        while time.monotonic() < end_time:
+            if not context.is_active():
+                return texttospeech.SynthesizeSpeechResponse()
+            time.sleep(min(0.05, end_time - time.monotonic()))
+
+        if random.random() < self.error_rate:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "stand-in: injected error")
+
+        sample_rate = request.audio_config.sample_rate_hertz or 16000
+        if not request.input.ssml:
+            return texttospeech.SynthesizeSpeechResponse(
+                audio_content=tone_wav(speech_seconds(request.input.text), sample_rate))
+
+        timepoints, seconds = ssml_timepoints(request.input.ssml)
+        response = texttospeech.SynthesizeSpeechResponse(audio_content=tone_wav(seconds, sample_rate))
+        # timepoints มีเฉพาะใน v1beta1 และเมื่อขอ SSML_MARK
+        if hasattr(texttospeech, "Timepoint") and getattr(request, "enable_time_pointing", None):
+            response.timepoints = [texttospeech.Timepoint(mark_name=name, time_seconds=at)
+                                   for name, at in timepoints]
+        return response
+
+    def _synthesize_beta(self, request, context):
+        from google.cloud import texttospeech_v1beta1
+        return self._synthesize(request, context, texttospeech_v1beta1)
+
+    def start(self) -> "TTSStandInServer":
+        import grpc
+        from google.cloud import texttospeech, texttospeech_v1beta1
+
+        handlers = tuple(
+            grpc.method_handlers_generic_handler(service, {
+                "SynthesizeSpeech": grpc.unary_unary_rpc_method_handler(
+                    method,
+                    request_deserializer=types.SynthesizeSpeechRequest.deserialize,
+                    response_serializer=types.SynthesizeSpeechResponse.serialize,
+                ),
+            })
+            for service, types, method in ((SERVICE_NAME, texttospeech, self._synthesize),
+                                           (BETA_SERVICE_NAME, texttospeech_v1beta1, self._synthesize_beta))
+        )
+        self._server = grpc.server(ThreadPoolExecutor(max_workers=self.max_workers))
+        self._server.add_generic_rpc_handlers(handlers)
+        self.port = self._server.add_insecure_port(f"127.0.0.1:{self.port}")
+        self._server.start()
+        print(f"🧪 TTS stand-in พร้อมที่ localhost:{self.port} "
+              f"(delay {self.delay}s, jitter {self.jitter}s, error {self.error_rate:.0%})")
+        return self
+
+    def stop(self, grace: Optional[float] = None):
+        if self._server is not None:
+            self._server.stop(grace)
+            self._server = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"localhost:{self.port}"
+
+
+def self_test(server: TTSStandInServer, calls: Optional[int] = None):
+    """เรียก GoogleTTS.synthesize ผ่าน stand-in แล้วแสดงเวลา/สถานะ breaker ของแต่ละครั้ง"""
+    from config import tts_config
+
+    # ต้องตั้งก่อนสร้าง client ตัวแรกของ process
+    tts_config.API_ENDPOINT = server.endpoint
+    from TTSmodule import GoogleTTS
+
+    tts = GoogleTTS()
+    tts.cache = None  # ให้ทุกครั้งวิ่งผ่าน RPC จริง
+    calls = calls or tts_config.BREAKER_FAILURES + 2
+    print(f"\n⏱️ deadline {tts_config.DEADLINE}s, breaker เปิดเมื่อล้มเหลว {tts_config.BREAKER_FAILURES} ครั้ง")
+    for i in range(1, calls + 1):
+        start_time = time.time()
+        audio_content = tts.synthesize(f"ทดสอบครั้งที่ {i}")
+        print(f"  #{i}: {time.time() - start_time:5.2f}s  "
+              f"{'ได้เสียง' if audio_content else 'ไม่ได้เสียง'} ({len(audio_content or b'')} bytes)  "
+              f"breaker={tts.breaker.state}  RPC ที่ server ได้รับ={server.requests}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gRPC stand-in ของ Google Cloud TTS สำหรับทดสอบ deadline/fallback")
+    parser.add_argument("--port", type=int, default=6020)
+    parser.add_argument("--delay", type=float, default=0.0, help="ความหน่วงคงที่ต่อคำขอ (วินาที)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="ความหน่วงสุ่มเพิ่มสูงสุด (วินาที)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="สัดส่วนคำขอที่ตอบ error (0-1)")
+    parser.add_argument("--self-test", action="store_true", help="ทดสอบ GoogleTTS กับ server นี้แล้วจบ")
+    args = parser.parse_args()
+
+    server = TTSStandInServer(args.port, args.delay, args.jitter, args.error_rate).start()
+    if args.self_test:
+        try:
+            self_test(server)
+        finally:
+            server.stop()
+        return
+    print(f"ตั้งค่าแอป: TTS_API_ENDPOINT={server.endpoint}")
+    try:
+        server._server.wait_for_termination()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+🗣️ vad.py - Adaptive Voice Activity Detection & Endpointing
+============================================================
+ฟีเจอร์หลัก:
+- ตรวจจับเสียงพูดระดับ frame แบบ vectorized (NumPy)
+- ใช้พลังงานระยะสั้น (RMS) ร่วมกับ zero-crossing rate (ZCR)
+- Noise floor ปรับตัวเองได้ โดย calibrate จาก frame แรกๆ ของการอัด
+- Endpointing แบบ hangover: หยุดอัดได้ภายในไม่กี่ร้อย ms หลังพูดจบจริง
+
+ความสามารถ:
+- รับเสียงได้ทุก dtype (float32 จาก sounddevice, int16 จากไฟล์ WAV)
+- VoiceActivityDetector.process(): ใช้แบบ streaming ทีละ chunk ระหว่างอัด
+- VoiceActivityDetector.classify(): ใช้กับคลิปที่อัดเสร็จแล้ว
+- speech_regions() / speech_bounds(): หาช่วงที่มีเสียงพูดในคลิป
+- trim_silence(): ตัดช่วงเงียบหัว/ท้ายคลิปก่อนถอดเสียง (คืน view ไม่ copy)
+
+การใช้งาน: from modules.vad import VoiceActivityDetector
+============================================================
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .config import audio_config
+except ImportError:
+    from config import audio_config
+
+
+def to_float_audio(audio: np.ndarray) -> np.ndarray:
+    """แปลงเสียงเป็น float32 ช่วง [-1, 1] ตาม dtype (ไม่ copy ถ้าเป็น float32 อยู่แล้ว)"""
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    if audio.dtype == np.int32:
+        return audio.astype(np.float32) / 2147483648.0
+    if audio.dtype == np.uint8:
+        return (audio.astype(np.float32) - 128.0) / 128.0
+    return audio.astype(np.float32, copy=False)
+
+
+def frame_features(frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    คำนวณพลังงาน (RMS) และ zero-crossing rate ของแต่ละ frame
+
+    Args:
+        frames: array รูป (n_frames, frame_len)
+
+    Returns:
+        (energy, zcr) แต่ละตัวยาว n_frames
+    """
+    energy = np.sqrt(np.mean(np.square(frames), axis=1))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frames.shape[1]
+    return energy, zcr
+
+
+class VoiceActivityDetector:
+    """VAD ระดับ frame พร้อม noise floor แบบ adaptive และ hangover endpointing"""
+
+    def __init__(self, sample_rate: Optional[int] = None, frame_ms: Optional[int] = None,
+                 hangover: Optional[float] = None):
+        """
+        Args:
+            sample_rate: sample rate ของเสียง
+            frame_ms: ความยาว frame (มิลลิวินาที)
+            hangover: ระยะเงียบหลังเสียงพูดที่ถือว่าพูดจบ (วินาที)
+        """
+        self.sample_rate = sample_rate or audio_config.SAMPLE_RATE
+        frame_ms = frame_ms or audio_config.VAD_FRAME_MS
+        self.frame_len = int(self.sample_rate * frame_ms / 1000)
+        self.frame_duration = self.frame_len / self.sample_rate
+        self.calibration_frames = max(1, int(audio_config.VAD_CALIBRATION_MS / frame_ms))
+        self.hangover_frames = max(1, int(round(
+            (audio_config.VAD_HANGOVER if hangover is None else hangover) / self.frame_duration)))
+        self.min_speech_frames = max(1, int(round(audio_config.VAD_MIN_SPEECH / self.frame_duration)))
+        self.energy_ratio = audio_config.VAD_ENERGY_RATIO
+        self.min_energy = audio_config.VAD_MIN_ENERGY
+        self.zcr_max = audio_config.VAD_ZCR_MAX
+        self.noise_max_rise = audio_config.VAD_NOISE_MAX_RISE
+        self.noise_floor_max = audio_config.VAD_NOISE_FLOOR_MAX
+        self.reset()
+
+    def reset(self):
+        """เริ่มสถานะใหม่ (calibrate noise floor ใหม่)"""
+        self.noise_floor: Optional[float] = None
+        self.noise_ceiling: Optional[float] = None
+        self.last_energy = 0.0
+        self.speech_frames = 0
+        self.trailing_silence = 0
+        self._calibration: List[np.ndarray] = []
+        self._remainder = np.zeros(0, dtype=np.float32)
+
+    @property
+    def calibrated(self) -> bool:
+        return self.noise_floor is not None
+
+    @property
+    def speech_started(self) -> bool:
+        """พบเสียงพูด (สะสม) นานพอแล้วหรือยัง"""
+        return self.speech_frames >= self.min_speech_frames
+
+    @property
+    def end_of_speech(self) -> bool:
+        """พูดไปแล้วและเงียบต่อเนื่องครบ hangover"""
+        return self.speech_started and self.trailing_silence >= self.hangover_frames
+
+    def threshold(self) -> float:
+        """ระดับพลังงานขั้นต่ำที่ถือว่าเป็นเสียงพูด"""
+        if self.noise_floor is None:
+            return self.min_energy * self.energy_ratio
+        return max(self.noise_floor * self.energy_ratio, self.min_energy)
+
+    def process(self, chunk: np.ndarray) -> bool:
+        """
+        ประมวลผล chunk จากไมโครโฟนและอัปเดตสถานะ endpointing
+
+        Returns:
+            True หากมีเสียงพูดใน chunk นี้
+        """
+        audio = to_float_audio(chunk).reshape(-1)
+        if self._remainder.size:
+            audio = np.concatenate((self._remainder, audio))
+
+        n_frames = len(audio) // self.frame_len
+        used = n_frames * self.frame_len
+        self._remainder = audio[used:].copy()
+        if n_frames == 0:
+            return False
+
+        frames = audio[:used].reshape(n_frames, self.frame_len)
+        energy, zcr = frame_features(frames)
+        self.last_energy = float(energy.max())
+
+        if not self.calibrated:
+            self._calibration.append(energy)
+            collected = np.concatenate(self._calibration)
+            if len(collected) >= self.calibration_frames:
+                self._set_noise_floor(collected)
+
+        speech = self._classify(energy, zcr)
+        self._update_endpoint(speech)
+        self._adapt(energy, speech)
+        return bool(speech.any())
+
+    def classify(self, audio: np.ndarray) -> np.ndarray:
+        """
+        จำแนกทุก frame ของคลิปที่อัดเสร็จแล้ว
+
+        calibrate จากช่วงต้นคลิป (VAD_CALIBRATION_MS - มักเป็น pre-roll ก่อนเริ่มพูด) หรือช่วงที่เงียบ
+        ที่สุดของคลิป แล้วแต่ค่าใดต่ำกว่า และไม่เกิน VAD_NOISE_FLOOR_MAX
+
+        Returns:
+            boolean array ต่อ frame (True = เสียงพูด)
+        """
+        audio = to_float_audio(audio).reshape(-1)
+        n_frames = len(audio) // self.frame_len
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = audio[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        energy, zcr = frame_features(frames)
+        self._set_noise_floor(energy, energy[:self.calibration_frames])
+        return self._classify(energy, zcr)
+
+    def _set_noise_floor(self, *estimates: np.ndarray):
+        # ใช้ percentile ต่ำ เพื่อไม่ให้เสียงพูดที่เริ่มเร็วดันค่า noise floor ขึ้น
+        # และจำกัดเพดาน - คลิปที่พูดเกือบตลอดไม่มีช่วงเงียบพอให้ percentile สะท้อน noise จริง
+        floor = min(float(np.percentile(energy, 20)) for energy in estimates)
+        self.noise_floor = min(max(floor, 1e-5), self.noise_floor_max)
+        self.noise_ceiling = min(self.noise_floor * self.noise_max_rise, self.noise_floor_max)
+        self._calibration = []
+
+    def _classify(self, energy: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+        threshold = self.threshold()
+        # เสียงพูดมีพลังงานสูงกว่า noise floor และ ZCR ต่ำกว่า noise แบบ hiss
+        # ยกเว้นเสียงเสียดแทรก (ส, ฟ) ที่ ZCR สูงแต่พลังงานสูงกว่ามาก
+        return (energy > threshold) & ((zcr < self.zcr_max) | (energy > threshold * 2))
+
+    def _update_endpoint(self, speech: np.ndarray):
+        if speech.any():
+            last_speech = int(np.flatnonzero(speech)[-1])
+            self.speech_frames += int(np.count_nonzero(speech))
+            self.trailing_silence = len(speech) - 1 - last_speech
+        else:
+            self.trailing_silence += len(speech)
+
+    def _adapt(self, energy: np.ndarray, speech: np.ndarray):
+        # ค่อยๆ ปรับ noise floor ตามช่วงที่ไม่ใช่เสียงพูด (เช่นแอร์เปิด/ปิดระหว่างสัมภาษณ์)
+        if self.noise_floor is None or speech.all():
+            return
+        noise = float(np.mean(energy[~speech]))
+        # จำกัดเพดานตามค่าที่ calibrate - ท้ายเสียงพูดเบาๆ ที่ไม่ผ่าน threshold จะไม่ดัน floor ขึ้นเรื่อยๆ
+        self.noise_floor = min(max(0.95 * self.noise_floor + 0.05 * noise, 1e-5), self.noise_ceiling)
+
+
+def speech_regions(audio: np.ndarray, sample_rate: Optional[int] = None,
+                   min_pause: Optional[float] = None) -> List[Tuple[int, int]]:
+    """
+    หาช่วงเสียงพูดในคลิป (รวมช่วงที่เงียบสั้นกว่า min_pause เข้าด้วยกัน)
+
+    Returns:
+        รายการ (start_sample, end_sample)
+    """
+    vad = VoiceActivityDetector(sample_rate)
+    speech = vad.classify(audio)
+    if not speech.any():
+        return []
+
+    min_pause = audio_config.VAD_HANGOVER if min_pause is None else min_pause
+    min_gap = int(round(min_pause / vad.frame_duration))
+    # หาจุดเริ่ม/จบของแต่ละช่วงจากการเปลี่ยนค่าใน boolean array
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    regions = []
+    for start, end in zip(starts, ends):
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+    return [(int(s * vad.frame_len), int(e * vad.frame_len)) for s, e in regions]
+
+
+def speech_bounds(audio: np.ndarray, sample_rate: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """ตำแหน่ง sample แรกและสุดท้ายที่มีเสียงพูด หรือ None หากไม่มีเสียงพูด"""
+    regions = speech_regions(audio, sample_rate)
+    if not regions:
+        return None
+    return regions[0][0], regions[-1][1]
+
+
+def trim_silence(audio: np.ndarray, sample_rate: Optional[int] = None,
+                 padding: Optional[float] = None) -> np.ndarray:
+    """
+    ตัดช่วงเงียบหัวและท้ายคลิป โดยเผื่อ padding ไว้ก่อน/หลังช่วงเสียงพูด
+
+    Returns:
+        view ของช่วงที่มีเสียงพูด หรือคลิปเดิมหากไม่พบเสียงพูด
+        (ให้โมเดลตัดสินเองเพื่อไม่ตัดเสียงพูดเบาๆ ทิ้ง)
+    """
+    sample_rate = sample_rate or audio_config.SAMPLE_RATE
+    bounds = speech_bounds(audio, sample_rate)
+    if bounds is None:
+        return audio
+    pad = int((audio_config.TRIM_PADDING if padding is None else padding) * sample_rate)
+    start, end = bounds
+    return audio[max(0, start - pad):min(len(audio), end + pad)]
@@ -0,0 +1,15 @@
+"""
+🧪 conftest.py - pytest setup สำหรับ unit tests ของ NewCareerAI
+================================================================
+- เพิ่ม modules/ และโฟลเดอร์โปรเจกต์เข้า sys.path (import แบบเดียวกับ main.py / benchmark_stt.py)
+- เทสต์ที่ต้องใช้ dependency หนัก (numpy, torch, grpc ...) ใช้ pytest.importorskip
+
+การใช้งาน: cd NewCareerAI && python -m pytest -q tests
+================================================================
+"""
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "modules"))
+sys.path.insert(0, PROJECT_DIR)
@@ -0,0 +1,81 @@
+"""
+🧪 test_audio_archive.py - บันทึกและอ่านคืนคลิปจาก AudioArchive
+=================================================================
+- add() -> read(): ได้เสียงเดิม (FLAC lossless ระดับ 16-bit)
+- add_wav(): เก็บเสียง TTS จาก WAV ในหน่วยความจำ
+- entries()/sessions(): กรองตาม session/kind, instance อื่นบนโฟลเดอร์เดียวกันเห็นคลิปใหม่
+- ขึ้น segment ใหม่เมื่อเกิน segment_max_bytes และ offset ชี้ข้อมูลถูกไฟล์
+=================================================================
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("soundfile")
+
+from audio_archive import AudioArchive, new_session_id  # noqa: E402
+from tts_standin import tone_wav  # noqa: E402
+
+RATE = 16000
+
+
+def tone(seconds, frequency=220.0, amplitude=0.5):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def test_round_trip(tmp_path):
+    archive = AudioArchive(tmp_path, "FLAC")
+    session = new_session_id()
+    audio = tone(1.5)
+    entry = archive.add(session, 1, audio, RATE)
+
+    restored, sample_rate = archive.read(entry)
+    assert sample_rate == RATE
+    assert restored.shape == audio.shape
+    assert np.max(np.abs(restored - audio)) < 1e-3
+    assert entry["duration"] == 1.5
+    assert archive.read_bytes(entry)[:4] == b"fLaC"
+
+
+def test_add_wav_and_filters(tmp_path):
+    archive = AudioArchive(tmp_path, "FLAC")
+    first, second = new_session_id(), new_session_id()
+    archive.add_wav(first, 1, tone_wav(0.5, RATE))
+    archive.add(first, 1, tone(1.0), RATE)
+    archive.add(second, 1, tone(0.25), RATE)
+
+    assert archive.sessions() == [first, second]
+    assert [e["kind"] for e in archive.entries(session=first)] == ["question", "answer"]
+    assert len(archive.entries(kind="answer")) == 2
+    question = archive.entries(session=first, kind="question")[0]
+    assert archive.read(question)[0].shape == (RATE // 2,)
+
+    stats = archive.stats()
+    assert (stats["clips"], stats["sessions"], stats["duration"]) == (3, 2, 1.8)
+
+
+def test_other_instance_sees_new_clips(tmp_path):
+    writer = AudioArchive(tmp_path, "FLAC")
+    reader = AudioArchive(tmp_path, "FLAC")
+    session = new_session_id()
+    entry = writer.add(session, 2, tone(0.5), RATE)
+
+    assert reader.entries(session=session) == [entry]
+    assert np.allclose(reader.read(entry)[0], writer.read(entry)[0])
+
+
+def test_segment_rollover_keeps_offsets(tmp_path):
+    archive = AudioArchive(tmp_path, "FLAC", segment_max_bytes=1)
+    session = new_session_id()
+    clips = [tone(0.3, frequency) for frequency in (220.0, 330.0, 440.0)]
+    entries = [archive.add(session, i, clip, RATE) for i, clip in enumerate(clips, 1)]
+
+    assert [e["segment"] for e in entries] == [1, 2, 3]
+    for entry, clip in zip(entries, clips):
+        assert np.max(np.abs(archive.read(entry)[0] - clip)) < 1e-3
+
+    archive = AudioArchive(tmp_path, "FLAC", segment_max_bytes=10 * 1024 * 1024)
+    entry = archive.add(session, 4, tone(0.3), RATE)
+    # segment ล่าสุดยังมีที่ว่าง - ต่อท้ายที่ offset หลังคลิปเดิม
+    assert entry["segment"] == 3 and entry["offset"] == entries[-1]["length"]
+    assert np.max(np.abs(archive.read(entry)[0] - tone(0.3))) < 1e-3
@@ -0,0 +1,116 @@
+"""
+🧪 test_model_manager.py - งบหน่วยความจำ, LRU eviction และ lease ของ ModelManager
+====================================================================================
+- โมเดลที่ใช้ล่าสุดนานที่สุดถูกปล่อยก่อนเมื่อเกินงบ (load_async นับเป็นการใช้)
+- โมเดลที่ถูก lease อยู่ไม่ถูกปล่อยแม้เกินงบ
+- reserve() นับรวมในงบ และปล่อยโมเดลที่ไม่ได้ใช้ให้พอดีงบ
+- unload() หยุด BatchScheduler ของ engine นั้น
+====================================================================================
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from model_manager import MB, ModelManager  # noqa: E402
+from stt_batching import get_scheduler  # noqa: E402
+from stt_engines import STTEngine, make_result  # noqa: E402
+
+
+class FakeEngine(STTEngine):
+    """engine ที่ไม่มีโมเดลจริง - ใช้ 100 MB เสมอ"""
+
+    name = "fake"
+
+    def __init__(self, model_size):
+        super().__init__(model_size)
+        self.unloaded = False
+
+    def _load(self):
+        return object()
+
+    def unload(self):
+        super().unload()
+        self.unloaded = True
+
+    def memory_bytes(self):
+        return 100 * MB
+
+    def transcribe(self, audio, language=None, temperature=None, initial_prompt=None):
+        return make_result("ok", [], language, self.name, self.model_size)
+
+
+def make_manager(budget_mb=300):
+    # ค่าประเมินก่อนโหลดของ "tiny" (~149 MB) มากกว่าขนาดจริงหลังโหลด (100 MB)
+    return ModelManager(lambda backend, size: FakeEngine(f"{backend}-{size}").load(),
+                        budget_bytes=budget_mb * MB)
+
+
+def resident(manager):
+    return [(model["backend"], model["loaded"]) for model in manager.stats()["models"]]
+
+
+def test_lru_eviction_respects_recent_use():
+    manager = make_manager()
+    a = manager.get("a", "tiny")
+    b = manager.get("b", "tiny")
+    manager.load_async("a", "tiny")  # a ถูกใช้ล่าสุด - b เก่าที่สุด
+
+    c = manager.get("c", "tiny")
+    assert b.unloaded and not a.unloaded and not c.unloaded
+    assert resident(manager) == [("a", True), ("c", True)]
+    assert manager.evictions == 1
+    assert manager.resident_bytes() == 200 * MB
+
+
+def test_leased_models_are_never_evicted():
+    manager = make_manager()
+    a = manager.get("a", "tiny")
+    b = manager.get("b", "tiny")
+    with manager.lease("a", "tiny") as leased_a, manager.lease("b", "tiny"):
+        assert leased_a is a
+        c = manager.get("c", "tiny")
+        # เกินงบแต่ a/b ถูกใช้อยู่ - ไม่ปล่อย
+        assert not a.unloaded and not b.unloaded
+        assert manager.resident_bytes() == 300 * MB
+
+    manager.get("d", "tiny")
+    assert a.unloaded and b.unloaded and not c.unloaded
+    assert [backend for backend, _ in resident(manager)] == ["c", "d"]
+
+
+def test_lease_reloads_evicted_model():
+    manager = make_manager(budget_mb=150)
+    first = manager.get("a", "tiny")
+    manager.get("b", "tiny")
+    assert first.unloaded
+
+    with manager.lease("a", "tiny") as engine:
+        assert engine is not first and engine.is_loaded
+
+
+def test_reserve_counts_against_budget():
+    manager = make_manager()
+    a = manager.get("a", "tiny")
+    b = manager.get("b", "tiny")
+    manager.reserve("workers", 150 * MB)
+
+    assert a.unloaded and not b.unloaded
+    assert manager.resident_bytes() == 250 * MB
+    manager.release("workers")
+    assert manager.resident_bytes() == 100 * MB
+
+
+def test_unload_stops_batch_scheduler():
+    manager = make_manager(budget_mb=150)
+    engine = manager.get("a", "tiny")
+    scheduler = get_scheduler(engine)
+    assert get_scheduler(engine) is scheduler
+    assert scheduler.submit(np.zeros(1600, dtype=np.float32)).result(timeout=5)["text"] == "ok"
+
+    manager.get("b", "tiny")  # ปล่อย a - scheduler ต้องหยุดด้วย
+    assert engine.unloaded and scheduler.closed
+    scheduler._thread.join(timeout=5)
+    assert not scheduler._thread.is_alive()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(np.zeros(1600, dtype=np.float32))
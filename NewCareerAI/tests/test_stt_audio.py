@@ -0,0 +1,125 @@
+"""
+🧪 test_stt_audio.py - ring buffer, การแบ่งคลิปยาว และ tiered escalation
+=========================================================================
+- AudioRingBuffer: อ่านข้ามจุดวน, ข้อมูลที่ถูกเขียนทับ, peak/rms สะสม
+- split_at_pauses: ตัดตรงช่วงเงียบระหว่างช่วงพูด ไม่ซ้อนกัน
+- merge_results: ต่อข้อความและเลื่อน timestamp ตาม offset
+- escalation_ranges: รวม segment ที่ไม่มั่นใจและอยู่ติดกัน
+=========================================================================
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from audio_buffer import AudioRingBuffer  # noqa: E402
+from config import whisper_config  # noqa: E402
+from stt_engines import make_result  # noqa: E402
+from stt_parallel import merge_results, split_at_pauses  # noqa: E402
+from stt_tiered import escalation_ranges  # noqa: E402
+
+RATE = 16000
+
+
+def test_ring_buffer_wraparound():
+    buffer = AudioRingBuffer(10)
+    buffer.write(np.arange(0, 7, dtype=np.float32))
+    assert not buffer.wrapped
+    assert np.array_equal(buffer.clip(), np.arange(0, 7))
+
+    buffer.write(np.arange(7, 13, dtype=np.float32))
+    assert buffer.wrapped
+    assert (buffer.written, buffer.available, buffer.oldest) == (13, 10, 3)
+    assert np.array_equal(buffer.clip(), np.arange(3, 13))
+    assert np.array_equal(buffer.view(8, 12), np.arange(8, 12))   # คร่อมจุดวน (copy)
+    assert np.array_equal(buffer.view(4, 8), np.arange(4, 8))     # ไม่คร่อม (view)
+    assert np.array_equal(buffer.view(0, 5), np.arange(3, 5))     # ส่วนที่ถูกเขียนทับแล้วถูกตัดออก
+    assert buffer.view(12, 12).size == 0
+    assert buffer.peak == 12.0
+
+
+def test_ring_buffer_stats_and_reset():
+    buffer = AudioRingBuffer(4)
+    buffer.write(np.array([0.5, -1.0], dtype=np.float32))
+    buffer.write(np.array([0.25, 0.25, 0.25], dtype=np.float32))
+    assert buffer.peak == 1.0
+    assert buffer.rms == pytest.approx(np.sqrt((0.25 + 1.0 + 3 * 0.0625) / 5))
+
+    buffer.reset()
+    assert (buffer.written, buffer.peak, buffer.rms) == (0, 0.0, 0.0)
+    assert buffer.clip().size == 0
+
+
+def speech_with_pauses(layout):
+    """layout = [(วินาที, เป็นเสียงพูดหรือไม่)] -> (audio, [(start, end) ของช่วงพูด])"""
+    rng = np.random.default_rng(0)
+    parts, regions, position = [], [], 0
+    for seconds, speech in layout:
+        n = int(seconds * RATE)
+        if speech:
+            t = np.arange(n) / RATE
+            parts.append(0.3 * np.sin(2 * np.pi * 200 * t))
+            regions.append((position, position + n))
+        else:
+            parts.append(0.001 * rng.standard_normal(n))
+        position += n
+    return np.concatenate(parts).astype(np.float32), regions
+
+
+def test_split_at_pauses_cuts_inside_silences(monkeypatch):
+    monkeypatch.setattr(whisper_config, "PARALLEL_MIN_PAUSE", 0.3)
+    audio, regions = speech_with_pauses([(0.5, False), (3, True), (1, False), (3, True),
+                                         (1, False), (3, True), (0.5, False)])
+    bounds = split_at_pauses(audio, parts=3, min_segment=1.0)
+
+    assert len(bounds) == 3
+    for (start, end), (speech_start, speech_end) in zip(bounds, regions):
+        # ช่วงพูดอยู่ครบในชิ้นของตัวเอง (เผื่อความละเอียดของ VAD frame)
+        assert start <= speech_start + 0.05 * RATE and end >= speech_end - 0.05 * RATE
+    for (_, end), (next_start, _), (_, speech_end), (next_speech, _) in zip(
+            bounds, bounds[1:], regions, regions[1:]):
+        assert end <= next_start
+        assert speech_end - 0.05 * RATE <= end <= next_speech
+
+
+def test_split_at_pauses_groups_short_regions():
+    audio, _ = speech_with_pauses([(0.5, False), (1, True), (0.5, False), (1, True), (0.5, False)])
+    # ช่วงพูดรวมสั้นกว่า min_segment - อยู่ชิ้นเดียว
+    assert len(split_at_pauses(audio, parts=4, min_segment=10.0)) == 1
+
+
+def test_split_at_pauses_silent_clip_is_one_piece():
+    audio = np.zeros(RATE * 2, dtype=np.float32)
+    assert split_at_pauses(audio, parts=4) == [(0, len(audio))]
+
+
+def segment(start, end, text, avg_logprob=-0.2, compression_ratio=1.2, no_speech_prob=0.01):
+    return {"id": 0, "start": start, "end": end, "text": text, "avg_logprob": avg_logprob,
+            "compression_ratio": compression_ratio, "no_speech_prob": no_speech_prob}
+
+
+def test_merge_results_offsets_segments():
+    first = make_result("สวัสดีครับ", [segment(0.0, 1.0, "สวัสดี"), segment(1.0, 2.0, "ครับ")],
+                        "th", "whisper", "small")
+    silent = make_result("", [], None, "whisper", "small")
+    last = make_result("ขอบคุณ", [segment(0.5, 1.5, "ขอบคุณ")], "th", "whisper", "small")
+    merged = merge_results([first, silent, last], [0.0, 4.0, 7.5], "whisper", "small")
+
+    assert merged["text"] == "สวัสดีครับ ขอบคุณ"
+    assert merged["language"] == "th"
+    assert [s["id"] for s in merged["segments"]] == [0, 1, 2]
+    assert [(s["start"], s["end"]) for s in merged["segments"]] == [(0.0, 1.0), (1.0, 2.0), (8.0, 9.0)]
+
+
+def test_escalation_ranges_groups_adjacent_low_confidence():
+    low_logprob = whisper_config.ESCALATE_LOGPROB - 0.5
+    segments = [
+        segment(0, 1, "ชัด"),
+        segment(1, 2, "ไม่ชัด", avg_logprob=low_logprob),
+        segment(2, 3, "ซ้ำ ซ้ำ ซ้ำ", compression_ratio=whisper_config.ESCALATE_COMPRESSION + 1),
+        segment(3, 4, "ชัด"),
+        segment(4, 5, "ผี", no_speech_prob=whisper_config.ESCALATE_NO_SPEECH + 0.1),
+        segment(5, 6, "", no_speech_prob=0.99),  # เงียบจริงและไม่มีข้อความ - ไม่ต้องยกระดับ
+    ]
+    assert escalation_ranges(segments) == [(1, 2), (4, 4)]
+    assert escalation_ranges([]) == []
@@ -0,0 +1,141 @@
+"""
+🧪 test_stt_short_utterance.py - short-utterance mode ของ WhisperEngine
+========================================================================
+- ความยาวหน้าต่าง encoder: ปัดขึ้นตาม bucket และไม่เกิน 30 วินาที
+- _ShortWindowEncoder: mel สั้นได้ผลเท่ากับช่วงต้นของ encoder เดิม, mel เต็มได้ผลเท่า encoder เดิม
+- quality gate: ผลที่ไม่ผ่านเกณฑ์ถอยไปถอดแบบเต็มหน้าต่าง, ช่วงเงียบคืนข้อความว่าง
+- เทียบ transcribe_short กับ transcribe_full บนคลิปจริง (ตั้ง STT_TEST_MODEL=tiny เพื่อรัน - ต้องโหลดโมเดล)
+========================================================================
+"""
+import os
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+whisper = pytest.importorskip("whisper")
+
+from config import audio_config, whisper_config  # noqa: E402
+from stt_engines import (WhisperEngine, _ShortWindowEncoder, load_audio_file,  # noqa: E402
+                         short_window_samples)
+
+RATE = audio_config.SAMPLE_RATE
+N_SAMPLES = whisper.audio.N_SAMPLES
+
+
+def tiny_model():
+    """โมเดล Whisper น้ำหนักสุ่มขนาดเล็ก (ไม่ต้องดาวน์โหลด) สำหรับตรวจรูปร่าง tensor"""
+    from whisper.model import ModelDimensions, Whisper
+
+    torch.manual_seed(0)
+    dims = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=64, n_audio_head=2,
+                           n_audio_layer=2, n_vocab=51865, n_text_ctx=448, n_text_state=64,
+                           n_text_head=2, n_text_layer=2)
+    return Whisper(dims).eval()
+
+
+def engine_with(model):
+    engine = WhisperEngine("tiny")
+    engine.model = model
+    return engine
+
+
+@pytest.mark.parametrize("seconds, expected", [
+    (0.3, 2.0),    # สั้นกว่า bucket - pad เป็น bucket เดียว
+    (2.0, 2.0),    # พอดี bucket - ไม่ pad เพิ่ม
+    (3.1, 4.0),    # ปัดขึ้นเป็น bucket ถัดไป
+    (29.5, 30.0),  # ปัดขึ้นแล้วเกิน 30 วินาที - ตัดที่หน้าต่างเต็ม
+    (45.0, 30.0),  # ยาวกว่าหน้าต่าง - truncate
+])
+def test_short_window_samples(seconds, expected):
+    n_samples = short_window_samples(int(seconds * RATE), N_SAMPLES, bucket=2.0)
+    assert n_samples == int(expected * RATE)
+
+
+def test_short_window_encoder_matches_full_encoder_prefix():
+    model = tiny_model()
+    full_mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.zeros(N_SAMPLES)))[None]
+    with torch.no_grad():
+        full = model.encoder(full_mel)
+        same = _ShortWindowEncoder(model.encoder)(full_mel)
+        # mel 4 วินาที = 400 frame -> 200 ตำแหน่งหลัง conv2 (stride 2)
+        short = _ShortWindowEncoder(model.encoder)(full_mel[..., :400])
+
+    assert torch.allclose(same, full, atol=1e-5)
+    assert short.shape == (1, 200, model.dims.n_audio_state)
+
+
+def test_transcribe_short_pads_audio_to_bucket(monkeypatch):
+    model = tiny_model()
+    engine = engine_with(model)
+    seen = {}
+
+    def fake_decode(wrapped, mel, options):
+        seen["frames"] = mel.shape[-1]
+        return SimpleNamespace(text="สวัสดี", language="th", avg_logprob=-0.2,
+                               no_speech_prob=0.01, compression_ratio=1.1)
+
+    monkeypatch.setattr(whisper, "decode", fake_decode)
+    audio = np.zeros(int(3.1 * RATE), dtype=np.float32)
+    result = engine.transcribe_short(audio)
+
+    bucket_samples = short_window_samples(len(audio), N_SAMPLES)
+    assert seen["frames"] == bucket_samples // whisper.audio.HOP_LENGTH
+    assert result["text"] == "สวัสดี"
+    assert result["segments"][0]["end"] == pytest.approx(len(audio) / RATE)
+
+
+def test_quality_gate_falls_back_to_full_window(monkeypatch):
+    engine = engine_with(tiny_model())
+    monkeypatch.setattr(whisper, "decode", lambda *args: SimpleNamespace(
+        text="ซ้ำ ซ้ำ ซ้ำ", language="th", avg_logprob=-0.3, no_speech_prob=0.1, compression_ratio=3.0))
+    full_result = {"text": "ผลเต็มหน้าต่าง"}
+    monkeypatch.setattr(engine, "transcribe_full", lambda *args, **kwargs: full_result)
+    monkeypatch.setattr(whisper_config, "SHORT_UTTERANCE", True)
+
+    audio = np.zeros(2 * RATE, dtype=np.float32)
+    assert engine.transcribe_short(audio) is None
+    assert engine.transcribe(audio) is full_result
+
+
+def test_quality_gate_returns_empty_text_for_silence(monkeypatch):
+    engine = engine_with(tiny_model())
+    monkeypatch.setattr(whisper, "decode", lambda *args: SimpleNamespace(
+        text="...", language="th", avg_logprob=-1.5, no_speech_prob=0.9, compression_ratio=1.0))
+
+    result = engine.transcribe_short(np.zeros(RATE, dtype=np.float32))
+    assert result["text"] == ""
+    assert result["segments"] == []
+
+
+def test_long_clips_skip_short_mode(monkeypatch):
+    engine = engine_with(tiny_model())
+    monkeypatch.setattr(whisper_config, "SHORT_UTTERANCE", True)
+    monkeypatch.setattr(engine, "transcribe_short", lambda *args: pytest.fail("ไม่ควรใช้ short mode"))
+    monkeypatch.setattr(engine, "transcribe_full", lambda *args, **kwargs: {"text": "full"})
+
+    audio = np.zeros(int((whisper_config.SHORT_UTTERANCE_MAX + 1) * RATE), dtype=np.float32)
+    assert engine.transcribe(audio)["text"] == "full"
+
+
+@pytest.mark.skipif(not os.getenv("STT_TEST_MODEL"), reason="ตั้ง STT_TEST_MODEL (เช่น tiny) เพื่อเทียบกับโมเดลจริง")
+def test_short_mode_matches_full_window_on_recorded_answers():
+    from benchmark_stt import character_error_rate
+    from conftest import PROJECT_DIR
+    from vad import trim_silence
+
+    engine = WhisperEngine(os.environ["STT_TEST_MODEL"]).load()
+    clips = [os.path.join(PROJECT_DIR, f"answer_{i}.wav") for i in range(1, 4)]
+    clips = [path for path in clips if os.path.exists(path)]
+    if not clips:
+        pytest.skip("ไม่มีไฟล์ answer_*.wav")
+
+    for path in clips:
+        # ตัดให้สั้นกว่า SHORT_UTTERANCE_MAX ตามที่ใช้งานจริง
+        audio = trim_silence(load_audio_file(path))[:int(whisper_config.SHORT_UTTERANCE_MAX * RATE)]
+        full = engine.transcribe_full(audio)
+        short = engine.transcribe_short(audio)
+        if short is None:
+            continue  # ไม่ผ่าน quality gate - ใช้งานจริงจะถอดแบบเต็มหน้าต่างแทน
+        assert character_error_rate(full["text"], short["text"]) <= 0.3, path
@@ -0,0 +1,144 @@
+"""
+🧪 test_tts_standin.py - deadline / circuit breaker / เสียงสำรอง ของ GoogleTTS ผ่าน stand-in
+============================================================================================
+- CircuitBreaker: เปิดเมื่อล้มเหลวติดกัน, half-open ปล่อยคำขอทดลองครั้งละหนึ่ง, release() ไม่นับผล
+- GoogleTTS กับ TTSStandInServer (ต้องมี grpc / google-cloud-texttospeech / pygame):
+  - server ช้ากว่า TTS_DEADLINE: คืนภายใน deadline แล้วใช้เสียงสำรอง
+  - ล้มเหลวครบ threshold: breaker เปิด ไม่ส่ง RPC ไปที่ server อีก
+  - UNAVAILABLE นับเป็นความล้มเหลว, server ปกติได้เสียง WAV
+  - v1beta1 SSML batch: ตัดเสียงตาม timepoints ของ stand-in
+============================================================================================
+"""
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from config import tts_config
+
+FALLBACK_AUDIO = b"RIFF-local-fallback"
+
+
+def test_breaker_opens_after_threshold_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=2, cooldown=0.05)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()          # คำขอทดลอง
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()      # ครั้งละหนึ่งคำขอ
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_breaker_release_returns_trial_without_counting():
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown=0.0)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()          # ปล่อยคำขอทดลองใหม่ได้
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+class FakeLocalTTS:
+    def __init__(self):
+        self.calls = 0
+
+    def synthesize(self, text, voice_type=None, audio_encoding=None):
+        self.calls += 1
+        return FALLBACK_AUDIO, "LINEAR16"
+
+
+@pytest.fixture(scope="module")
+def standin():
+    pytest.importorskip("grpc")
+    pytest.importorskip("google.cloud.texttospeech")
+    pytest.importorskip("google.cloud.texttospeech_v1beta1")
+    from tts_standin import TTSStandInServer
+
+    server = TTSStandInServer(port=0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="module")
+def tts_module(standin):
+    pytest.importorskip("pygame")
+    import tts_clients
+
+    # ต้องตั้ง endpoint ก่อนสร้าง client ตัวแรกของ process (รวม google_tts ตอน import TTSmodule)
+    endpoint = tts_config.API_ENDPOINT
+    tts_config.API_ENDPOINT = standin.endpoint
+    tts_clients._clients.clear()
+    import TTSmodule
+    yield TTSmodule
+    tts_config.API_ENDPOINT = endpoint
+    tts_clients._clients.clear()
+
+
+@pytest.fixture
+def tts(tts_module, standin, monkeypatch):
+    standin.delay = standin.jitter = standin.error_rate = 0.0
+    monkeypatch.setattr(tts_config, "DEADLINE", 0.5)
+    tts = tts_module.GoogleTTS()
+    tts.cache = None  # ทุกครั้งต้องวิ่งผ่าน RPC
+    tts.breaker = CircuitBreaker("stand-in", failure_threshold=2, cooldown=60.0)
+    tts.local = FakeLocalTTS()
+    return tts
+
+
+def test_healthy_standin_returns_wav(tts, standin):
+    before = standin.requests
+    audio_content = tts.synthesize("สวัสดีครับ", audio_encoding="LINEAR16")
+
+    assert audio_content.startswith(b"RIFF")
+    assert standin.requests == before + 1
+    assert tts.local.calls == 0
+    assert tts.breaker.state == CLOSED
+
+
+def test_deadline_falls_back_and_opens_breaker(tts, standin):
+    standin.delay = 3.0
+    before = standin.requests
+
+    for _ in range(2):
+        start_time = time.monotonic()
+        assert tts.synthesize("ช้าเกินไป", audio_encoding="LINEAR16") == FALLBACK_AUDIO
+        assert time.monotonic() - start_time < tts_config.DEADLINE + 1.0
+    assert tts.breaker.state == OPEN
+    assert standin.requests == before + 2
+
+    # วงจรเปิด - ใช้เสียงสำรองทันทีโดยไม่ส่ง RPC
+    start_time = time.monotonic()
+    assert tts.synthesize("ข้าม Google", audio_encoding="LINEAR16") == FALLBACK_AUDIO
+    assert time.monotonic() - start_time < 0.2
+    assert standin.requests == before + 2
+    assert tts.local.calls == 3
+
+
+def test_unavailable_counts_as_failure(tts, standin):
+    standin.error_rate = 1.0
+    assert tts.synthesize("error", audio_encoding="LINEAR16") == FALLBACK_AUDIO
+    assert tts.synthesize("error", audio_encoding="LINEAR16") == FALLBACK_AUDIO
+    assert tts.breaker.state == OPEN
+
+
+def test_fallback_with_wrong_encoding_is_dropped(tts, standin):
+    standin.error_rate = 1.0
+    assert tts.synthesize("mp3 please", audio_encoding="MP3") is None
+
+
+def test_ssml_batch_splits_at_standin_marks(tts, standin, monkeypatch):
+    monkeypatch.setattr(tts_config, "AUDIO_ENCODING", "LINEAR16")  # ตัดตาม mark ได้เฉพาะ WAV
+    texts = ["คำถามแรก", "คำถามที่สองยาวกว่า", "ข้อสุดท้าย"]
+    clips = tts._synthesize_ssml_batch(texts, None)
+
+    assert clips is not None and len(clips) == len(texts)
+    assert all(clip.startswith(b"RIFF") for clip in clips)
+    assert tts.breaker.state == CLOSED
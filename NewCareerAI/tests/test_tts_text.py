@@ -0,0 +1,100 @@
+"""
+🧪 test_tts_text.py - การตัดข้อความและ SSML สำหรับ TTS
+========================================================
+- split_sentences: ช่วงแรกสั้น, ไม่เกิน max_chars, ตัดวลียาวที่ไม่มีช่องว่าง, ลบ markdown
+- build_ssml / batch_texts: mark ต่อข้อ, escape, จำกัดขนาด/จำนวนข้อต่อ request
+- split_wav: ตัด WAV ตามเวลาของ mark (รวมกับ timepoints ของ stand-in)
+========================================================
+"""
+import io
+import wave
+
+from tts_segment import clean_for_speech, split_sentences
+from tts_ssml import END_MARK, batch_texts, build_ssml, mark_name, split_wav
+from tts_standin import SECONDS_PER_CHAR, ssml_timepoints, tone_wav
+
+
+def wav_frames(audio_content: bytes) -> int:
+    with wave.open(io.BytesIO(audio_content), "rb") as wav:
+        return wav.getnframes()
+
+
+def test_split_sentences_keeps_first_segment_short():
+    assert split_sentences("aaaaa bbb ccc ddd", max_chars=10, first_max_chars=5) == \
+        ["aaaaa", "bbb ccc", "ddd"]
+
+
+def test_split_sentences_respects_limits_and_order():
+    text = "สวัสดีครับ ยินดีต้อนรับสู่การสัมภาษณ์ วันนี้เราจะคุยกันเรื่องประสบการณ์ทำงาน. พร้อมไหมครับ?"
+    segments = split_sentences(text, max_chars=20, first_max_chars=12)
+
+    assert len(segments[0]) <= 12
+    assert all(len(segment) <= 20 for segment in segments)
+    assert "".join(segments).replace(" ", "") == text.replace(" ", "")
+
+
+def test_split_sentences_hard_splits_long_phrases():
+    assert split_sentences("x" * 25, max_chars=10, first_max_chars=10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_split_sentences_strips_markdown():
+    text = "# สรุปผล\n- **จุดแข็ง**: สื่อสารชัดเจน\n- ดู [รายละเอียด](https://example.com)"
+    spoken = " ".join(split_sentences(text, max_chars=200, first_max_chars=200))
+
+    assert not set("#*[]()") & set(spoken)
+    assert "https" not in spoken
+    assert "รายละเอียด" in spoken
+    assert "\n" in clean_for_speech("บรรทัดแรก\nบรรทัดสอง")
+
+
+def test_split_sentences_empty_text():
+    assert split_sentences("  \n ") == []
+
+
+def test_build_ssml_marks_and_escapes():
+    ssml, marks = build_ssml(["ข้อแรก", "A & B <C>"])
+
+    assert marks == [mark_name(0), mark_name(1)]
+    assert ssml.startswith("<speak>") and ssml.endswith(f'<mark name="{END_MARK}"/></speak>')
+    assert "A &amp; B &lt;C&gt;" in ssml
+    assert ssml.index(f'"{marks[0]}"') < ssml.index(f'"{marks[1]}"') < ssml.index(f'"{END_MARK}"')
+
+
+def test_batch_texts_caps_items_and_bytes():
+    texts = ["คำถามข้อที่ %d" % i for i in range(7)]
+    batches = batch_texts(texts, max_bytes=10_000, max_items=3)
+
+    assert [i for batch in batches for i in batch] == list(range(7))
+    assert all(len(batch) <= 3 for batch in batches)
+
+    # ข้อความที่ยาวเกินงบอยู่กลุ่มเดียว (ผู้เรียกถอยไปสังเคราะห์ทีละข้อ)
+    texts = ["สั้น", "ก" * 2000, "สั้นอีกข้อ", "ข้อสุดท้าย"]
+    batches = batch_texts(texts, max_bytes=1000, max_items=4)
+    assert [1] in batches
+    for batch in batches:
+        if len(batch) > 1:
+            assert len(build_ssml([texts[i] for i in batch])[0].encode("utf-8")) <= 1000
+
+
+def test_split_wav_clamps_bounds():
+    audio_content = tone_wav(1.0, sample_rate=16000)
+    clips = split_wav(audio_content, [(0.0, 0.25), (0.25, 1.0), (0.9, 2.0), (1.5, 2.0)])
+
+    assert [wav_frames(clip) for clip in clips] == [4000, 12000, 1600, 0]
+    with wave.open(io.BytesIO(clips[0]), "rb") as wav:
+        assert (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) == (16000, 1, 2)
+
+
+def test_split_wav_at_standin_timepoints():
+    texts = ["สวัสดีครับ", "แนะนำตัวเองหน่อยครับ", "ขอบคุณครับ"]
+    ssml, marks = build_ssml(texts)
+    timepoints, seconds = ssml_timepoints(ssml)
+    times = dict(timepoints)
+
+    assert [name for name, _ in timepoints] == marks + [END_MARK]
+    starts = [times[mark] for mark in marks]
+    bounds = list(zip(starts, starts[1:] + [times[END_MARK]]))
+    clips = split_wav(tone_wav(seconds, sample_rate=16000), bounds)
+
+    for text, clip in zip(texts, clips):
+        assert abs(wav_frames(clip) / 16000 - len(text) * SECONDS_PER_CHAR) < 0.01